@@ -0,0 +1,61 @@
+"""Shared helpers for the benchmark scripts.
+
+Run a benchmark from the repository root, e.g.::
+
+    python -m benchmarks.bench_booking_history
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from database import connection, migrate
+
+
+@contextmanager
+def temp_db():
+    """Yield a migrated, seeded sqlite3 connection to a throwaway database.
+
+    `connection.DB_PATH` points at the same file for the duration, so
+    services can be benchmarked against it too.
+    """
+    previous = connection.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / "bench.db"
+        connection.DB_PATH = db_file
+        conn = sqlite3.connect(db_file, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        migrate.migrate(conn)
+        try:
+            yield conn
+        finally:
+            conn.close()
+            connection.close_all()
+            connection.DB_PATH = previous
+
+
+def timed(fn, *, repeat: int = 5) -> float:
+    """Return the median wall time of `fn()` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def print_table(title: str, header: list[str], rows: list[list]) -> None:
+    widths = [
+        max(len(str(cell)) for cell in [h] + [r[i] for r in rows])
+        for i, h in enumerate(header)
+    ]
+    print(title)
+    print("  ".join(str(h).rjust(w) for h, w in zip(header, widths)))
+    for row in rows:
+        print("  ".join(str(c).rjust(w) for c, w in zip(row, widths)))
+    print()
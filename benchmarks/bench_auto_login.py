@@ -0,0 +1,78 @@
+"""Startup auto-login vs the number of stored sessions: `main_menu` now reads
+this device's token from its pointer file and looks it up by primary key
+(`session.get_device_session`); it used to search every unexpired session
+joined to its user for the most recent one."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+from benchmarks._common import print_table, temp_db, timed
+from services import session as session_service
+
+SIZES = (1_000, 100_000, 1_000_000)
+USERS = 1_000
+
+# the query main_menu used before the device pointer
+OLD_ACTIVE_SESSION_SQL = """
+    SELECT s.token, s.user_id, s.expires_at, u.username, u.role
+    FROM sessions s
+    JOIN users u ON s.user_id = u.id
+    WHERE s.expires_at > ?
+    ORDER BY s.created_at DESC
+    LIMIT 1
+"""
+
+
+def seed_sessions(conn, start: int, stop: int) -> None:
+    expires = (datetime.now(timezone.utc) + timedelta(hours=12)).isoformat()
+    conn.execute(
+        f"""
+        WITH RECURSIVE n(i) AS (SELECT {start} UNION ALL SELECT i + 1 FROM n WHERE i < {stop - 1})
+        INSERT INTO sessions (token, user_id, expires_at, created_at)
+        SELECT 'tok' || i, 2 + i % {USERS}, ?, datetime('2026-01-01', '+' || i || ' seconds')
+        FROM n
+        """,
+        (expires,),
+    )
+    conn.commit()
+
+
+def cold_device_lookup() -> None:
+    # a fresh process: nothing cached yet
+    session_service._store = None
+    assert session_service.get_device_session() is not None
+
+
+def main() -> None:
+    with temp_db() as conn:
+        conn.execute(
+            f"""
+            WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {USERS})
+            INSERT INTO users (username, email, password_hash, role)
+            SELECT 'u' || i, 'u' || i || '@example.com', 'x', 'customer' FROM n
+            """
+        )
+        conn.commit()
+
+        rows = []
+        seeded = 0
+        for size in SIZES:
+            seed_sessions(conn, seeded, size)
+            seeded = size
+            session_service.remember_device(f"tok{size // 2}")
+
+            now = datetime.now(timezone.utc).isoformat()
+            old_ms = timed(lambda: conn.execute(OLD_ACTIVE_SESSION_SQL, (now,)).fetchone(), repeat=3)
+            new_ms = timed(cold_device_lookup)
+            rows.append([f"{size:,}", f"{old_ms:.2f}", f"{new_ms:.3f}"])
+
+        print_table(
+            "Auto-login lookup at startup (median ms)",
+            ["sessions", "old (search all sessions)", "new (device pointer)"],
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Per-user booking history latency: single schedule join vs the old
+four correlated subqueries, for users with 10, 1k and 50k bookings."""
+
+from __future__ import annotations
+
+from benchmarks._common import print_table, temp_db, timed
+from database import queries
+
+SIZES = (10, 1_000, 50_000)
+
+# The pre-0003 query, kept here only for comparison.
+LEGACY_HISTORY_SQL = """
+SELECT
+    b.id, b.booking_code, u.username, u.full_name, b.travel_date, b.fare,
+    b.status AS booking_status, b.created_at, t.train_number, t.train_name,
+    so.name AS origin_station, sd.name AS destination_station,
+    (SELECT s.departure_time FROM schedules s
+      WHERE s.train_id = b.train_id AND s.origin_station_id = b.origin_station_id
+        AND s.destination_station_id = b.destination_station_id
+        AND s.departure_date = b.travel_date LIMIT 1) AS departure_time,
+    (SELECT s.arrival_time FROM schedules s
+      WHERE s.train_id = b.train_id AND s.origin_station_id = b.origin_station_id
+        AND s.destination_station_id = b.destination_station_id
+        AND s.departure_date = b.travel_date LIMIT 1) AS arrival_time,
+    (SELECT s.departure_date FROM schedules s
+      WHERE s.train_id = b.train_id AND s.origin_station_id = b.origin_station_id
+        AND s.destination_station_id = b.destination_station_id
+        AND s.departure_date = b.travel_date LIMIT 1) AS departure_date,
+    (SELECT s.arrival_date FROM schedules s
+      WHERE s.train_id = b.train_id AND s.origin_station_id = b.origin_station_id
+        AND s.destination_station_id = b.destination_station_id
+        AND s.departure_date = b.travel_date LIMIT 1) AS arrival_date,
+    p.amount AS payment_amount, p.method AS payment_method,
+    p.status AS payment_status, p.transaction_id
+FROM bookings b
+JOIN users u ON b.user_id = u.id
+JOIN trains t ON b.train_id = t.id
+JOIN stations so ON b.origin_station_id = so.id
+JOIN stations sd ON b.destination_station_id = sd.id
+LEFT JOIN payments p ON p.booking_id = b.id
+WHERE b.user_id = ?
+ORDER BY b.created_at DESC
+"""
+
+
+def seed_user(conn, username: str, bookings: int) -> int:
+    cur = conn.execute(
+        "INSERT INTO users (username, email, password_hash, role) VALUES (?, ?, 'x', 'customer')",
+        (username, f"{username}@example.com"),
+    )
+    user_id = cur.lastrowid
+    schedules = conn.execute(
+        "SELECT id, train_id, origin_station_id, destination_station_id, departure_date, fare FROM schedules"
+    ).fetchall()
+    rows = []
+    for i in range(bookings):
+        s = schedules[i % len(schedules)]
+        rows.append(
+            (f"{username}-{i}", user_id, s["train_id"], s["origin_station_id"],
+             s["destination_station_id"], s["departure_date"], s["fare"], s["id"])
+        )
+    conn.executemany(
+        """
+        INSERT INTO bookings (
+            booking_code, user_id, train_id, origin_station_id,
+            destination_station_id, travel_date, fare, schedule_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.execute(
+        """
+        INSERT INTO payments (booking_id, amount, method, status, transaction_id)
+        SELECT id, fare, 'card', 'success', 'TX' || id FROM bookings WHERE user_id = ?
+        """,
+        (user_id,),
+    )
+    conn.commit()
+    return user_id
+
+
+def main() -> None:
+    with temp_db() as conn:
+        users = {size: seed_user(conn, f"user{size}", size) for size in SIZES}
+
+        rows = []
+        for size, user_id in users.items():
+            new_ms = timed(lambda: queries.get_bookings_by_user(conn, user_id))
+            old_ms = timed(lambda: conn.execute(LEGACY_HISTORY_SQL, (user_id,)).fetchall())
+            rows.append([size, f"{old_ms:.2f}", f"{new_ms:.2f}", f"{old_ms / new_ms:.1f}x"])
+
+        print_table(
+            "get_bookings_by_user latency (median ms)",
+            ["bookings", "4 subqueries", "schedule join", "speedup"],
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
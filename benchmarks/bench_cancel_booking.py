@@ -0,0 +1,54 @@
+"""Cancellation latency vs the customer's history size: `cancel_booking_by_code`
+now fetches the one booking with `get_booking_details_by_code`; it used to
+load the user's whole history with `get_bookings_by_user` and search it."""
+
+from __future__ import annotations
+
+import statistics
+import time
+
+from benchmarks._common import print_table, temp_db, timed
+from benchmarks.bench_booking_history import seed_user
+from database import queries
+from services import booking as booking_service
+
+SIZES = (10, 1_000, 50_000)
+CANCELLATIONS = 10
+
+
+def old_lookup(conn, user_id: int, code: str):
+    history = queries.get_bookings_by_user(conn, user_id)
+    return next(b for b in history if b["booking_code"] == code)
+
+
+def main() -> None:
+    with temp_db() as conn:
+        rows = []
+        for size in SIZES:
+            username = f"hist{size}"
+            user_id = seed_user(conn, username, size)
+            code = f"{username}-{size // 2}"
+
+            old_ms = timed(lambda: old_lookup(conn, user_id, code), repeat=3)
+            new_ms = timed(lambda: queries.get_booking_details_by_code(conn, code))
+
+            samples = []
+            for i in range(CANCELLATIONS):
+                start = time.perf_counter()
+                booking_service.cancel_booking_by_code(f"{username}-{i}")
+                samples.append((time.perf_counter() - start) * 1000)
+
+            rows.append(
+                [size, f"{old_ms:.2f}", f"{new_ms:.3f}", f"{statistics.median(samples):.2f}"]
+            )
+
+        print_table(
+            "Cancelling one booking (median ms)",
+            ["history size", "old lookup (full history)", "new lookup (by code)",
+             "cancel_booking_by_code"],
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Cancelling a whole train run: the set-based `cancel_train_run` vs
+calling `cancel_booking_by_code` once per booking (measured on a sample
+and extrapolated), for a run with 100k bookings."""
+
+from __future__ import annotations
+
+import time
+
+from benchmarks._common import print_table, temp_db
+from services import booking as booking_service
+
+BOOKINGS = 100_000
+USERS = 1_000
+SAMPLE = 200  # bookings cancelled one by one for comparison
+
+# seeded train 1 runs Indore -> Rewa -> Bhopal -> ... on 2026-02-15
+TRAIN_ID = 1
+RUN_DATE = "2026-02-15"
+
+
+def seed_run(conn) -> list[str]:
+    conn.executemany(
+        "INSERT INTO users (username, email, password_hash, role) VALUES (?, ?, 'x', 'customer')",
+        [(f"cancel{i}", f"cancel{i}@example.com") for i in range(USERS)],
+    )
+    users = [r[0] for r in conn.execute("SELECT id FROM users WHERE username LIKE 'cancel%'")]
+    legs = conn.execute(
+        """
+        SELECT id, origin_station_id, destination_station_id, fare FROM schedules
+        WHERE train_id = ? AND departure_date = ?
+        """,
+        (TRAIN_ID, RUN_DATE),
+    ).fetchall()
+
+    rows = []
+    for i in range(BOOKINGS):
+        leg = legs[i % len(legs)]
+        rows.append(
+            (f"BKRUN{i:07d}", users[i % USERS], TRAIN_ID, leg["origin_station_id"],
+             leg["destination_station_id"], RUN_DATE, leg["fare"], leg["id"])
+        )
+    conn.executemany(
+        """
+        INSERT INTO bookings (
+            booking_code, user_id, train_id, origin_station_id,
+            destination_station_id, travel_date, fare, schedule_id
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.execute(
+        """
+        INSERT INTO payments (booking_id, amount, method, status, transaction_id)
+        SELECT id, fare, 'card', 'success', 'TX' || id FROM bookings
+        """
+    )
+    conn.commit()
+    return [row[0] for row in rows]
+
+
+def main() -> None:
+    with temp_db() as conn:
+        codes = seed_run(conn)
+
+        start = time.perf_counter()
+        for code in codes[:SAMPLE]:
+            booking_service.cancel_booking_by_code(code)
+        per_booking_s = (time.perf_counter() - start) / SAMPLE * BOOKINGS
+
+        start = time.perf_counter()
+        summary = booking_service.cancel_train_run(TRAIN_ID, RUN_DATE)
+        run_s = time.perf_counter() - start
+        cancelled = summary["bookings_cancelled"]
+        assert cancelled == BOOKINGS - SAMPLE
+
+        print_table(
+            f"Cancelling a train run with {BOOKINGS:,} bookings",
+            ["method", "seconds", "bookings / s"],
+            [
+                ["cancel_booking_by_code each (extrapolated)", f"{per_booking_s:.1f}",
+                 f"{BOOKINGS / per_booking_s:,.0f}"],
+                ["cancel_train_run", f"{run_s:.2f}", f"{cancelled / run_s:,.0f}"],
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Earliest-arrival queries on a synthetic nationwide timetable: the
+Connection Scan router vs naive SQL self-joins allowing one or two
+changes of train.
+
+The self-joins cannot follow more changes than they spell out, so they
+find fewer routes; where both answer, the scan's arrival is never later.
+Each extra change multiplies the join's work, while the scan's cost does
+not depend on the number of changes."""
+
+from __future__ import annotations
+
+import random
+
+from benchmarks._common import print_table, temp_db, timed
+from database import queries
+from services.csa import ConnectionScan
+from services.journey import MIN_CONNECTION_MINUTES, _minutes
+
+STATIONS = 500
+TRAINS = 1_500
+LEGS_PER_RUN = 15
+DAYS = ("2026-03-01", "2026-03-02", "2026-03-03")
+QUERIES = 30
+
+NAIVE_SQL = """
+SELECT MIN(arrives) FROM (
+    SELECT s.arrival_date || ' ' || s.arrival_time AS arrives
+    FROM schedules s
+    WHERE s.origin_station_id = :origin
+      AND s.destination_station_id = :dest
+      AND s.departure_date || ' ' || s.departure_time >= :after
+    UNION ALL
+    SELECT s2.arrival_date || ' ' || s2.arrival_time
+    FROM schedules s1
+    JOIN schedules s2
+      ON s2.origin_station_id = s1.destination_station_id
+     AND s2.departure_date || ' ' || s2.departure_time >= strftime(
+            '%Y-%m-%d %H:%M', s1.arrival_date || ' ' || s1.arrival_time, :mct)
+    WHERE s1.origin_station_id = :origin
+      AND s1.departure_date || ' ' || s1.departure_time >= :after
+      AND s2.destination_station_id = :dest
+)
+"""
+
+# the same, extended with a second change of train
+NAIVE_TWO_CHANGES_SQL = NAIVE_SQL.rstrip().rstrip(")") + """
+    UNION ALL
+    SELECT s3.arrival_date || ' ' || s3.arrival_time
+    FROM schedules s1
+    JOIN schedules s2
+      ON s2.origin_station_id = s1.destination_station_id
+     AND s2.departure_date || ' ' || s2.departure_time >= strftime(
+            '%Y-%m-%d %H:%M', s1.arrival_date || ' ' || s1.arrival_time, :mct)
+    JOIN schedules s3
+      ON s3.origin_station_id = s2.destination_station_id
+     AND s3.departure_date || ' ' || s3.departure_time >= strftime(
+            '%Y-%m-%d %H:%M', s2.arrival_date || ' ' || s2.arrival_time, :mct)
+    WHERE s1.origin_station_id = :origin
+      AND s1.departure_date || ' ' || s1.departure_time >= :after
+      AND s3.destination_station_id = :dest
+)
+"""
+
+
+def _hhmm(minute: int) -> str:
+    return f"{minute % 1440 // 60:02d}:{minute % 60:02d}"
+
+
+def seed_timetable(conn, rng: random.Random) -> list[int]:
+    conn.executemany(
+        "INSERT INTO stations (code, name, city) VALUES (?, ?, ?)",
+        [(f"BX{i:04d}", f"Bench {i}", f"City {i}") for i in range(STATIONS)],
+    )
+    station_ids = [
+        r[0] for r in conn.execute("SELECT id FROM stations WHERE code LIKE 'BX%'")
+    ]
+    conn.executemany(
+        "INSERT INTO trains (train_number, train_name) VALUES (?, ?)",
+        [(f"B{i:05d}", f"Bench Express {i}") for i in range(TRAINS)],
+    )
+    train_ids = [
+        r[0] for r in conn.execute("SELECT id FROM trains WHERE train_number LIKE 'B%'")
+    ]
+
+    rows = []
+    for train_id in train_ids:
+        route = rng.sample(station_ids, LEGS_PER_RUN + 1)
+        start = rng.randint(0, 23 * 60)
+        for day in range(len(DAYS) - 1):
+            minute = day * 1440 + start
+            for origin, dest in zip(route, route[1:]):
+                arrive = minute + rng.randint(30, 150)
+                rows.append(
+                    (
+                        train_id, origin, dest,
+                        DAYS[minute // 1440], _hhmm(minute),
+                        DAYS[min(arrive // 1440, len(DAYS) - 1)], _hhmm(arrive),
+                        rng.randint(50, 500),
+                    )
+                )
+                minute = arrive + rng.randint(5, 20)
+                if minute // 1440 >= len(DAYS) - 1:
+                    break
+    conn.executemany(
+        """
+        INSERT INTO schedules (
+            train_id, origin_station_id, destination_station_id,
+            departure_date, departure_time, arrival_date, arrival_time, fare
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+    conn.commit()
+    return station_ids
+
+
+def main() -> None:
+    rng = random.Random(7)
+    with temp_db() as conn:
+        station_ids = seed_timetable(conn, rng)
+        rows = queries.get_timetable_rows(conn)
+
+        build_ms = timed(lambda: ConnectionScan(rows), repeat=3)
+        router = ConnectionScan(rows)
+
+        pairs = [tuple(rng.sample(station_ids, 2)) for _ in range(QUERIES)]
+        after = _minutes(DAYS[0], "06:00")
+        params = [
+            {"origin": o, "dest": d, "after": f"{DAYS[0]} 06:00",
+             "mct": f"+{MIN_CONNECTION_MINUTES} minutes"}
+            for o, d in pairs
+        ]
+
+        scanned = [router.earliest_arrival(o, d, after) for o, d in pairs]
+        arrivals = [f"{r['arrival_date']} {r['arrival_time']}" if r else None for r in scanned]
+        naive = [conn.execute(NAIVE_SQL, p).fetchone()[0] for p in params]
+
+        def later(results):
+            """How many answers arrive later than the scan's."""
+            count = 0
+            for scan, sql in zip(arrivals, results):
+                if sql is not None:
+                    assert scan <= sql
+                    count += scan < sql
+            return count
+
+        csa_ms = timed(lambda: [router.earliest_arrival(o, d, after) for o, d in pairs], repeat=3)
+        sql_ms = timed(lambda: [conn.execute(NAIVE_SQL, p).fetchone() for p in params], repeat=1)
+        sql2_queries = params[:5]  # slow: a handful is enough
+        sql2 = [conn.execute(NAIVE_TWO_CHANGES_SQL, p).fetchone()[0] for p in sql2_queries]
+        sql2_ms = timed(
+            lambda: [conn.execute(NAIVE_TWO_CHANGES_SQL, p).fetchone() for p in sql2_queries],
+            repeat=1,
+        )
+
+        print_table(
+            f"Earliest arrival over {len(rows):,} legs, {STATIONS} stations "
+            f"(router build {build_ms:.0f} ms)",
+            ["method", "ms / query", "routes found", "arrive later than scan"],
+            [
+                ["connection scan", f"{csa_ms / QUERIES:.2f}",
+                 f"{sum(r is not None for r in scanned)} of {QUERIES}", "-"],
+                ["SQL self-join (<= 1 change)", f"{sql_ms / QUERIES:.2f}",
+                 f"{sum(r is not None for r in naive)} of {QUERIES}", later(naive)],
+                ["SQL self-join (<= 2 changes)", f"{sql2_ms / len(sql2_queries):.2f}",
+                 f"{sum(r is not None for r in sql2)} of {len(sql2_queries)}", later(sql2)],
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Journey planner build time and per-query latency on a synthetic
+timetable of ~100k schedule legs (2,000 trains x 20 legs x 3 days)."""
+
+from __future__ import annotations
+
+import random
+
+from benchmarks._common import print_table, timed
+from services.journey import JourneyPlanner
+
+STATIONS = 400
+TRAINS = 2_000
+LEGS_PER_RUN = 20
+DAYS = ("2026-03-01", "2026-03-02", "2026-03-03")
+QUERIES = 50
+
+
+def synthetic_legs(rng: random.Random) -> list[dict]:
+    legs = []
+    next_id = 1
+    for train in range(1, TRAINS + 1):
+        route = rng.sample(range(1, STATIONS + 1), LEGS_PER_RUN + 1)
+        start = rng.randint(0, 23 * 60)
+        for day_offset, day in enumerate(DAYS):
+            minute = start
+            for origin, dest in zip(route, route[1:]):
+                ride = rng.randint(20, 90)
+                dep_day = day_offset + minute // 1440
+                arr_day = day_offset + (minute + ride) // 1440
+                if arr_day >= len(DAYS):
+                    break
+                legs.append(
+                    {
+                        "id": next_id,
+                        "train_id": train,
+                        "train_number": str(10000 + train),
+                        "train_name": f"Train {train}",
+                        "origin_station_id": origin,
+                        "destination_station_id": dest,
+                        "departure_date": DAYS[dep_day],
+                        "departure_time": f"{minute % 1440 // 60:02d}:{minute % 60:02d}",
+                        "arrival_date": DAYS[arr_day],
+                        "arrival_time": f"{(minute + ride) % 1440 // 60:02d}:{(minute + ride) % 60:02d}",
+                        "fare": rng.randint(50, 500),
+                    }
+                )
+                next_id += 1
+                minute += ride + rng.randint(2, 10)
+    return legs
+
+
+def main() -> None:
+    rng = random.Random(42)
+    legs = synthetic_legs(rng)
+    pairs = [tuple(rng.sample(range(1, STATIONS + 1), 2)) for _ in range(QUERIES)]
+
+    build_ms = timed(lambda: JourneyPlanner(legs), repeat=3)
+    planner = JourneyPlanner(legs)
+
+    found = sum(
+        1 for o, d in pairs if planner.plan(o, d, DAYS[0], earliest_time="06:00")["earliest"]
+    )
+    query_ms = timed(
+        lambda: [planner.plan(o, d, DAYS[0], earliest_time="06:00") for o, d in pairs],
+        repeat=3,
+    ) / QUERIES
+
+    print_table(
+        f"Journey planner over {len(legs):,} legs, {STATIONS} stations",
+        ["build ms", "queries", "routes found", "ms / query (earliest + cheapest)"],
+        [[f"{build_ms:.0f}", QUERIES, found, f"{query_ms:.2f}"]],
+    )
+
+
+if __name__ == "__main__":
+    main()
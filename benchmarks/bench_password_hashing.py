@@ -0,0 +1,61 @@
+"""Login throughput with slow password hashes: concurrent
+`authenticate_user` calls at the default scrypt cost, for several hashing
+pool sizes. `hashlib` releases the GIL, so throughput scales with the pool
+up to the number of cores; the pool caps how many hashes (and how much
+scrypt memory) are in flight at once."""
+
+from __future__ import annotations
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks._common import print_table, temp_db, timed
+from services import user as user_service
+from utils import security
+
+LOGIN_THREADS = 16
+LOGINS = 64
+
+
+def login_throughput() -> float:
+    """Logins per second with LOGIN_THREADS clients logging in at once."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=LOGIN_THREADS) as clients:
+        for user in clients.map(
+            lambda _: user_service.authenticate_user("bench_user", "Str0ng!Pass"),
+            range(LOGINS),
+        ):
+            assert user["username"] == "bench_user"
+    return LOGINS / (time.perf_counter() - start)
+
+
+def main() -> None:
+    cores = os.cpu_count() or 1
+    with temp_db():
+        user_service.create_customer(
+            "bench_user", "bench@example.com", "Str0ng!Pass",
+            full_name="Bench User", dob="1990-01-01", gender="male",
+        )
+        hasher = security._hasher
+        single_ms = timed(lambda: security.verify_password(
+            "Str0ng!Pass", security.hash_password("Str0ng!Pass")
+        )) / 2
+
+        rows = []
+        for workers in sorted({1, 2, 4, cores}):
+            security.configure(workers=workers)
+            login_throughput()  # warm up the pool
+            rows.append([workers, f"{login_throughput():.1f}"])
+        security.configure(workers=security.HASH_WORKERS)
+
+        print(f"scrypt {hasher._params}: {single_ms:.1f} ms per hash, {cores} cores")
+        print_table(
+            f"Login throughput, {LOGIN_THREADS} concurrent clients",
+            ["hash workers", "logins/s"],
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Bulk timetable import: `services.schedule_import.import_schedules` on a
+1M-leg CSV file vs adding the same legs one `create_schedule` call at a
+time (measured on a sample and extrapolated)."""
+
+from __future__ import annotations
+
+import csv
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._common import print_table, temp_db
+from services import schedule as schedule_service
+from services import schedule_import
+
+LEGS = 1_000_000
+STATIONS = 2_000
+TRAINS = 5_000
+SAMPLE = 2_000  # legs added one at a time for comparison
+
+
+def _hhmm(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def seed_ids(conn) -> tuple[list[int], list[int]]:
+    conn.executemany(
+        "INSERT INTO stations (code, name, city) VALUES (?, ?, ?)",
+        [(f"BI{i:04d}", f"Import {i}", f"City {i}") for i in range(STATIONS)],
+    )
+    conn.executemany(
+        "INSERT INTO trains (train_number, train_name) VALUES (?, ?)",
+        [(f"I{i:05d}", f"Import Express {i}") for i in range(TRAINS)],
+    )
+    conn.commit()
+    stations = [r[0] for r in conn.execute("SELECT id FROM stations WHERE code LIKE 'BI%'")]
+    trains = [r[0] for r in conn.execute("SELECT id FROM trains WHERE train_number LIKE 'I%'")]
+    return trains, stations
+
+
+def legs(trains, stations, rng: random.Random, count: int, first_day: int):
+    """`count` legs: each train runs a chain of legs through one day, day
+    after day, so no two legs collide on the schedules UNIQUE key."""
+    made = 0
+    day = first_day
+    while True:
+        date = f"2027-{1 + day // 28:02d}-{1 + day % 28:02d}"
+        for train in trains:
+            station = rng.choice(stations)
+            minute = rng.randint(0, 120)
+            for _ in range(10):
+                nxt = rng.choice(stations)
+                while nxt == station:
+                    nxt = rng.choice(stations)
+                arrive = minute + rng.randint(30, 90)
+                yield (
+                    train, station, nxt, date, date,
+                    _hhmm(minute), _hhmm(arrive), rng.randint(50, 2000),
+                )
+                made += 1
+                if made == count:
+                    return
+                station, minute = nxt, arrive + 10
+        day += 1
+
+
+def main() -> None:
+    rng = random.Random(11)
+    with temp_db() as conn, tempfile.TemporaryDirectory() as tmp:
+        trains, stations = seed_ids(conn)
+
+        path = Path(tmp) / "timetable.csv"
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(schedule_import.FIELDS)
+            writer.writerows(legs(trains, stations, rng, LEGS, first_day=0))
+
+        start = time.perf_counter()
+        report = schedule_import.import_schedules(path)
+        bulk_s = time.perf_counter() - start
+        assert report["imported"] == LEGS, report["errors"][:5]
+
+        sample = list(legs(trains, stations, rng, SAMPLE, first_day=300))
+        start = time.perf_counter()
+        for row in sample:
+            train, origin, dest, dep_date, arr_date, dep_time, arr_time, fare = row
+            schedule_service.create_schedule(
+                train, origin, dest, dep_date, arr_date, dep_time, arr_time, fare
+            )
+        single_s = (time.perf_counter() - start) / SAMPLE * LEGS
+
+        print_table(
+            f"Importing {LEGS:,} schedule legs",
+            ["method", "seconds", "legs / s"],
+            [
+                ["import_schedules (CSV)", f"{bulk_s:.1f}", f"{LEGS / bulk_s:,.0f}"],
+                ["create_schedule per leg (extrapolated)", f"{single_s:.0f}",
+                 f"{LEGS / single_s:,.0f}"],
+            ],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ from rich.table import Table
 
 from services import user as user_service
 from services import schedule as schedule_service
+from services import schedule_import
 from services import station as station_service
 from services import train as train_service
 from ui import messages
@@ -40,10 +41,12 @@ def admin_dashboard(username: str) -> None:
                 "Add new Train",
                 "Add new Station",
                 "Schedule new Train Jouney",
+                "Import Train Journeys from File",
                 "Update exisitng Train",
                 "Update existing Station",
                 "Update existing Train Journey",
                 "Delete Train Journey",
+                "Cancel Train Run",
                 "View All Trains",
                 "View All Stations",
                 "View All Train Jouneys",
@@ -61,6 +64,9 @@ def admin_dashboard(username: str) -> None:
         if choice == "Schedule new Train Jouney":
             admin_schedule_new_train_jouney()
             continue
+        if choice == "Import Train Journeys from File":
+            admin_import_train_journeys()
+            continue
         if choice == "Update exisitng Train":
             train_details_update()
             continue
@@ -73,6 +79,9 @@ def admin_dashboard(username: str) -> None:
         if choice == "Delete Train Journey":
             delete_train_journey_by_admin()
             continue
+        if choice == "Cancel Train Run":
+            admin_cancel_train_run()
+            continue
         if choice == "View All Trains":
             admin_view_all_trains()
             continue
@@ -306,6 +315,37 @@ def admin_schedule_new_train_jouney() -> None:
         console.print(f"[bold red]Error creating schedule: {e}[/bold red]")
 
 
+def admin_import_train_journeys() -> None:
+    console.print("[cyan] Import Train Journeys[/cyan]")
+    console.print(
+        "CSV (with a header row) or JSON Lines file with fields: "
+        + ", ".join(schedule_import.FIELDS)
+    )
+
+    path = ask_required("Timetable file path:")
+    if path is None:
+        return
+
+    try:
+        report = schedule_import.import_schedules(path.strip())
+    except Exception as e:
+        console.print(f"[bold red]Error importing schedules: {e}[/bold red]")
+        return
+
+    console.print(
+        f"[bold green]Imported {report['imported']} of {report['rows']} rows[/bold green]"
+    )
+    if report["failed"]:
+        table = Table(title=f"{report['failed']} rows skipped")
+        table.add_column("Line", justify="right")
+        table.add_column("Error")
+        for line_no, error in report["errors"][:50]:
+            table.add_row(str(line_no), error)
+        console.print(table)
+        if report["failed"] > 50:
+            console.print(f"[yellow]... and {report['failed'] - 50} more[/yellow]")
+
+
 def train_details_update() -> None:
     console.print("[cyan]Update Train Journey Details[/cyan]")
 
@@ -760,6 +800,48 @@ def delete_train_journey_by_admin() -> None:
         console.print(f"[bold red]Error deleting train journey: {e}[/bold red]")
 
 
+def admin_cancel_train_run() -> None:
+    console.print("[cyan] Cancel Train Run[/cyan]")
+
+    from services import booking as booking_service
+
+    rows = train_service.list_trains()
+    if not rows:
+        console.print("[yellow]No trains available[/yellow]")
+        return
+
+    train_map = {
+        f"{r['id']} - {r['train_number']} - {r['train_name']}": r["id"] for r in rows
+    }
+    train_choice = questionary.select("Select train:", choices=list(train_map)).ask()
+    if not train_choice:
+        return
+
+    run_date = ask_required("Run start date (YYYY-MM-DD):")
+    if run_date is None:
+        return
+
+    confirm = questionary.confirm(
+        f"Cancel every booking on {train_choice} starting {run_date} and refund them?",
+        default=False,
+    ).ask()
+    if not confirm:
+        console.print("[yellow]Nothing cancelled[/yellow]")
+        return
+
+    try:
+        summary = booking_service.cancel_train_run(train_map[train_choice], run_date.strip())
+    except Exception as e:
+        console.print(f"[bold red]Error cancelling run: {e}[/bold red]")
+        return
+
+    console.print(
+        f"[bold green]Cancelled {summary['bookings_cancelled']} bookings for "
+        f"{summary['users_affected']} passengers; refunded "
+        f"{summary['payments_refunded']} payments (₹{summary['refund_amount']})[/bold green]"
+    )
+
+
 def admin_view_all_trains() -> None:
     console.print("[cyan] All Trains[/cyan]")
     rows = train_service.list_trains()
@@ -8,11 +8,10 @@ from rich.console import Console
 from ui import messages
 from cli import admin as admin_cli
 from cli import passenger as passenger_cli
+from services import reaper
+from services import session as session_service
 from services import user as user_service
 
-from database import connection, queries
-from datetime import datetime, timezone
-
 from utils.__helper import ask_required
 
 console = Console()
@@ -21,25 +20,19 @@ console = Console()
 def main_menu() -> None:
     console.print(Panel("Train Booking System", style="bold green", expand=False))
 
-    # Auto-login: if a valid (non-expired) customer session exists, open dashboard
-    try:
-        conn = connection.get_connection()
-        now_iso = datetime.now(timezone.utc).isoformat()
-        # cleanup expired sessions first
-        queries.delete_expired_sessions(conn, now_iso)
-        active = queries.get_active_session(conn, now_iso)
-        if active and active["role"] == "customer":
-            # active contains token, user_id, expires_at, username, role
-            messages.show_info(f"Auto-login detected: {active['username']}")
-            # open passenger dashboard with the existing token
-            passenger_cli.passenger_dashboard(
-                active["username"], session_token=active["token"]
-            )
-    finally:
-        try:
-            connection.close_connection(conn)
-        except Exception:
-            messages.show_error(str(exc))
+    # expired sessions, stale payments etc. are cleaned up in the background
+    reaper.start()
+
+    # Auto-login: if this device's session is still valid, open dashboard
+    active = session_service.get_device_session()
+
+    if active and active["role"] == "customer":
+        # active contains token, user_id, expires_at, username, role
+        messages.show_info(f"Auto-login detected: {active['username']}")
+        # open passenger dashboard with the existing token
+        passenger_cli.passenger_dashboard(
+            active["username"], session_token=active["token"]
+        )
 
     while True:
         choice = questionary.select(
@@ -55,7 +48,7 @@ def main_menu() -> None:
         elif choice == "Sign in":
             try:
                 # single sign-in page for both admin and passenger
-                identifier = ask_required("Username or Email:")
+                identifier = ask_required("Username, Email or Mobile:")
 
                 password = questionary.password("Password:").ask()
                 user = user_service.authenticate_user(identifier, password)
@@ -64,9 +57,8 @@ def main_menu() -> None:
                     admin_cli.admin_dashboard(user.get("username"))
                 else:
                     # create a session for customers (24h TTL) and pass token to dashboard
-                    from services import session as session_service
-
                     token = session_service.create_session_for_user(user.get("id"))
+                    session_service.remember_device(token)
                     passenger_cli.passenger_dashboard(
                         user.get("username"), session_token=token
                     )
@@ -156,6 +156,7 @@ def passenger_dashboard(username: str, session_token: str | None = None) -> None
                 "Book Tickets",
                 "View Booking History",
                 "Edit Profile",
+                "Saved Passengers",
                 "Download Ticket (PDF)",
                 "Help",
                 "Close CLI",
@@ -175,6 +176,10 @@ def passenger_dashboard(username: str, session_token: str | None = None) -> None
             profile_dashboard(username)
             continue
 
+        if choice == "Saved Passengers":
+            saved_passengers_dashboard(username)
+            continue
+
         if choice == "Download Ticket (PDF)":
             try:
                 download_ticket_dashboard(username)
@@ -211,6 +216,7 @@ def book_tickets_dashboard(username: str) -> None:
         from database import connection, queries
         from services.booking import book_ticket
         from services.payments import process_payment
+        from services.schedule import search_schedules
         from utils.validators import is_valid_schedule_date
 
         conn = connection.get_connection()
@@ -257,15 +263,32 @@ def book_tickets_dashboard(username: str) -> None:
                 continue
             break
 
+        search_mode = questionary.select(
+            "Search:", choices=[EXACT_DATE, FLEXIBLE_DATES]
+        ).ask()
+        if not search_mode:
+            return
+
         # -----------------------------
         # FIND MATCHING SCHEDULES
         # -----------------------------
-        schedules = queries.find_schedules(conn, origin_id, destination_id, travel_date)
-        # print(schedules)
+        if search_mode == FLEXIBLE_DATES:
+            schedules = _show_date_calendar(
+                console, origin_id, destination_id, travel_date
+            )
+            if not schedules:
+                messages.show_info("No direct trains on these dates.")
+                return
+        else:
+            schedules = search_schedules(origin_id, destination_id, travel_date)
 
         if not schedules:
-            messages.show_info("No trains available for this route and date.")
-            return
+            # no direct leg: look for journeys over several legs or trains
+            schedules = _show_connecting_journeys(
+                console, origin_id, destination_id, travel_date
+            )
+            if not schedules:
+                return
 
         train_choices = {}
         for s in schedules:
@@ -275,6 +298,8 @@ def book_tickets_dashboard(username: str) -> None:
                 f"{s['arrival_date']} {s['arrival_time']} | "
                 f"Fare ₹{s['fare']}"
             )
+            if "available_seats" in s:
+                label += f" | Seats {s['available_seats']}"
             train_choices[label] = s
 
         selected_label = questionary.select(
@@ -285,6 +310,7 @@ def book_tickets_dashboard(username: str) -> None:
             return
 
         selected_schedule = train_choices[selected_label]
+        travel_date = selected_schedule["departure_date"]
 
         train_id = selected_schedule["train_id"]
         fare = selected_schedule["fare"]
@@ -355,6 +381,7 @@ Fare         : ₹{fare}
 
 Booking Code : {booking['booking_code']}
 Train        : {booking['train_number']} - {booking['train_name']}
+Seat         : {booking['coach_code']} / {booking['seat_number']} ({booking['seat_class']})
 Departure    : {selected_schedule['departure_date']} {selected_schedule['departure_time']}
 Arrival      : {selected_schedule['arrival_date']} {selected_schedule['arrival_time']}
 Amount Paid  : ₹{fare}
@@ -375,6 +402,95 @@ Amount Paid  : ₹{fare}
             pass
 
 
+EXACT_DATE = "Exact date"
+FLEXIBLE_DATES = "±3 days"
+FLEXIBLE_DAYS = 3
+
+
+def _show_date_calendar(
+    console: Console, origin_id: int, destination_id: int, travel_date: str
+) -> list:
+    """
+    Show cheapest fare and first departure for each day within
+    FLEXIBLE_DAYS of `travel_date` (never before today) and return every
+    schedule in that window.
+    """
+    from datetime import date, timedelta
+
+    from services.schedule import find_schedules_range
+
+    day = date.fromisoformat(travel_date)
+    start = max(day - timedelta(days=FLEXIBLE_DAYS), date.today())
+    end = day + timedelta(days=FLEXIBLE_DAYS)
+    calendar = find_schedules_range(
+        origin_id, destination_id, start.isoformat(), end.isoformat()
+    )
+
+    table = Table(title="Fares around your date", show_lines=True)
+    table.add_column("Date")
+    table.add_column("Trains", justify="right")
+    table.add_column("From", justify="right")
+    table.add_column("First departure")
+    for entry in calendar:
+        marker = " *" if entry["date"] == travel_date else ""
+        table.add_row(
+            entry["date"] + marker,
+            str(len(entry["schedules"])),
+            f"₹{entry['cheapest_fare']}" if entry["schedules"] else "-",
+            entry["earliest_departure"] or "-",
+        )
+    console.print(table)
+
+    return [s for entry in calendar for s in entry["schedules"]]
+
+
+def _show_connecting_journeys(
+    console: Console, origin_id: int, destination_id: int, travel_date: str
+) -> list:
+    """
+    Show the earliest and cheapest planned journeys and return those that
+    run on a single train (they can be booked as one ticket).
+    """
+    from services.journey import plan_journeys
+
+    plans = plan_journeys(origin_id, destination_id, travel_date)
+    if not plans["earliest"]:
+        messages.show_info("No trains available for this route and date.")
+        return []
+
+    table = Table(title="Connecting journeys", show_lines=True)
+    table.add_column("Option")
+    table.add_column("Trains")
+    table.add_column("Departure")
+    table.add_column("Arrival")
+    table.add_column("Changes", justify="right")
+    table.add_column("Fare", justify="right")
+
+    bookable = {}
+    for name, itinerary in plans.items():
+        table.add_row(
+            name.title(),
+            "\n".join(
+                f"{r['train_number']} {r['departure_time']}→{r['arrival_time']}"
+                for r in itinerary["rides"]
+            ),
+            f"{itinerary['departure_date']} {itinerary['departure_time']}",
+            f"{itinerary['arrival_date']} {itinerary['arrival_time']}",
+            str(itinerary["transfers"]),
+            f"₹{itinerary['fare']}",
+        )
+        if itinerary["transfers"] == 0:
+            ride = itinerary["rides"][0]
+            bookable[tuple(ride["schedule_ids"])] = ride
+
+    console.print(table)
+    if not bookable:
+        messages.show_info(
+            "These journeys change trains; book each train separately."
+        )
+    return list(bookable.values())
+
+
 def profile_dashboard(username: str) -> None:
     console = Console()
     console.print(Panel(f"Profile — {username}", style="bold magenta"))
@@ -760,6 +876,106 @@ Aadhaar      : {user.get('aadhaar') or 'N/A'}
             pass
 
 
+def _ask_passenger(current: dict | None = None) -> dict | None:
+    """Prompt for a passenger's details; None if cancelled or invalid."""
+    from datetime import datetime
+
+    current = current or {}
+    name = questionary.text("Passenger name:", default=current.get("name", "")).ask()
+    if not name or not name.strip():
+        return None
+
+    dob = questionary.text(
+        "Date of birth (YYYY-MM-DD, optional):", default=current.get("dob", "")
+    ).ask()
+    if dob:
+        try:
+            datetime.strptime(dob, "%Y-%m-%d")
+        except ValueError:
+            messages.show_error("Date of birth must be YYYY-MM-DD")
+            return None
+
+    gender = questionary.select(
+        "Gender:", choices=["male", "female", "other"]
+    ).ask()
+
+    passenger = {"name": name.strip(), "gender": gender}
+    if dob:
+        passenger["dob"] = dob
+    return passenger
+
+
+def saved_passengers_dashboard(username: str) -> None:
+    """List, add, edit and remove the user's saved passengers.
+
+    Passengers are picked by their id, so an edit made from a list that
+    another session has since changed still reaches the intended passenger.
+    """
+    console = Console()
+    console.print(Panel(f"Saved Passengers — {username}", style="bold magenta"))
+
+    from database import connection, queries
+
+    with connection.connect() as conn:
+        user = queries.get_user_by_username(conn, username)
+    if not user:
+        messages.show_error("User not found.")
+        return
+
+    while True:
+        passengers = user_service.list_passengers(user["id"])
+        table = Table(show_header=True, header_style="bold cyan")
+        table.add_column("ID", justify="right")
+        table.add_column("Name")
+        table.add_column("DOB")
+        table.add_column("Gender")
+        for p in passengers:
+            table.add_row(
+                str(p["id"]), p.get("name", ""), p.get("dob") or "N/A", p.get("gender") or "N/A"
+            )
+        console.print(table)
+
+        choice = questionary.select(
+            "Passenger options:",
+            choices=["Add Passenger", "Edit Passenger", "Remove Passenger", "Back"],
+        ).ask()
+        if choice in (None, "Back"):
+            return
+
+        if choice == "Add Passenger":
+            passenger = _ask_passenger()
+            if passenger:
+                user_service.add_passenger(user["id"], passenger)
+                messages.show_success("Passenger saved.")
+            continue
+
+        if not passengers:
+            messages.show_info("No saved passengers.")
+            continue
+
+        picked = questionary.select(
+            "Select passenger:",
+            choices=[f"{p['id']} - {p.get('name', '')}" for p in passengers],
+        ).ask()
+        if not picked:
+            continue
+        passenger_id = int(picked.split(" - ")[0])
+
+        try:
+            if choice == "Edit Passenger":
+                current = next(p for p in passengers if p["id"] == passenger_id)
+                passenger = _ask_passenger(current)
+                if passenger:
+                    user_service.update_passenger(user["id"], passenger_id, passenger)
+                    messages.show_success("Passenger updated.")
+            else:
+                user_service.remove_passenger(user["id"], passenger_id)
+                messages.show_success("Passenger removed.")
+        except ValueError as exc:
+            # e.g. removed meanwhile from another session
+            messages.show_error(str(exc))
+
+
 def help_dashboard(username: str) -> None:
     console = Console()
     console.print(Panel("Passenger Help Center", style="bold yellow"))
@@ -783,6 +999,7 @@ def help_dashboard(username: str) -> None:
         📌 PROFILE MANAGEMENT
         - You can update email, mobile, and address.
         - Ensure correct information for ticket accuracy.
+        - Save co-passengers under 'Saved Passengers'.
 
         📌 SUPPORT
         For assistance, contact:
@@ -794,78 +1011,117 @@ def help_dashboard(username: str) -> None:
     console.print(Panel(help_text, style="yellow"))
 
 
+def _render_booking_history(console: Console, bookings: list) -> dict:
+    """Print one page of bookings and return the cancellable ones by code."""
+    table = Table(show_header=True, header_style="bold cyan")
+    table.add_column("Booking Code")
+    table.add_column("Train")
+    table.add_column("Route")
+    table.add_column("Date")
+    table.add_column("Fare", justify="right")
+    table.add_column("Booking Status")
+    table.add_column("Payment Status")
+    table.add_column("Txn ID")
+    table.add_column("Action")
+
+    cancellable_bookings = {}
+
+    for b in bookings:
+
+        booking_status = (
+            "[green]CONFIRMED[/green]"
+            if b["booking_status"] == "confirmed"
+            else "[red]CANCELLED[/red]"
+        )
+
+        if b["payment_status"] == "success":
+            payment_status = "[green]SUCCESS[/green]"
+        elif b["payment_status"] == "refunded":
+            payment_status = "[yellow]REFUNDED[/yellow]"
+        else:
+            payment_status = "-"
+
+        # Action column
+        if b["booking_status"] == "confirmed":
+            action = "[red]Delete[/red]"
+            cancellable_bookings[b["booking_code"]] = b
+        else:
+            action = "-"
+
+        table.add_row(
+            b["booking_code"],
+            f'{b["train_number"]} {b["train_name"]}',
+            f'{b["origin_station"]} → {b["destination_station"]}',
+            b["travel_date"],
+            f'₹{b["fare"]}',
+            booking_status,
+            payment_status,
+            b["transaction_id"] or "-",
+            action,
+        )
+
+    console.print(table)
+    return cancellable_bookings
+
+
 def booking_history_dashboard(username: str) -> None:
     console = Console()
     console.print(Panel(f"Booking History — {username}", style="bold magenta"))
 
     try:
-        bookings = booking.get_booking_history(username)
-
-        if not bookings:
-            messages.show_info("No bookings found.")
+        status_filter = questionary.select(
+            "Show:",
+            choices=["All bookings", "Confirmed only", "Cancelled only"],
+        ).ask()
+        if not status_filter:
             return
+        status = {
+            "Confirmed only": "confirmed",
+            "Cancelled only": "cancelled",
+        }.get(status_filter)
 
-        table = Table(show_header=True, header_style="bold cyan")
-        table.add_column("Booking Code")
-        table.add_column("Train")
-        table.add_column("Route")
-        table.add_column("Date")
-        table.add_column("Fare", justify="right")
-        table.add_column("Booking Status")
-        table.add_column("Payment Status")
-        table.add_column("Txn ID")
-        table.add_column("Action")
-
-        cancellable_bookings = {}
-
-        for b in bookings:
-
-            booking_status = (
-                "[green]CONFIRMED[/green]"
-                if b["booking_status"] == "confirmed"
-                else "[red]CANCELLED[/red]"
+        # ---------------------------------
+        # Page through history lazily
+        # ---------------------------------
+        cursor = None
+        page_number = 1
+
+        while True:
+            bookings, next_cursor = booking.get_booking_history_page(
+                username, cursor=cursor, status=status
             )
 
-            if b["payment_status"] == "success":
-                payment_status = "[green]SUCCESS[/green]"
-            elif b["payment_status"] == "refunded":
-                payment_status = "[yellow]REFUNDED[/yellow]"
-            else:
-                payment_status = "-"
+            if not bookings and cursor is None:
+                messages.show_info("No bookings found.")
+                return
 
-            # Action column
-            if b["booking_status"] == "confirmed":
-                action = "[red]Delete[/red]"
-                cancellable_bookings[b["booking_code"]] = b
-            else:
-                action = "-"
+            console.print(f"[bold]Page {page_number}[/bold]")
+            cancellable_bookings = _render_booking_history(console, bookings)
 
-            table.add_row(
-                b["booking_code"],
-                f'{b["train_number"]} {b["train_name"]}',
-                f'{b["origin_station"]} → {b["destination_station"]}',
-                b["travel_date"],
-                f'₹{b["fare"]}',
-                booking_status,
-                payment_status,
-                b["transaction_id"] or "-",
-                action,
-            )
+            choices = list(cancellable_bookings.keys())
+            if next_cursor:
+                choices.append("Next page")
+            choices.append("Back")
 
-        console.print(table)
+            selected = questionary.select(
+                "Select booking to delete, Next page or Back:",
+                choices=choices,
+            ).ask()
+
+            if selected == "Next page":
+                cursor = next_cursor
+                page_number += 1
+                continue
+
+            break
 
         # ---------------------------------
         # Cancel Flow
         # ---------------------------------
-        if cancellable_bookings:
-
-            selected = questionary.select(
-                "Select booking to delete (or Back):",
-                choices=list(cancellable_bookings.keys()) + ["Back"],
-            ).ask()
+        if not selected or selected == "Back":
+            return
 
-            if not selected or selected == "Back":
-                return
+        if selected in cancellable_bookings:
 
             if questionary.confirm(
                 f"Are you sure you want to delete booking {selected}?"
@@ -1,27 +1,151 @@
 # database/connection.py
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
+from database import migrate
+
 DB_PATH = Path(__file__).resolve().parent / "train_booking.db"
 
+# Idle connections kept per database file; extra connections are closed on release.
+POOL_SIZE = 8
 
-def get_connection():
-    """Return a sqlite3 connection and ensure schema is applied.
+_lock = threading.Lock()
+_migrated: set[str] = set()
+_pools: dict[str, "ConnectionPool"] = {}
+
+
+def _open(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+    conn.row_factory = sqlite3.Row  # dictionary-like access
+    return conn
+
+
+def _ensure_migrated(db_path: Path) -> None:
+    """Run pending migrations on `db_path` once per process.
+
+    The check is repeated only if the database file disappeared
+    (e.g. it was deleted to reset data).
+    """
+    key = str(db_path)
+    if key in _migrated and db_path.exists():
+        return
+
+    with _lock:
+        if key in _migrated and db_path.exists():
+            return
+        _migrate(db_path)
+        _migrated.add(key)
+
+
+def _migrate(db_path: Path) -> list[int]:
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = _open(db_path)
+    try:
+        # WAL lets readers proceed while a booking holds the write lock
+        conn.execute("PRAGMA journal_mode = WAL")
+        applied = migrate.migrate(conn)
+        migrate.run_backfills(conn)
+        return applied
+    finally:
+        conn.close()
+
+
+def migrate_database() -> list[int]:
+    """Apply pending migrations to `DB_PATH` and return the versions applied."""
+    db_path = Path(DB_PATH)
+    with _lock:
+        applied = _migrate(db_path)
+        _migrated.add(str(db_path))
+    return applied
+
+
+class ConnectionPool:
+    """A small pool of reusable sqlite3 connections for one database file."""
 
-    The schema is loaded from the repository-level `schema.sql`.
+    def __init__(self, db_path: Path, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self._idle: queue.LifoQueue = queue.LifoQueue(maxsize=size)
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _open(self.db_path)
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def get_pool(db_path=None) -> ConnectionPool:
+    """Return the pool for `db_path` (default: the current `DB_PATH`),
+    migrating the database if needed."""
+    db_path = Path(db_path or DB_PATH)
+    _ensure_migrated(db_path)
+
+    key = str(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _lock:
+            pool = _pools.setdefault(key, ConnectionPool(db_path))
+    return pool
+
+
+@contextmanager
+def connect(db_path=None):
+    """Borrow a pooled connection for the duration of a `with` block.
+
+    Commits when the block exits cleanly and rolls back if it raises, then
+    hands the connection back to the pool. `db_path` defaults to the
+    current `DB_PATH`.
     """
+    pool = get_pool(db_path)
+    conn = pool.acquire()
     try:
-        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row  # dictionary-like access
+        yield conn
+        if conn.in_transaction:
+            conn.commit()
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+
+def close_all() -> None:
+    """Close every idle pooled connection (e.g. before deleting the DB file)."""
+    with _lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+        _migrated.clear()
+
 
-        # ensure schema exists (idempotent)
-        schema_path = Path(__file__).resolve().parents[1] / "schema.sql"
-        if schema_path.exists():
-            with open(schema_path, "r", encoding="utf-8") as f:
-                conn.executescript(f.read())
+def get_connection():
+    """Return a standalone sqlite3 connection to a migrated database.
 
-        return conn
+    Prefer `connect()` in services; this is kept for callers that manage the
+    connection lifetime themselves and close it with `close_connection`.
+    """
+    try:
+        db_path = Path(DB_PATH)
+        _ensure_migrated(db_path)
+        return _open(db_path)
     except sqlite3.Error as e:
         print("❌ Database connection failed:", e)
         raise
@@ -30,4 +154,3 @@ def get_connection():
 def close_connection(conn):
     if conn:
         conn.close()
-
@@ -0,0 +1,281 @@
+"""Versioned schema migrations for TrainBookingSystem.
+
+Migrations are plain SQL files in `database/migrations/` named
+`<version>_<name>.sql` (e.g. `0002_add_indexes.sql`) and are applied in
+version order. Applied versions are recorded in the `schema_version` table,
+so a database that is already up to date costs a single `SELECT` to check.
+
+`seed.sql` holds demo data and is applied once, in the same transaction that
+first brings a database under migration control.
+
+Only pending migrations run, so adding an index or a table to a large live
+database is just that statement (`CREATE INDEX`, `CREATE TABLE`,
+`ALTER TABLE ... ADD COLUMN`) — nothing is rebuilt or reloaded. Data that
+has to be rewritten row by row (`run_backfills`) is converted afterwards in
+small batches rather than inside the migration transaction.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+from functools import lru_cache
+from pathlib import Path
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / "migrations"
+SEED_PATH = MIGRATIONS_DIR / "seed.sql"
+
+_MIGRATION_FILE = re.compile(r"^(\d+)_(\w+)\.sql$")
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def available_migrations() -> tuple[tuple[int, str, Path], ...]:
+    """Return `(version, name, path)` for every migration file, oldest first."""
+    found = []
+    for path in MIGRATIONS_DIR.glob("*.sql"):
+        match = _MIGRATION_FILE.match(path.name)
+        if match:
+            found.append((int(match.group(1)), match.group(2), path))
+    found.sort()
+
+    versions = [version for version, _, _ in found]
+    if len(versions) != len(set(versions)):
+        raise RuntimeError("duplicate migration version in database/migrations")
+    return tuple(found)
+
+
+def latest_version() -> int:
+    migrations = available_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+def current_version(conn) -> int | None:
+    """Return the highest applied version, or None if never migrated."""
+    try:
+        row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] or 0
+
+
+def _statements(sql: str):
+    """Split a SQL script into complete statements."""
+    buf = []
+    for line in sql.splitlines():
+        buf.append(line)
+        candidate = "\n".join(buf)
+        if sqlite3.complete_statement(candidate):
+            yield candidate
+            buf = []
+    if "\n".join(buf).strip():
+        raise ValueError("incomplete SQL statement at end of script")
+
+
+def _run_script(conn, path: Path) -> None:
+    with open(path, "r", encoding="utf-8") as f:
+        for statement in _statements(f.read()):
+            conn.execute(statement)
+
+
+def migrate(conn, *, seed: bool = True) -> list[int]:
+    """Bring the database up to the latest version.
+
+    Returns the list of versions applied (empty if already up to date).
+    All pending migrations (and the first-time seed) run in one
+    `BEGIN IMMEDIATE` transaction, so concurrent processes serialise and a
+    failed migration leaves the database untouched.
+    """
+    target = latest_version()
+    if current_version(conn) == target:
+        return []
+
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None  # manage the transaction explicitly
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # re-check under the write lock: another process may have won
+            current = current_version(conn)
+            first_run = current is None
+
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TEXT DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+
+            applied = []
+            for version, name, path in available_migrations():
+                if version <= (current or 0):
+                    continue
+                _run_script(conn, path)
+                conn.execute(
+                    "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                    (version, name),
+                )
+                applied.append(version)
+
+            if first_run and seed and SEED_PATH.exists():
+                _run_script(conn, SEED_PATH)
+
+            conn.execute("COMMIT")
+            return applied
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = previous_isolation
+
+
+# users converted per transaction by `convert_passenger_blobs`
+PASSENGER_BATCH_SIZE = 500
+
+
+def convert_passenger_blobs(conn, *, batch_size: int = PASSENGER_BATCH_SIZE) -> int:
+    """Copy legacy `users.passengers` JSON arrays into the `passengers` table.
+
+    Runs after the schema migrations, `batch_size` users per short
+    `BEGIN IMMEDIATE` transaction, so other writers only ever wait for one
+    batch rather than for the whole table. Each user's array is cleared in
+    the same transaction its rows are inserted, so an interrupted run picks
+    up where it stopped. Returns the number of users converted.
+    """
+    from database import queries
+
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None
+    converted = 0
+    last_id = 0
+    try:
+        # checked before taking the write lock, so an already converted
+        # database costs one index lookup
+        while queries.get_passenger_blobs(conn, last_id, 1):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                users = queries.get_passenger_blobs(conn, last_id, batch_size)
+                queries.create_passengers(
+                    conn,
+                    (
+                        (user["id"], passenger)
+                        for user in users
+                        for passenger in queries.decode_passengers(user["passengers"])
+                    ),
+                )
+                queries.clear_passenger_blobs(conn, [user["id"] for user in users])
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            converted += len(users)
+            if not users:
+                break
+            last_id = users[-1]["id"]
+        return converted
+    finally:
+        conn.isolation_level = previous_isolation
+
+
+# rows per transaction for the backfills below
+BACKFILL_BATCH_SIZE = 500
+
+
+def _run_backfill(conn, name: str, batch, batch_size: int) -> int:
+    """Run a backfill to completion unless `data_backfills` says it is done.
+
+    `batch(conn, after_id, batch_size)` updates the next rows after
+    `after_id` and returns `(ids_seen, rows_changed)`; each call runs in
+    its own short `BEGIN IMMEDIATE` transaction, and the backfill is marked
+    done in the same transaction as its last (short) batch. Returns the
+    rows changed.
+    """
+    from database import queries
+
+    if queries.is_backfill_done(conn, name):
+        return 0
+
+    previous_isolation = conn.isolation_level
+    conn.isolation_level = None
+    changed = 0
+    last_id = 0
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids, count = batch(conn, last_id, batch_size)
+                if len(ids) < batch_size:
+                    queries.mark_backfill_done(conn, name)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+            changed += count
+            if len(ids) < batch_size:
+                return changed
+            last_id = ids[-1]
+    finally:
+        conn.isolation_level = previous_isolation
+
+
+def backfill_booking_schedules(conn, *, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Set `bookings.schedule_id` (added by migration 0003) on older bookings.
+
+    A booking is linked when exactly one schedule matches its train, route
+    and travel date. When several match (the train ran the route more than
+    once that day) or none does, it is left NULL and logged, rather than
+    linked to an arbitrary leg. Returns the bookings linked.
+    """
+    from database import queries
+
+    ambiguous: list[int] = []
+    unmatched = 0
+
+    def batch(conn, after_id, limit):
+        nonlocal unmatched
+        rows = queries.get_unlinked_bookings(conn, after_id, limit)
+        matched = [(r["schedule_id"], r["id"]) for r in rows if r["matches"] == 1]
+        queries.set_booking_schedules(conn, matched)
+        ambiguous.extend(r["id"] for r in rows if r["matches"] > 1)
+        unmatched += sum(1 for r in rows if r["matches"] == 0)
+        return [r["id"] for r in rows], len(matched)
+
+    linked = _run_backfill(conn, "booking_schedule_id", batch, batch_size)
+    if ambiguous:
+        logger.warning(
+            "%d bookings match several schedules and were left without a "
+            "schedule_id (first ids: %s)",
+            len(ambiguous),
+            ", ".join(map(str, ambiguous[:20])),
+        )
+    if unmatched:
+        logger.warning("%d bookings match no schedule; schedule_id left NULL", unmatched)
+    return linked
+
+
+def backfill_refunded_amounts(conn, *, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Fill `payments.refunded_amount` (added by migration 0014) for
+    payments refunded before it existed, which were always refunded in
+    full. Returns the payments updated."""
+    from database import queries
+
+    def batch(conn, after_id, limit):
+        ids = queries.get_refunds_without_amount(conn, after_id, limit)
+        queries.set_full_refunds(conn, ids)
+        return ids, len(ids)
+
+    return _run_backfill(conn, "payment_refunded_amount", batch, batch_size)
+
+
+def run_backfills(conn) -> None:
+    """Run the data backfills that follow the schema migrations."""
+    convert_passenger_blobs(conn)
+    backfill_booking_schedules(conn)
+    backfill_refunded_amounts(conn)
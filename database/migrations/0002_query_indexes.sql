@@ -0,0 +1,26 @@
+-- 0002: indexes for the hot search, history and booking-existence queries
+
+-- find_schedules: origin + destination + date, covering the selected columns
+CREATE INDEX IF NOT EXISTS idx_schedules_route_date
+    ON schedules (
+        origin_station_id,
+        destination_station_id,
+        departure_date,
+        departure_time,
+        train_id,
+        arrival_date,
+        arrival_time,
+        fare
+    );
+
+-- get_bookings_by_user: filter on user, newest first
+CREATE INDEX IF NOT EXISTS idx_bookings_user_created
+    ON bookings (user_id, created_at);
+
+-- booking_exists_for_schedule: covers the whole predicate
+CREATE INDEX IF NOT EXISTS idx_bookings_train_route_date
+    ON bookings (train_id, travel_date, origin_station_id, destination_station_id);
+
+-- payment lookups by booking (history join, refunds)
+CREATE INDEX IF NOT EXISTS idx_payments_booking
+    ON payments (booking_id);
@@ -0,0 +1,10 @@
+-- 0003: link each booking to the schedule row it was made against
+
+ALTER TABLE bookings ADD COLUMN schedule_id INTEGER REFERENCES schedules(id);
+
+-- existing bookings are linked afterwards, in batches, by
+-- migrate.backfill_booking_schedules (not here, where the whole table
+-- would be rewritten under the migration's write lock)
+
+CREATE INDEX IF NOT EXISTS idx_bookings_schedule
+    ON bookings (schedule_id);
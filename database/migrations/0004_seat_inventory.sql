@@ -0,0 +1,31 @@
+-- 0004: coach capacity per train and a seat on every confirmed booking
+
+CREATE TABLE IF NOT EXISTS coaches (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    train_id INTEGER NOT NULL,
+    coach_code TEXT NOT NULL,
+    seat_class TEXT CHECK(seat_class IN ('sleeper', '3ac', '2ac', '1ac', 'chair')) NOT NULL,
+    seat_count INTEGER NOT NULL CHECK(seat_count > 0),
+    FOREIGN KEY (train_id) REFERENCES trains(id),
+    UNIQUE (train_id, coach_code)
+);
+
+ALTER TABLE bookings ADD COLUMN coach_id INTEGER REFERENCES coaches(id);
+ALTER TABLE bookings ADD COLUMN seat_number INTEGER;
+
+-- a seat can be held by at most one confirmed booking per schedule;
+-- cancelling a booking releases its seat
+CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_seat
+    ON bookings (schedule_id, coach_id, seat_number)
+    WHERE status = 'confirmed' AND seat_number IS NOT NULL;
+
+-- default layout for trains that already exist
+INSERT OR IGNORE INTO coaches (train_id, coach_code, seat_class, seat_count)
+SELECT t.id, l.coach_code, l.seat_class, l.seat_count
+FROM trains t
+CROSS JOIN (
+    SELECT 'S1' AS coach_code, 'sleeper' AS seat_class, 72 AS seat_count
+    UNION ALL SELECT 'S2', 'sleeper', 72
+    UNION ALL SELECT 'B1', '3ac', 64
+    UNION ALL SELECT 'A1', '2ac', 48
+) l;
@@ -0,0 +1,8 @@
+-- 0005: bookings may span several consecutive legs of one train run;
+-- schedule_id is the first leg and end_schedule_id the last
+
+ALTER TABLE bookings ADD COLUMN end_schedule_id INTEGER REFERENCES schedules(id);
+
+-- legs of one train by date (train runs, seat maps)
+CREATE INDEX IF NOT EXISTS idx_schedules_train_date
+    ON schedules (train_id, departure_date, departure_time);
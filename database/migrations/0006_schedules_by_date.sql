@@ -0,0 +1,4 @@
+-- 0006: all departures in a date window (journey planner)
+
+CREATE INDEX IF NOT EXISTS idx_schedules_departure
+    ON schedules (departure_date, departure_time);
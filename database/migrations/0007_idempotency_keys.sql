@@ -0,0 +1,15 @@
+-- 0007: client-supplied idempotency keys for booking requests
+-- A retried request with the same key gets the stored response back
+-- instead of booking again.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    idempotency_key TEXT PRIMARY KEY,
+    request_hash TEXT NOT NULL,
+    booking_id INTEGER NOT NULL,
+    response TEXT NOT NULL,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (booking_id) REFERENCES bookings(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created
+    ON idempotency_keys (created_at);
@@ -0,0 +1,10 @@
+-- 0008: group bookings. Every ticket of a group carries the lead ticket's
+-- booking code in group_code; the group's single payment belongs to the
+-- lead booking.
+
+ALTER TABLE bookings ADD COLUMN group_code TEXT;
+ALTER TABLE bookings ADD COLUMN passenger_name TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_bookings_group
+    ON bookings (group_code)
+    WHERE group_code IS NOT NULL;
@@ -0,0 +1,23 @@
+-- 0009: saved passengers move from the users.passengers JSON array into
+-- their own table, one row per passenger, so an edit touches one row.
+-- Existing arrays are copied over in small batches after the schema
+-- migration (see migrate.convert_passenger_blobs); the partial index lets
+-- each batch find the users still to convert without scanning the table.
+
+CREATE TABLE IF NOT EXISTS passengers (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    name TEXT,
+    dob TEXT,
+    gender TEXT,
+    details TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_passengers_user
+    ON passengers (user_id, id);
+
+CREATE INDEX IF NOT EXISTS idx_users_passengers_pending
+    ON users (id)
+    WHERE passengers IS NOT NULL;
@@ -0,0 +1,40 @@
+-- 0010: recurring services. A service pattern is a train's legs (times
+-- and day offsets from the run's first departure) plus the weekdays it
+-- runs and a validity period. Patterns are expanded into ordinary
+-- schedules rows, tagged with pattern_id; materialized_until records how
+-- far each pattern has been expanded.
+
+CREATE TABLE IF NOT EXISTS service_patterns (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    train_id INTEGER NOT NULL,
+    days_mask INTEGER NOT NULL,
+    valid_from TEXT NOT NULL,
+    valid_to TEXT,
+    materialized_until TEXT,
+    status TEXT NOT NULL DEFAULT 'active',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (train_id) REFERENCES trains(id)
+);
+
+CREATE TABLE IF NOT EXISTS service_pattern_legs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pattern_id INTEGER NOT NULL,
+    leg_order INTEGER NOT NULL,
+    origin_station_id INTEGER NOT NULL,
+    destination_station_id INTEGER NOT NULL,
+    departure_time TEXT NOT NULL,
+    arrival_time TEXT NOT NULL,
+    departure_day_offset INTEGER NOT NULL DEFAULT 0,
+    arrival_day_offset INTEGER NOT NULL DEFAULT 0,
+    fare REAL NOT NULL,
+    FOREIGN KEY (pattern_id) REFERENCES service_patterns(id),
+    FOREIGN KEY (origin_station_id) REFERENCES stations(id),
+    FOREIGN KEY (destination_station_id) REFERENCES stations(id),
+    UNIQUE (pattern_id, leg_order)
+);
+
+ALTER TABLE schedules ADD COLUMN pattern_id INTEGER REFERENCES service_patterns(id);
+
+CREATE INDEX IF NOT EXISTS idx_schedules_pattern
+    ON schedules (pattern_id, departure_date)
+    WHERE pattern_id IS NOT NULL;
@@ -0,0 +1,5 @@
+-- 0011: sessions by expiry, for loading unexpired sessions and for
+-- deleting expired ones without scanning the table.
+
+CREATE INDEX IF NOT EXISTS idx_sessions_expires
+    ON sessions (expires_at);
@@ -0,0 +1,6 @@
+-- 0012: pending payments by age, so the reaper finds stale ones without
+-- scanning every payment. Only pending rows are indexed.
+
+CREATE INDEX IF NOT EXISTS idx_payments_pending
+    ON payments (created_at)
+    WHERE status = 'pending';
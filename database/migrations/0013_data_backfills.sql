@@ -0,0 +1,8 @@
+-- 0013: data backfills that have finished, so later runs skip them.
+-- Backfills run after the schema migrations, in short batches
+-- (see database/migrate.py).
+
+CREATE TABLE IF NOT EXISTS data_backfills (
+    name TEXT PRIMARY KEY,
+    completed_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,7 @@
+-- 0014: how much of each payment has been refunded. A group's shared
+-- payment is refunded ticket by ticket, each less any late-cancellation
+-- deduction; `status` becomes 'refunded' once nothing more is owed back.
+-- Payments refunded before this column existed are filled in afterwards,
+-- in batches, by migrate.backfill_refunded_amounts.
+
+ALTER TABLE payments ADD COLUMN refunded_amount REAL NOT NULL DEFAULT 0;
@@ -1,20 +1,20 @@
-"""SQL queries and helpers for TrainBookingSystem."""
+"""SQL queries and helpers for TrainBookingSystem.
 
-from database.connection import get_connection
-from pathlib import Path
+Helpers never commit: they run in the caller's transaction, so a service
+can make several writes and have them commit (or roll back) together.
+Services get that from `connection.connect()`, which commits when its
+block exits cleanly and rolls back if it raises.
+"""
+
+import json
 
-SCHEMA_PATH = Path(__file__).resolve().parents[1] / "schema.sql"
+from database.connection import get_connection
 
 
 def init_db():
+    """Open the database once so pending migrations are applied."""
     try:
         conn = get_connection()
-        cursor = conn.cursor()
-
-        with open(SCHEMA_PATH, "r") as f:
-            cursor.executescript(f.read())
-
-        conn.commit()
         conn.close()
         print("✅ Database initialized successfully")
 
@@ -45,16 +45,15 @@ def create_user(
     aadhaar=None,
     nationality=None,
     address=None,
-    passengers=None,
 ):
     cursor = conn.cursor()
     cursor.execute(
         """
         INSERT INTO users (
             username, email, mobile, password_hash, role,
-            full_name, dob, gender, aadhaar, nationality, address, passengers
+            full_name, dob, gender, aadhaar, nationality, address
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (
             username,
@@ -68,10 +67,8 @@ def create_user(
             aadhaar,
             nationality,
             address,
-            passengers,
         ),
     )
-    conn.commit()
     return cursor.lastrowid
 
 
@@ -87,6 +84,34 @@ def get_user_by_email(conn, email):
     return cursor.fetchone()
 
 
+def get_user_by_identifier(conn, identifier):
+    """The user whose username, email or mobile is `identifier`, preferring
+    a username match, then email. One query over the three unique indexes."""
+    cursor = conn.cursor()
+    cursor.execute(
+        """
+        SELECT * FROM users
+        WHERE username = ?1 OR email = ?1 OR mobile = ?1
+        ORDER BY username = ?1 DESC, email = ?1 DESC
+        LIMIT 1
+        """,
+        (identifier,),
+    )
+    return cursor.fetchone()
+
+
+def update_password_hash(conn, user_id, password_hash):
+    conn.execute(
+        "UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id)
+    )
+
+
+def get_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
 def get_user_by_mobile(conn, mobile):
     cursor = conn.cursor()
     cursor.execute("SELECT * FROM users WHERE mobile = ?", (mobile,))
@@ -107,7 +132,6 @@ def create_station(conn, code, name, city):
         """,
         (code, name, city),
     )
-    conn.commit()
     return cur.lastrowid
 
 
@@ -126,6 +150,10 @@ def get_all_stations(conn):
     return cur.fetchall()
 
 
+def get_station_ids(conn):
+    return {row[0] for row in conn.execute("SELECT id FROM stations")}
+
+
 def get_station_by_id(conn, station_id):
     cur = conn.cursor()
     cur.execute("SELECT * FROM stations WHERE id = ?", (station_id,))
@@ -146,7 +174,6 @@ def create_train(conn, train_number, train_name):
         """,
         (train_number, train_name),
     )
-    conn.commit()
     return cur.lastrowid
 
 
@@ -155,7 +182,6 @@ def update_train_name(conn, train_id, new_train_name):
     cur.execute(
         "UPDATE trains SET train_name = ? WHERE id = ?", (new_train_name, train_id)
     )
-    conn.commit()
 
 
 def update_station_name(conn, station_id, new_station_name):
@@ -164,7 +190,6 @@ def update_station_name(conn, station_id, new_station_name):
     cur.execute(
         "UPDATE stations SET name = ? WHERE id = ?", (new_station_name, station_id)
     )
-    conn.commit()
 
 
 def get_train_by_number(conn, train_number):
@@ -182,6 +207,10 @@ def get_train_by_id(conn, train_id):
     return cur.fetchone()
 
 
+def get_train_ids(conn):
+    return {row[0] for row in conn.execute("SELECT id FROM trains")}
+
+
 def get_all_trains(conn):
     cur = conn.cursor()
     cur.execute("SELECT * FROM trains")
@@ -194,7 +223,58 @@ def delete_train(conn, train_id):
         "UPDATE trains SET status = 'inactive' WHERE id = ?",
         (train_id,),
     )
-    conn.commit()
+
+
+# -------------------------
+# COACH / SEAT QUERIES
+# -------------------------
+
+
+def create_coaches(conn, train_id, layout):
+    """
+    Insert coaches for a train.
+
+    `layout` is an iterable of (coach_code, seat_class, seat_count).
+    """
+    cur = conn.cursor()
+    cur.executemany(
+        """
+        INSERT INTO coaches (train_id, coach_code, seat_class, seat_count)
+        VALUES (?, ?, ?, ?)
+        """,
+        [(train_id, code, seat_class, count) for code, seat_class, count in layout],
+    )
+
+
+def get_coaches_by_train(conn, train_id):
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT * FROM coaches WHERE train_id = ? ORDER BY id",
+        (train_id,),
+    )
+    return cur.fetchall()
+
+
+def get_seat_bookings(conn, schedule_ids):
+    """
+    Return coach, seat and first/last leg of every confirmed booking that
+    starts on one of `schedule_ids`.
+    """
+    if not schedule_ids:
+        return []
+    placeholders = ", ".join("?" for _ in schedule_ids)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT coach_id, seat_number, schedule_id, end_schedule_id
+        FROM bookings
+        WHERE schedule_id IN ({placeholders})
+          AND status = 'confirmed'
+          AND seat_number IS NOT NULL
+        """,
+        list(schedule_ids),
+    )
+    return cur.fetchall()
 
 
 # -------------------------
@@ -241,10 +321,31 @@ def create_schedule(
         ),
     )
 
-    conn.commit()
     return cursor.lastrowid
 
 
+def create_schedules(conn, rows):
+    """Insert many schedule legs with one executemany. Each row is
+    (train_id, origin_station_id, destination_station_id, departure_date,
+    arrival_date, departure_time, arrival_time, fare)."""
+    conn.executemany(
+        """
+        INSERT INTO schedules (
+            train_id,
+            origin_station_id,
+            destination_station_id,
+            departure_date,
+            arrival_date,
+            departure_time,
+            arrival_time,
+            fare
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
+
+
 def update_schedule(
     conn,
     schedule_id,
@@ -286,8 +387,6 @@ def update_schedule(
         ),
     )
 
-    conn.commit()
-
 
 def find_schedules(conn, origin_id, destination_id, departure_date):
     cur = conn.cursor()
@@ -357,6 +456,44 @@ def get_schedules_by_train(conn, train_id):
     return cur.fetchall()
 
 
+TIMETABLE_SQL = """
+        SELECT
+            s.id,
+            s.train_id,
+            s.origin_station_id,
+            s.destination_station_id,
+            s.departure_date,
+            s.departure_time,
+            s.arrival_date,
+            s.arrival_time,
+            s.fare,
+            t.train_number,
+            t.train_name,
+            t.status AS train_status
+        FROM schedules s
+        JOIN trains t ON s.train_id = t.id
+"""
+
+
+def get_timetable_rows(conn):
+    """Return every schedule with its train's number, name and status."""
+    cur = conn.cursor()
+    cur.execute(TIMETABLE_SQL)
+    return cur.fetchall()
+
+
+def get_timetable_rows_for_train(conn, train_id):
+    cur = conn.cursor()
+    cur.execute(TIMETABLE_SQL + " WHERE s.train_id = ?", (train_id,))
+    return cur.fetchall()
+
+
+def get_timetable_row(conn, schedule_id):
+    cur = conn.cursor()
+    cur.execute(TIMETABLE_SQL + " WHERE s.id = ?", (schedule_id,))
+    return cur.fetchone()
+
+
 def delete_schedule(conn, schedule_id):
     """
     Delete schedule entry.
@@ -369,7 +506,103 @@ def delete_schedule(conn, schedule_id):
         """,
         (schedule_id,),
     )
-    conn.commit()
+
+
+# -------------------------
+# SERVICE PATTERN QUERIES
+# -------------------------
+
+
+def create_service_pattern(conn, train_id, days_mask, valid_from, valid_to, legs):
+    """Insert a pattern and its legs; each leg is (origin_station_id,
+    destination_station_id, departure_time, arrival_time,
+    departure_day_offset, arrival_day_offset, fare)."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO service_patterns (train_id, days_mask, valid_from, valid_to)
+        VALUES (?, ?, ?, ?)
+        """,
+        (train_id, days_mask, valid_from, valid_to),
+    )
+    pattern_id = cur.lastrowid
+    conn.executemany(
+        """
+        INSERT INTO service_pattern_legs (
+            pattern_id, leg_order, origin_station_id, destination_station_id,
+            departure_time, arrival_time, departure_day_offset,
+            arrival_day_offset, fare
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        ((pattern_id, order) + tuple(leg) for order, leg in enumerate(legs)),
+    )
+    return pattern_id
+
+
+def get_all_service_patterns(conn):
+    cur = conn.cursor()
+    cur.execute("SELECT * FROM service_patterns ORDER BY id")
+    return cur.fetchall()
+
+
+def get_service_patterns_due(conn, through_date):
+    """Active patterns not yet expanded through `through_date`."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT *
+        FROM service_patterns
+        WHERE status = 'active'
+          AND valid_from <= ?
+          AND (materialized_until IS NULL OR materialized_until < ?)
+          AND (valid_to IS NULL OR materialized_until IS NULL
+               OR materialized_until < valid_to)
+        ORDER BY id
+        """,
+        (through_date, through_date),
+    )
+    return cur.fetchall()
+
+
+def get_service_pattern_legs(conn, pattern_id):
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT * FROM service_pattern_legs WHERE pattern_id = ? ORDER BY leg_order",
+        (pattern_id,),
+    )
+    return cur.fetchall()
+
+
+def create_pattern_schedules(conn, pattern_id, rows):
+    """Insert expanded legs of a pattern (rows as for `create_schedules`),
+    skipping any that already exist. Returns how many were inserted."""
+    before = conn.total_changes
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO schedules (
+            train_id,
+            origin_station_id,
+            destination_station_id,
+            departure_date,
+            arrival_date,
+            departure_time,
+            arrival_time,
+            fare,
+            pattern_id
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        (tuple(row) + (pattern_id,) for row in rows),
+    )
+    return conn.total_changes - before
+
+
+def set_pattern_materialized(conn, pattern_id, through_date):
+    conn.execute(
+        "UPDATE service_patterns SET materialized_until = ? WHERE id = ?",
+        (through_date, pattern_id),
+    )
 
 
 # -------------------------
@@ -386,7 +619,6 @@ def create_session(conn, token, user_id, expires_at):
         """,
         (token, user_id, expires_at),
     )
-    conn.commit()
 
 
 def get_session(conn, token):
@@ -398,57 +630,233 @@ def get_session(conn, token):
 def delete_session(conn, token):
     cur = conn.cursor()
     cur.execute("DELETE FROM sessions WHERE token = ?", (token,))
-    conn.commit()
 
 
-def delete_expired_sessions(conn, now_iso):
-    cur = conn.cursor()
-    cur.execute("DELETE FROM sessions WHERE expires_at <= ?", (now_iso,))
-    conn.commit()
+def delete_expired_sessions(conn, now_iso, limit):
+    """Delete up to `limit` sessions expired by `now_iso`; return how many."""
+    cur = conn.execute(
+        """
+        DELETE FROM sessions WHERE token IN (
+            SELECT token FROM sessions WHERE expires_at <= ? LIMIT ?
+        )
+        """,
+        (now_iso, limit),
+    )
+    return cur.rowcount
 
 
-def get_active_session(conn, now_iso):
-    """Return the most recent active session (not expired) joined with user info.
+def save_sessions(conn, rows):
+    """Insert or replace sessions from (token, user_id, expires_at, created_at) tuples."""
+    conn.executemany(
+        """
+        INSERT OR REPLACE INTO sessions (token, user_id, expires_at, created_at)
+        VALUES (?, ?, ?, ?)
+        """,
+        rows,
+    )
 
-    Returns a row with token, user_id, expires_at, username, role or None.
-    """
+
+def delete_sessions(conn, tokens):
+    conn.executemany("DELETE FROM sessions WHERE token = ?", [(t,) for t in tokens])
+
+
+# -------------------------
+# PASSENGERS (one row per saved passenger)
+# -------------------------
+_PASSENGER_FIELDS = ("name", "dob", "gender")
+
+
+def _passenger_values(passenger):
+    """(name, dob, gender, details) for a passenger dict; any other keys
+    are kept as a JSON object in `details`."""
+    extra = {
+        k: v for k, v in passenger.items() if k not in _PASSENGER_FIELDS and k != "id"
+    }
+    return tuple(passenger.get(k) for k in _PASSENGER_FIELDS) + (
+        json.dumps(extra) if extra else None,
+    )
+
+
+def decode_passengers(raw):
+    """Passenger dicts from a legacy `users.passengers` JSON array; a
+    missing or unreadable value decodes as no passengers."""
+    if not raw:
+        return []
+    try:
+        passengers = json.loads(raw)
+    except ValueError:
+        return []
+    if not isinstance(passengers, list):
+        return []
+    return [p for p in passengers if isinstance(p, dict)]
+
+
+def get_passengers(conn, user_id):
+    """A user's saved passengers, oldest first."""
     cur = conn.cursor()
     cur.execute(
         """
-        SELECT s.token, s.user_id, s.expires_at, u.username, u.role
-        FROM sessions s
-        JOIN users u ON s.user_id = u.id
-        WHERE s.expires_at > ?
-        ORDER BY s.created_at DESC
-        LIMIT 1
+        SELECT id, user_id, name, dob, gender, details
+        FROM passengers
+        WHERE user_id = ?
+        ORDER BY id
         """,
-        (now_iso,),
+        (user_id,),
+    )
+    return cur.fetchall()
+
+
+def get_passenger(conn, user_id, passenger_id):
+    """One saved passenger, if it belongs to `user_id`; else None."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, user_id, name, dob, gender, details
+        FROM passengers
+        WHERE id = ? AND user_id = ?
+        """,
+        (passenger_id, user_id),
     )
     return cur.fetchone()
 
 
-# -------------------------
-# PASSENGERS (stored as JSON in users.passengers TEXT)
-# -------------------------
-def get_passengers_for_user(conn, user_id):
+def create_passenger(conn, user_id, passenger):
     cur = conn.cursor()
-    cur.execute("SELECT passengers FROM users WHERE id = ?", (user_id,))
-    row = cur.fetchone()
-    if not row:
-        return None
-    # row may be sqlite3.Row -> allow dict-style or index
-    try:
-        return row["passengers"]
-    except Exception:
-        return row[0]
+    cur.execute(
+        """
+        INSERT INTO passengers (user_id, name, dob, gender, details)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        (user_id,) + _passenger_values(passenger),
+    )
+    return cur.lastrowid
+
+
+def create_passengers(conn, user_passengers):
+    """Insert many `(user_id, passenger_dict)` pairs with one executemany."""
+    conn.executemany(
+        """
+        INSERT INTO passengers (user_id, name, dob, gender, details)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        ((user_id,) + _passenger_values(p) for user_id, p in user_passengers),
+    )
+
+
+def update_passenger(conn, user_id, passenger_id, passenger):
+    """Replace a passenger's fields; 0 rows if it is not `user_id`'s."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        UPDATE passengers
+        SET name = ?, dob = ?, gender = ?, details = ?
+        WHERE id = ? AND user_id = ?
+        """,
+        _passenger_values(passenger) + (passenger_id, user_id),
+    )
+    return cur.rowcount
+
+
+def delete_passenger(conn, user_id, passenger_id):
+    cur = conn.cursor()
+    cur.execute(
+        "DELETE FROM passengers WHERE id = ? AND user_id = ?", (passenger_id, user_id)
+    )
+    return cur.rowcount
 
 
-def save_passengers_for_user(conn, user_id, passengers_json):
+def get_passenger_blobs(conn, after_user_id, limit):
+    """The next `limit` users (by id) still holding a legacy
+    `users.passengers` JSON array."""
     cur = conn.cursor()
     cur.execute(
-        "UPDATE users SET passengers = ? WHERE id = ?", (passengers_json, user_id)
+        """
+        SELECT id, passengers
+        FROM users
+        WHERE passengers IS NOT NULL AND id > ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (after_user_id, limit),
+    )
+    return cur.fetchall()
+
+
+def clear_passenger_blobs(conn, user_ids):
+    conn.executemany(
+        "UPDATE users SET passengers = NULL WHERE id = ?",
+        ((user_id,) for user_id in user_ids),
+    )
+
+
+# -------------------------
+# DATA BACKFILLS (see database/migrate.py)
+# -------------------------
+
+
+def is_backfill_done(conn, name):
+    cur = conn.execute("SELECT 1 FROM data_backfills WHERE name = ?", (name,))
+    return cur.fetchone() is not None
+
+
+def mark_backfill_done(conn, name):
+    conn.execute("INSERT OR IGNORE INTO data_backfills (name) VALUES (?)", (name,))
+
+
+def get_unlinked_bookings(conn, after_booking_id, limit):
+    """
+    The next `limit` bookings (by id, after `after_booking_id`) without a
+    `schedule_id`, each with the number of schedules matching its train,
+    route and travel date (`matches`) and the lowest matching id
+    (`schedule_id`).
+    """
+    cur = conn.execute(
+        """
+        SELECT b.id, COUNT(s.id) AS matches, MIN(s.id) AS schedule_id
+        FROM (
+            SELECT id, train_id, origin_station_id, destination_station_id, travel_date
+            FROM bookings
+            WHERE schedule_id IS NULL AND id > ?
+            ORDER BY id
+            LIMIT ?
+        ) b
+        LEFT JOIN schedules s
+          ON s.train_id = b.train_id
+         AND s.origin_station_id = b.origin_station_id
+         AND s.destination_station_id = b.destination_station_id
+         AND s.departure_date = b.travel_date
+        GROUP BY b.id
+        ORDER BY b.id
+        """,
+        (after_booking_id, limit),
+    )
+    return cur.fetchall()
+
+
+def get_refunds_without_amount(conn, after_payment_id, limit):
+    """Ids of payments refunded before `refunded_amount` was recorded."""
+    cur = conn.execute(
+        """
+        SELECT id FROM payments
+        WHERE status = 'refunded' AND refunded_amount = 0 AND id > ?
+        ORDER BY id
+        LIMIT ?
+        """,
+        (after_payment_id, limit),
+    )
+    return [row[0] for row in cur.fetchall()]
+
+
+def set_full_refunds(conn, payment_ids):
+    conn.executemany(
+        "UPDATE payments SET refunded_amount = amount WHERE id = ?",
+        ((payment_id,) for payment_id in payment_ids),
     )
-    conn.commit()
+
+
+def set_booking_schedules(conn, rows):
+    """Link bookings to schedules from (schedule_id, booking_id) tuples."""
+    conn.executemany("UPDATE bookings SET schedule_id = ? WHERE id = ?", rows)
 
 
 # -------------------------
@@ -465,9 +873,15 @@ def create_booking(
     destination_station_id,
     travel_date,
     fare,
+    schedule_id=None,
+    coach_id=None,
+    seat_number=None,
+    end_schedule_id=None,
 ):
     """
-    Insert a new booking record.
+    Insert a new booking record in the caller's transaction (not committed
+    here, so the booking, its payment and its idempotency key commit
+    together).
 
     Returns the new booking id.
     """
@@ -481,9 +895,13 @@ def create_booking(
             origin_station_id,
             destination_station_id,
             travel_date,
-            fare
+            fare,
+            schedule_id,
+            coach_id,
+            seat_number,
+            end_schedule_id
         )
-        VALUES (?, ?, ?, ?, ?, ?,?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """,
         (
             booking_code,
@@ -493,26 +911,60 @@ def create_booking(
             destination_station_id,
             travel_date,
             fare,
+            schedule_id,
+            coach_id,
+            seat_number,
+            end_schedule_id,
         ),
     )
-    conn.commit()
     return cur.lastrowid
 
 
-def get_bookings_by_user(conn, user_id):
+def create_bookings(conn, rows):
     """
-    Return all bookings for a user with:
-    - user details
-    - train details
-    - station details
-    - schedule details (single matched row)
-    - payment details
+    Insert several bookings with one `executemany`, in the caller's
+    transaction. Each row is a tuple of (booking_code, user_id, train_id,
+    origin_station_id, destination_station_id, travel_date, fare,
+    schedule_id, coach_id, seat_number, end_schedule_id, group_code,
+    passenger_name).
     """
+    conn.executemany(
+        """
+        INSERT INTO bookings (
+            booking_code,
+            user_id,
+            train_id,
+            origin_station_id,
+            destination_station_id,
+            travel_date,
+            fare,
+            schedule_id,
+            coach_id,
+            seat_number,
+            end_schedule_id,
+            group_code,
+            passenger_name
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        rows,
+    )
 
-    cur = conn.cursor()
 
+def count_confirmed_in_group(conn, group_code):
+    cur = conn.cursor()
     cur.execute(
         """
+        SELECT COUNT(*) FROM bookings
+        WHERE group_code = ? AND status = 'confirmed'
+        """,
+        (group_code,),
+    )
+    return cur.fetchone()[0]
+
+
+# Booking rows joined with user, train, station, schedule and payment details.
+BOOKING_DETAILS_SQL = """
         SELECT
             b.id,
             b.booking_code,
@@ -531,46 +983,15 @@ def get_bookings_by_user(conn, user_id):
             so.name AS origin_station,
             sd.name AS destination_station,
 
-            -- Fetch ONE matching schedule row safely
-            (
-                SELECT s.departure_time
-                FROM schedules s
-                WHERE s.train_id = b.train_id
-                  AND s.origin_station_id = b.origin_station_id
-                  AND s.destination_station_id = b.destination_station_id
-                  AND s.departure_date = b.travel_date
-                LIMIT 1
-            ) AS departure_time,
-
-            (
-                SELECT s.arrival_time
-                FROM schedules s
-                WHERE s.train_id = b.train_id
-                  AND s.origin_station_id = b.origin_station_id
-                  AND s.destination_station_id = b.destination_station_id
-                  AND s.departure_date = b.travel_date
-                LIMIT 1
-            ) AS arrival_time,
-
-            (
-                SELECT s.departure_date
-                FROM schedules s
-                WHERE s.train_id = b.train_id
-                  AND s.origin_station_id = b.origin_station_id
-                  AND s.destination_station_id = b.destination_station_id
-                  AND s.departure_date = b.travel_date
-                LIMIT 1
-            ) AS departure_date,
-
-            (
-                SELECT s.arrival_date
-                FROM schedules s
-                WHERE s.train_id = b.train_id
-                  AND s.origin_station_id = b.origin_station_id
-                  AND s.destination_station_id = b.destination_station_id
-                  AND s.departure_date = b.travel_date
-                LIMIT 1
-            ) AS arrival_date,
+            COALESCE(s.departure_time, sf.departure_time) AS departure_time,
+            COALESCE(se.arrival_time, sf.arrival_time) AS arrival_time,
+            COALESCE(s.departure_date, sf.departure_date) AS departure_date,
+            COALESCE(se.arrival_date, sf.arrival_date) AS arrival_date,
+
+            c.coach_code,
+            b.seat_number,
+            b.passenger_name,
+            b.group_code,
 
             p.amount AS payment_amount,
             p.method AS payment_method,
@@ -591,9 +1012,61 @@ def get_bookings_by_user(conn, user_id):
         JOIN stations sd
             ON b.destination_station_id = sd.id
 
+        LEFT JOIN schedules s
+            ON s.id = b.schedule_id
+
+        -- last leg of a multi-leg journey (same as s for a single leg)
+        LEFT JOIN schedules se
+            ON se.id = COALESCE(b.end_schedule_id, b.schedule_id)
+
+        -- older bookings the backfill could not link to one schedule: the
+        -- first matching leg, as before schedule_id existed
+        LEFT JOIN schedules sf
+            ON b.schedule_id IS NULL
+           AND sf.id = (
+                SELECT MIN(x.id)
+                FROM schedules x
+                WHERE x.train_id = b.train_id
+                  AND x.origin_station_id = b.origin_station_id
+                  AND x.destination_station_id = b.destination_station_id
+                  AND x.departure_date = b.travel_date
+           )
+
+        LEFT JOIN coaches c
+            ON c.id = b.coach_id
+
+        -- the tickets of a group share the lead booking's payment
+        LEFT JOIN bookings g
+            ON g.booking_code = b.group_code
+
         LEFT JOIN payments p
-            ON p.booking_id = b.id
+            ON p.booking_id = COALESCE(g.id, b.id)
+"""
+
+
+def get_booking_details_by_code(conn, booking_code):
+    """One booking with the same details as `get_bookings_by_user`, found
+    through the booking_code unique index."""
+    cur = conn.cursor()
+    cur.execute(BOOKING_DETAILS_SQL + "WHERE b.booking_code = ?", (booking_code,))
+    return cur.fetchone()
+
+
+def get_bookings_by_user(conn, user_id):
+    """
+    Return all bookings for a user with:
+    - user details
+    - train details
+    - station details
+    - schedule details (the schedule the booking was made against)
+    - payment details
+    """
 
+    cur = conn.cursor()
+
+    cur.execute(
+        BOOKING_DETAILS_SQL
+        + """
         WHERE b.user_id = ?
 
         ORDER BY b.created_at DESC
@@ -604,6 +1077,57 @@ def get_bookings_by_user(conn, user_id):
     return cur.fetchall()
 
 
+def get_bookings_page(
+    conn,
+    user_id,
+    *,
+    limit,
+    before=None,
+    status=None,
+    date_from=None,
+    date_to=None,
+):
+    """
+    Return up to `limit` bookings for a user, newest first, in the same
+    shape as `get_bookings_by_user`.
+
+    `before` is a keyset cursor `(created_at, id)`: only bookings strictly
+    older than it are returned. `status` filters on booking status and
+    `date_from` / `date_to` (inclusive) on travel date.
+    """
+    conditions = ["b.user_id = ?"]
+    params = [user_id]
+
+    if status:
+        conditions.append("b.status = ?")
+        params.append(status)
+    if date_from:
+        conditions.append("b.travel_date >= ?")
+        params.append(date_from)
+    if date_to:
+        conditions.append("b.travel_date <= ?")
+        params.append(date_to)
+    if before:
+        conditions.append("(b.created_at, b.id) < (?, ?)")
+        params.extend(before)
+
+    params.append(limit)
+
+    cur = conn.cursor()
+    cur.execute(
+        BOOKING_DETAILS_SQL
+        + f"""
+        WHERE {" AND ".join(conditions)}
+
+        ORDER BY b.created_at DESC, b.id DESC
+
+        LIMIT ?
+        """,
+        params,
+    )
+    return cur.fetchall()
+
+
 def create_payment(
     conn,
     booking_id: int,
@@ -626,7 +1150,51 @@ def create_payment(
         """,
         (booking_id, amount, method, status, transaction_id),
     )
-    conn.commit()
+
+
+# -------------------------
+# IDEMPOTENCY QUERIES
+# -------------------------
+
+
+def get_idempotency_key(conn, idempotency_key):
+    cur = conn.cursor()
+    cur.execute(
+        "SELECT * FROM idempotency_keys WHERE idempotency_key = ?",
+        (idempotency_key,),
+    )
+    return cur.fetchone()
+
+
+def create_idempotency_key(conn, idempotency_key, request_hash, booking_id, response):
+    """Record the response for a key in the caller's transaction."""
+    cur = conn.cursor()
+    cur.execute(
+        """
+        INSERT INTO idempotency_keys (
+            idempotency_key,
+            request_hash,
+            booking_id,
+            response
+        )
+        VALUES (?, ?, ?, ?)
+        """,
+        (idempotency_key, request_hash, booking_id, response),
+    )
+
+
+def delete_idempotency_keys_before(conn, cutoff, limit):
+    """Delete up to `limit` keys created before `cutoff`; return how many."""
+    cur = conn.execute(
+        """
+        DELETE FROM idempotency_keys WHERE idempotency_key IN (
+            SELECT idempotency_key FROM idempotency_keys
+            WHERE created_at < ? LIMIT ?
+        )
+        """,
+        (cutoff, limit),
+    )
+    return cur.rowcount
 
 
 def get_booking_by_code(conn, booking_code):
@@ -657,23 +1225,129 @@ def cancel_booking(conn, booking_code):
         """,
         (booking_code,),
     )
-    conn.commit()
 
 
-def refund_payment_by_booking_id(conn, booking_id):
+def refund_payment_by_booking_id(conn, booking_id, amount, *, final=True):
     """
-    Mark payment as refunded for a booking.
+    Record a refund of `amount` against the payment held by a booking.
+
+    With `final`, the payment is marked refunded; otherwise (a group's
+    shared payment with tickets still confirmed) it stays successful with
+    the refund added to `refunded_amount`.
     """
     cur = conn.cursor()
     cur.execute(
         """
         UPDATE payments
-        SET status = 'refunded'
-        WHERE booking_id = ?
+        SET refunded_amount = refunded_amount + ?,
+            status = CASE WHEN ? THEN 'refunded' ELSE status END
+        WHERE booking_id = ? AND status = 'success'
+        """,
+        (amount, bool(final), booking_id),
+    )
+
+
+def fail_stale_pending_payments(conn, cutoff, limit):
+    """Mark up to `limit` payments still pending since before `cutoff` as
+    failed; return how many."""
+    cur = conn.execute(
+        """
+        UPDATE payments SET status = 'failed' WHERE id IN (
+            SELECT id FROM payments
+            WHERE status = 'pending' AND created_at < ? LIMIT ?
+        )
+        """,
+        (cutoff, limit),
+    )
+    return cur.rowcount
+
+
+def _run_bookings_where(train_id, travel_date, schedule_ids):
+    """WHERE clause and params matching confirmed bookings on a train run:
+    those starting on one of its legs, plus legacy bookings without a
+    schedule_id for that train and date."""
+    placeholders = ", ".join("?" for _ in schedule_ids) or "NULL"
+    return (
+        f"""
+        b.status = 'confirmed'
+        AND (
+            b.schedule_id IN ({placeholders})
+            OR (b.schedule_id IS NULL AND b.train_id = ? AND b.travel_date = ?)
+        )
+        """,
+        list(schedule_ids) + [train_id, travel_date],
+    )
+
+
+def summarize_run_bookings(conn, train_id, travel_date, schedule_ids):
+    """Count, distinct users and total fare of the confirmed bookings on a run."""
+    where, params = _run_bookings_where(train_id, travel_date, schedule_ids)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT
+            COUNT(*) AS bookings,
+            COUNT(DISTINCT b.user_id) AS users,
+            COALESCE(SUM(b.fare), 0) AS fare
+        FROM bookings b
+        WHERE {where}
+        """,
+        params,
+    )
+    return cur.fetchone()
+
+
+def refund_run_payments(conn, train_id, travel_date, schedule_ids):
+    """
+    Refund every successful payment for the confirmed bookings on a run in
+    full, including a group's shared payment held by its lead ticket (less
+    whatever its cancelled tickets already got back). Must run before
+    `cancel_run_bookings`. Returns `(payments, amount)` refunded.
+    """
+    where, params = _run_bookings_where(train_id, travel_date, schedule_ids)
+    paid = f"""
+        WITH affected AS (
+            SELECT b.id, b.group_code FROM bookings b WHERE {where}
+        )
+        SELECT p.id, p.amount, p.refunded_amount
+        FROM payments p
+        WHERE p.status = 'success'
+          AND p.booking_id IN (
+              SELECT id FROM affected
+              UNION
+              SELECT g.id FROM bookings g
+              JOIN affected a ON g.booking_code = a.group_code
+          )
+    """
+    cur = conn.cursor()
+    cur.execute(
+        f"SELECT COUNT(*), COALESCE(SUM(amount - refunded_amount), 0) FROM ({paid})",
+        params,
+    )
+    count, amount = cur.fetchone()
+    cur.execute(
+        f"""
+        WITH paid AS ({paid})
+        UPDATE payments SET status = 'refunded', refunded_amount = amount
+        WHERE id IN (SELECT id FROM paid)
+        """,
+        params,
+    )
+    return count, amount
+
+
+def cancel_run_bookings(conn, train_id, travel_date, schedule_ids):
+    """Cancel every confirmed booking on a run; returns how many."""
+    where, params = _run_bookings_where(train_id, travel_date, schedule_ids)
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        UPDATE bookings SET status = 'cancelled'
+        WHERE id IN (SELECT b.id FROM bookings b WHERE {where})
         """,
-        (booking_id,),
+        params,
     )
-    conn.commit()
+    return cur.rowcount
 
 
 def booking_exists_for_schedule(
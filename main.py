@@ -2,12 +2,64 @@ def main(argv=None):
     """Start the TrainBookingSystem CLI.
 
     If `--demo` is passed in argv, run a non-interactive demo that creates a
-    sample admin and exits. Otherwise start the interactive main menu.
+    sample admin and exits. `--migrate` applies pending schema migrations and
+    exits. `--import-schedules FILE` bulk-imports schedule legs from a CSV or
+    JSON Lines file and prints a report. `--reap` runs the expired-data
+    cleanup once and prints what it removed. Otherwise start the
+    interactive main menu.
     """
     import sys
 
     argv = argv if argv is not None else sys.argv[1:]
 
+    if "--migrate" in argv:
+        import sqlite3
+
+        from database.connection import migrate_database
+
+        try:
+            applied = migrate_database()
+        except (sqlite3.Error, ValueError) as exc:
+            print("Migration failed:", exc)
+            sys.exit(1)
+        if applied:
+            print(f"Applied migrations: {', '.join(map(str, applied))}")
+        else:
+            print("Database schema is up to date")
+        return
+
+    if "--import-schedules" in argv:
+        from services.schedule_import import import_schedules
+
+        position = argv.index("--import-schedules")
+        if position + 1 >= len(argv):
+            print("Usage: main.py --import-schedules FILE")
+            sys.exit(1)
+        try:
+            report = import_schedules(argv[position + 1])
+        except Exception as exc:
+            print("Import failed:", exc)
+            sys.exit(1)
+        print(f"Imported {report['imported']} of {report['rows']} rows")
+        for line_no, error in report["errors"]:
+            print(f"  line {line_no}: {error}")
+        if report["failed"] > len(report["errors"]):
+            print(f"  ... {report['failed'] - len(report['errors'])} more rows skipped")
+        return
+
+    if "--reap" in argv:
+        from services import reaper
+
+        try:
+            reaped = reaper.run_once()
+        except Exception as exc:
+            print("Cleanup failed:", exc)
+            sys.exit(1)
+        totals = reaper.metrics()
+        for task, rows in reaped.items():
+            print(f"{task}: {rows} rows in {totals[task]['seconds']:.3f}s")
+        return
+
     if "--demo" in argv:
         # non-interactive smoke/demonstration mode
         from services.user import create_admin
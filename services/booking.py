@@ -1,41 +1,23 @@
 from __future__ import annotations
 
 from datetime import datetime
-import random
-import string
+import hashlib
+import json
 
 from database import connection, queries
+from services import booking_codes, inventory, timetable
 
 
-# -------------------------
-# helpers (service-level)
-# -------------------------
+def _request_hash(*fields) -> str:
+    """Fingerprint of a booking request, to spot a key reused for another one."""
+    return hashlib.sha256(json.dumps(fields).encode("utf-8")).hexdigest()
 
-def _generate_booking_code() -> str:
-    """
-    Generate a unique-looking booking code.
-    Example: BK20260210A9F3
-    """
-    date_part = datetime.now().strftime("%Y%m%d")
-    rand_part = "".join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"BK{date_part}{rand_part}"
-
-
-# -------------------------
-# booking services
-# -------------------------
-
-from datetime import datetime
-import random
-import string
-
-from database import connection, queries
 
-
-def _generate_booking_code() -> str:
-    date_part = datetime.now().strftime("%Y%m%d")
-    rand_part = "".join(random.choices(string.ascii_uppercase + string.digits, k=4))
-    return f"BK{date_part}{rand_part}"
+def _replay(stored, request_hash: str) -> dict:
+    """Return the response recorded for an idempotency key."""
+    if stored["request_hash"] != request_hash:
+        raise ValueError("Idempotency key was already used for a different booking")
+    return json.loads(stored["response"])
 
 
 def book_ticket(
@@ -47,10 +29,35 @@ def book_ticket(
     travel_date: str,
     fare: float,          
     payment: dict,
+    seat_class: str | None = None,
+    idempotency_key: str | None = None,
 ) -> dict:
     """
     Create booking + payment atomically.
+
+    The journey may be a single leg or several consecutive legs of the
+    same train run. A seat free on every leg is reserved (optionally within
+    `seat_class`); raises ValueError if the train is sold out.
+
+    With an `idempotency_key`, the key is stored in the same transaction as
+    the booking, and a retry carrying the same key returns the original
+    result without validating or booking again. Reusing a key for a
+    different request raises ValueError.
     """
+    request_hash = None
+    if idempotency_key is not None:
+        request_hash = _request_hash(
+            username,
+            train_id,
+            origin_station_id,
+            destination_station_id,
+            travel_date,
+            seat_class,
+        )
+        with connection.connect() as conn:
+            stored = queries.get_idempotency_key(conn, idempotency_key)
+        if stored:
+            return _replay(stored, request_hash)
 
     if not username:
         raise ValueError("Username is required")
@@ -67,9 +74,7 @@ def book_ticket(
     if not payment or payment.get("status") != "success":
         raise ValueError("Payment not successful")
 
-    conn = connection.get_connection()
-
-    try:
+    with connection.connect() as conn:
         # -------------------------
         # USER VALIDATION
         # -------------------------
@@ -90,28 +95,44 @@ def book_ticket(
         # -------------------------
         # SCHEDULE VALIDATION
         # -------------------------
-        schedules = queries.find_schedules(
+        # a direct leg or several consecutive legs of the same train run
+        journey = inventory.find_journey(
             conn,
+            train_id,
             origin_station_id,
             destination_station_id,
             travel_date,
         )
 
-        schedule = next(
-            (s for s in schedules if s["train_id"] == train_id),
-            None,
-        )
-
-        if not schedule:
+        if not journey:
             raise ValueError("No valid schedule found for selected train")
 
+        run, first_leg, last_leg = journey
+        schedule = run.legs[first_leg]
+        last_schedule = run.legs[last_leg]
+
         # ✅ REAL fare from DB
-        actual_fare = schedule["fare"]
+        actual_fare = sum(leg["fare"] for leg in run.legs[first_leg:last_leg + 1])
+
+        # -------------------------
+        # SEAT ALLOCATION
+        # -------------------------
+        # take the write lock before reading seat state so concurrent
+        # bookings cannot pick the same seat
+        conn.execute("BEGIN IMMEDIATE")
+
+        if idempotency_key is not None:
+            # a concurrent retry may have finished while we validated
+            stored = queries.get_idempotency_key(conn, idempotency_key)
+            if stored:
+                return _replay(stored, request_hash)
+
+        seat = inventory.allocate_seat(conn, run, first_leg, last_leg, seat_class)
 
         # -------------------------
         # CREATE BOOKING
         # -------------------------
-        booking_code = _generate_booking_code()
+        booking_code = booking_codes.next_code()
 
         booking_id = queries.create_booking(
             conn,
@@ -121,7 +142,11 @@ def book_ticket(
             origin_station_id,
             destination_station_id,
             travel_date,
-            actual_fare,      
+            actual_fare,
+            schedule_id=schedule["id"],
+            coach_id=seat["coach_id"],
+            seat_number=seat["seat_number"],
+            end_schedule_id=last_schedule["id"],
         )
 
         # -------------------------
@@ -136,21 +161,147 @@ def book_ticket(
             transaction_id=payment["transaction_id"],
         )
 
-        return {
+        result = {
             "booking_id": booking_id,
             "booking_code": booking_code,
             "train_number": train["train_number"],
             "train_name": train["train_name"],
             "departure_time": schedule["departure_time"],
-            "arrival_time": schedule["arrival_time"],
+            "arrival_time": last_schedule["arrival_time"],
             "departure_date": schedule["departure_date"],
-            "arrival_date": schedule["arrival_date"],
+            "arrival_date": last_schedule["arrival_date"],
             "fare": actual_fare,
+            "coach_code": seat["coach_code"],
+            "seat_class": seat["seat_class"],
+            "seat_number": seat["seat_number"],
             "status": "confirmed",
         }
 
-    finally:
-        connection.close_connection(conn)
+        if idempotency_key is not None:
+            queries.create_idempotency_key(
+                conn, idempotency_key, request_hash, booking_id, json.dumps(result)
+            )
+
+        return result
+
+
+# most tickets one group booking may hold
+MAX_GROUP_SIZE = 6
+
+
+def book_group(
+    username: str,
+    schedule: int,
+    passenger_indices: list[int],
+    *,
+    payment: dict,
+    seat_class: str | None = None,
+) -> dict:
+    """
+    Book one ticket per saved passenger on a schedule leg, atomically.
+
+    `passenger_indices` are 0-based positions in the user's saved passenger
+    list. The user, schedule and passengers are validated once, all seats
+    are allocated together (or none, if fewer are free), the tickets are
+    inserted with one `executemany` and a single payment covers the group.
+    Every ticket carries the lead ticket's code as `group_code`.
+    """
+    if not username:
+        raise ValueError("Username is required")
+
+    indices = list(passenger_indices or ())
+    if not indices:
+        raise ValueError("Select at least one passenger")
+    if len(indices) > MAX_GROUP_SIZE:
+        raise ValueError(f"A group booking can hold at most {MAX_GROUP_SIZE} passengers")
+    if len(set(indices)) != len(indices):
+        raise ValueError("Each passenger can only be booked once")
+
+    if not payment or payment.get("status") != "success":
+        raise ValueError("Payment not successful")
+
+    with connection.connect() as conn:
+        user = queries.get_user_by_username(conn, username)
+        if not user:
+            raise ValueError("User not found")
+        if user["role"] != "customer":
+            raise ValueError("Only customers can book tickets")
+
+        saved = queries.get_passengers(conn, user["id"])
+        if any(not 0 <= i < len(saved) for i in indices):
+            raise ValueError("Passenger index out of range")
+        names = [saved[i]["name"] for i in indices]
+
+        leg = timetable.get_index(conn).get(schedule)
+        if not leg:
+            raise ValueError("Schedule does not exist")
+        if leg["train_status"] != "active":
+            raise ValueError("Train not found or inactive")
+
+        run = inventory.run_for_schedule(conn, leg)
+        position = run.index[leg["id"]]
+
+        conn.execute("BEGIN IMMEDIATE")
+        seats = inventory.allocate_seats(
+            conn, run, position, position, len(names), seat_class
+        )
+
+        codes = [booking_codes.next_code() for _ in names]
+        group_code = codes[0]
+        queries.create_bookings(
+            conn,
+            [
+                (
+                    code,
+                    user["id"],
+                    leg["train_id"],
+                    leg["origin_station_id"],
+                    leg["destination_station_id"],
+                    leg["departure_date"],
+                    leg["fare"],
+                    leg["id"],
+                    seat["coach_id"],
+                    seat["seat_number"],
+                    leg["id"],
+                    group_code,
+                    name,
+                )
+                for code, seat, name in zip(codes, seats, names)
+            ],
+        )
+
+        lead = queries.get_booking_by_code(conn, group_code)
+        queries.create_payment(
+            conn,
+            booking_id=lead["id"],
+            amount=payment["amount"],
+            method=payment["method"],
+            status=payment["status"],
+            transaction_id=payment["transaction_id"],
+        )
+
+        return {
+            "group_code": group_code,
+            "train_number": leg["train_number"],
+            "train_name": leg["train_name"],
+            "departure_date": leg["departure_date"],
+            "departure_time": leg["departure_time"],
+            "arrival_date": leg["arrival_date"],
+            "arrival_time": leg["arrival_time"],
+            "fare": leg["fare"],
+            "total_fare": round(leg["fare"] * len(names), 2),
+            "tickets": [
+                {
+                    "booking_code": code,
+                    "passenger_name": name,
+                    "coach_code": seat["coach_code"],
+                    "seat_class": seat["seat_class"],
+                    "seat_number": seat["seat_number"],
+                }
+                for code, seat, name in zip(codes, seats, names)
+            ],
+            "status": "confirmed",
+        }
 
 
 def get_booking_history(username: str) -> list:
@@ -160,88 +311,150 @@ def get_booking_history(username: str) -> list:
     if not username:
         raise ValueError("Username is required")
 
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         user = queries.get_user_by_username(conn, username)
         if not user:
             raise ValueError("User not found")
 
         return queries.get_bookings_by_user(conn, user["id"])
 
-    finally:
-        connection.close_connection(conn)
 
+HISTORY_PAGE_SIZE = 20
 
-def cancel_booking_by_code(booking_code: str) -> None:
-    """
-    Cancel a booking and refund payment.
+BOOKING_STATUSES = ("confirmed", "cancelled")
+
+
+def _validate_history_filters(status, start_date, end_date) -> None:
+    if status is not None and status not in BOOKING_STATUSES:
+        raise ValueError("status must be 'confirmed' or 'cancelled'")
+
+    for value in (start_date, end_date):
+        if value is None:
+            continue
+        try:
+            datetime.strptime(value, "%Y-%m-%d")
+        except Exception:
+            raise ValueError("dates must be YYYY-MM-DD")
+
+
+def _history_page(conn, user_id, cursor, page_size, status, start_date, end_date):
+    # fetch one extra row to know whether another page exists
+    rows = queries.get_bookings_page(
+        conn,
+        user_id,
+        limit=page_size + 1,
+        before=cursor,
+        status=status,
+        date_from=start_date,
+        date_to=end_date,
+    )
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, (last["created_at"], last["id"])
+
+
+def get_booking_history_page(
+    username: str,
+    *,
+    cursor: tuple | None = None,
+    page_size: int = HISTORY_PAGE_SIZE,
+    status: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+) -> tuple[list, tuple | None]:
     """
-    if not booking_code:
-        raise ValueError("Booking code is required")
+    Return one page of a user's booking history, newest first.
 
-    conn = connection.get_connection()
-    try:
-        booking = queries.get_booking_by_code(conn, booking_code)
-        if not booking:
-            raise ValueError("Booking not found")
+    Returns `(rows, next_cursor)`; pass `next_cursor` back as `cursor` to get
+    the following page. `next_cursor` is None on the last page.
+    """
+    if not username:
+        raise ValueError("Username is required")
+    if page_size < 1:
+        raise ValueError("page_size must be positive")
+    _validate_history_filters(status, start_date, end_date)
 
-        if booking["status"] == "cancelled":
-            raise ValueError("Booking is already cancelled")
+    with connection.connect() as conn:
+        user = queries.get_user_by_username(conn, username)
+        if not user:
+            raise ValueError("User not found")
 
-        booking_id = booking["id"]
+        return _history_page(
+            conn, user["id"], cursor, page_size, status, start_date, end_date
+        )
 
-        # 1. Cancel booking
-        queries.cancel_booking(conn, booking_code)
 
-        # 2. Refund payment
-        queries.refund_payment_by_booking_id(conn, booking_id)
+def iter_booking_history(
+    username: str,
+    *,
+    page_size: int = HISTORY_PAGE_SIZE,
+    status: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+):
+    """
+    Yield a user's bookings newest first, fetching `page_size` rows at a time.
 
-    finally:
-        connection.close_connection(conn)
+    No connection is held between pages.
+    """
+    if not username:
+        raise ValueError("Username is required")
+    if page_size < 1:
+        raise ValueError("page_size must be positive")
+    _validate_history_filters(status, start_date, end_date)
 
+    with connection.connect() as conn:
+        user = queries.get_user_by_username(conn, username)
+        if not user:
+            raise ValueError("User not found")
+    user_id = user["id"]
 
-from datetime import datetime, timedelta
+    cursor = None
+    while True:
+        with connection.connect() as conn:
+            rows, cursor = _history_page(
+                conn, user_id, cursor, page_size, status, start_date, end_date
+            )
+        yield from rows
+        if cursor is None:
+            return
 
 
 def cancel_booking_by_code(booking_code: str) -> dict:
     """
     Cancel a booking and apply smart refund logic.
+
+    The status check, the cancellation and the refund run as one
+    transaction under the write lock, so a booking cannot be cancelled
+    (and refunded) twice by concurrent requests.
     """
 
     if not booking_code:
         raise ValueError("Booking code is required")
 
-    conn = connection.get_connection()
-
-    try:
-        booking = queries.get_booking_by_code(conn, booking_code)
+    with connection.connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        booking = queries.get_booking_details_by_code(conn, booking_code)
         if not booking:
             raise ValueError("Booking not found")
 
-        if booking["status"] == "cancelled":
+        if booking["booking_status"] == "cancelled":
             raise ValueError("Booking is already cancelled")
 
-        booking_id = booking["id"]
-
-        # ---------------------------------------
-        # Get full booking details with schedule
-        # ---------------------------------------
-        full_booking = queries.get_bookings_by_user(conn, booking["user_id"])
-
-        booking_row = next(
-            (b for b in full_booking if b["booking_code"] == booking_code),
-            None,
-        )
-
-        if not booking_row:
+        # unlinked older bookings fall back to their matching leg; only a
+        # booking whose leg was deleted has no departure to refund against
+        if not booking["departure_date"]:
             raise ValueError("Schedule details not found")
 
         # ---------------------------------------
         # Calculate departure datetime
         # ---------------------------------------
         departure_str = (
-            f"{booking_row['departure_date']} "
-            f"{booking_row['departure_time']}"
+            f"{booking['departure_date']} "
+            f"{booking['departure_time']}"
         )
 
         departure_dt = datetime.strptime(
@@ -254,7 +467,7 @@ def cancel_booking_by_code(booking_code: str) -> dict:
         time_diff = departure_dt - now
         hours_remaining = time_diff.total_seconds() / 3600
 
-        original_amount = booking_row["fare"]
+        original_amount = booking["fare"]
 
         # ---------------------------------------
         # Refund Logic
@@ -270,7 +483,19 @@ def cancel_booking_by_code(booking_code: str) -> dict:
         # Update booking + payment
         # ---------------------------------------
         queries.cancel_booking(conn, booking_code)
-        queries.refund_payment_by_booking_id(conn, booking_id)
+        if booking["group_code"]:
+            # a group shares one payment, held by its lead ticket: each
+            # ticket's refund is recorded against it, and it is marked
+            # refunded with the last ticket
+            lead = queries.get_booking_by_code(conn, booking["group_code"])
+            queries.refund_payment_by_booking_id(
+                conn,
+                lead["id"],
+                refund_amount,
+                final=not queries.count_confirmed_in_group(conn, booking["group_code"]),
+            )
+        else:
+            queries.refund_payment_by_booking_id(conn, booking["id"], refund_amount)
 
         return {
             "original_amount": original_amount,
@@ -279,5 +504,50 @@ def cancel_booking_by_code(booking_code: str) -> dict:
             "hours_remaining": round(hours_remaining, 2),
         }
 
-    finally:
-        connection.close_connection(conn)
+
+def cancel_train_run(train_id: int, travel_date: str) -> dict:
+    """
+    Cancel every confirmed booking on the run(s) of a train that start on
+    `travel_date`, and refund their payments in full (the railway cancelled,
+    so no deduction applies).
+
+    Set-based: a handful of statements in one write transaction, however
+    many bookings the run has. Returns a summary:
+
+        {"train_id", "travel_date", "schedule_ids", "bookings_cancelled",
+         "users_affected", "payments_refunded", "refund_amount"}
+    """
+    try:
+        datetime.strptime(travel_date, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise ValueError("travel_date must be YYYY-MM-DD")
+
+    with connection.connect() as conn:
+        if not queries.get_train_by_id(conn, train_id):
+            raise ValueError("Train does not exist")
+
+        schedule_ids = [
+            schedule_id
+            for run in inventory.load_runs(conn, train_id, travel_date)
+            if run.legs[0]["departure_date"] == travel_date
+            for schedule_id in run.schedule_ids
+        ]
+        if not schedule_ids:
+            raise ValueError("Train does not run on that date")
+
+        conn.execute("BEGIN IMMEDIATE")
+        affected = queries.summarize_run_bookings(conn, train_id, travel_date, schedule_ids)
+        payments, amount = queries.refund_run_payments(
+            conn, train_id, travel_date, schedule_ids
+        )
+        cancelled = queries.cancel_run_bookings(conn, train_id, travel_date, schedule_ids)
+
+    return {
+        "train_id": train_id,
+        "travel_date": travel_date,
+        "schedule_ids": schedule_ids,
+        "bookings_cancelled": cancelled,
+        "users_affected": affected["users"],
+        "payments_refunded": payments,
+        "refund_amount": round(amount, 2),
+    }
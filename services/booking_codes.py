@@ -0,0 +1,114 @@
+"""Collision-free booking codes.
+
+A code is ``BK`` + the UTC booking date (``YYYYMMDD``) + 12 base-36
+characters packing, Snowflake-style:
+
+    millisecond of the day (27 bits) | worker id (22 bits) | sequence (10 bits)
+
+Each worker mints up to 1024 codes per millisecond from its own counter and
+waits for the next millisecond if it runs out, so codes never repeat within
+a worker and two workers can never produce the same code. No database round
+trip or retry is needed.
+
+The worker id is the process id (which fits in 22 bits on Linux and is
+unique among running processes on a host) unless `BOOKING_WORKER_ID` is
+set, e.g. to give each host of a multi-host deployment its own range.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+WORKER_BITS = 22
+SEQUENCE_BITS = 10
+MS_OF_DAY_BITS = 27  # 86_400_000 < 2**27
+
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+_MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+SUFFIX_LENGTH = 12  # 36**12 > 2**59
+_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _base36(value: int, width: int) -> str:
+    chars = []
+    while value:
+        value, digit = divmod(value, 36)
+        chars.append(_DIGITS[digit])
+    return "".join(reversed(chars)).rjust(width, "0")
+
+
+def _default_worker_id() -> int:
+    configured = os.environ.get("BOOKING_WORKER_ID")
+    if configured:
+        return int(configured)
+    return os.getpid() & MAX_WORKER_ID
+
+
+class BookingCodeGenerator:
+    """Thread-safe generator of unique booking codes for one worker."""
+
+    def __init__(self, worker_id: int, clock=time.time):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+
+    def _now_ms(self) -> int:
+        return int(self._clock() * 1000)
+
+    def next_code(self) -> str:
+        with self._lock:
+            # never step backwards, even if the wall clock does
+            now = max(self._now_ms(), self._last_ms)
+            if now == self._last_ms:
+                self._sequence += 1
+                if self._sequence > _MAX_SEQUENCE:
+                    while now <= self._last_ms:
+                        now = self._now_ms()
+                    self._sequence = 0
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            sequence = self._sequence
+
+        # UTC days have no repeated hours, so the time part never repeats
+        day = datetime.fromtimestamp(now // 1000, timezone.utc)
+        ms_of_day = now % 86_400_000
+
+        value = (ms_of_day << (WORKER_BITS + SEQUENCE_BITS)) | (
+            self.worker_id << SEQUENCE_BITS
+        ) | sequence
+        return f"BK{day:%Y%m%d}{_base36(value, SUFFIX_LENGTH)}"
+
+
+_generator: BookingCodeGenerator | None = None
+_generator_lock = threading.Lock()
+
+
+def next_code() -> str:
+    """Mint a booking code from this process's generator."""
+    global _generator
+    generator = _generator
+    if generator is None:
+        with _generator_lock:
+            if _generator is None:
+                _generator = BookingCodeGenerator(_default_worker_id())
+            generator = _generator
+    return generator.next_code()
+
+
+def _reset_after_fork() -> None:
+    # a forked child has a new pid, so it needs its own worker id
+    global _generator
+    _generator = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
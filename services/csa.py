@@ -0,0 +1,273 @@
+"""Connection Scan Algorithm (CSA) router for earliest-arrival queries.
+
+Every schedule leg is a *connection* (departure station and time, arrival
+station and time, trip). Connections are stored once in contiguous
+`array` columns sorted by departure, and a query is a single forward scan
+from the requested departure time: a connection is usable if its trip was
+already boarded or its departure station was reached early enough to
+change trains. The scan stops as soon as departures pass the best arrival
+found at the destination.
+
+Times are minutes since 0001-01-01, so legs arriving on a later date than
+they depart (overnight legs) need no special handling.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from array import array
+from bisect import bisect_left
+from datetime import date
+
+from services import service_pattern, timetable
+from services.journey import (
+    MAX_JOURNEY_DAYS,
+    MIN_CONNECTION_MINUTES,
+    _minutes,
+    build_itinerary,
+    same_train_continuations,
+)
+
+_UNREACHED = 2**62
+
+
+class ConnectionScan:
+    """Sorted connection arrays over a fixed set of schedule legs."""
+
+    __slots__ = (
+        "legs",
+        "dep",
+        "arr",
+        "origin",
+        "dest",
+        "trip",
+        "next_same_train",
+        "station_index",
+        "trip_count",
+    )
+
+    def __init__(self, schedules):
+        legs = sorted(
+            schedules,
+            key=lambda s: (s["departure_date"], s["departure_time"], s["id"]),
+        )
+        self.legs = legs
+
+        dep = [_minutes(s["departure_date"], s["departure_time"]) for s in legs]
+        arr = [_minutes(s["arrival_date"], s["arrival_time"]) for s in legs]
+        origin = [s["origin_station_id"] for s in legs]
+        dest = [s["destination_station_id"] for s in legs]
+        following = same_train_continuations(
+            [s["train_id"] for s in legs], origin, dest, dep, arr
+        )
+
+        # dense station numbers so per-query state is a flat array
+        self.station_index: dict[int, int] = {}
+        for station in origin + dest:
+            self.station_index.setdefault(station, len(self.station_index))
+
+        # a trip is one train's chain of legs; legs come in departure order,
+        # so a leg is always numbered before the one it continues into
+        trip = [-1] * len(legs)
+        trips = 0
+        for i, j in enumerate(following):
+            if trip[i] == -1:
+                trip[i] = trips
+                trips += 1
+            if j != -1 and trip[j] == -1:
+                trip[j] = trip[i]
+            elif j != -1:
+                following[i] = -1  # j already continues another leg
+        self.trip_count = trips
+
+        self.dep = array("q", dep)
+        self.arr = array("q", arr)
+        self.origin = array("q", (self.station_index[s] for s in origin))
+        self.dest = array("q", (self.station_index[s] for s in dest))
+        self.trip = array("q", trip)
+        self.next_same_train = array("q", following)
+
+    def _scan(self, origin: int, destination: int, depart_after: int, min_connection: int):
+        """
+        Scan connections departing from `depart_after` onwards. Returns the
+        per-station `(reached_by, boarded_at)` connection arrays, or None if
+        `destination` is unreachable within MAX_JOURNEY_DAYS.
+        """
+        n_stations = len(self.station_index)
+        earliest = array("q", [_UNREACHED]) * n_stations
+        reached_by = array("q", [-1]) * n_stations
+        boarded_at = array("q", [-1]) * n_stations
+        trip_boarded = array("q", [-1]) * self.trip_count
+
+        # no connection time is needed to board at the origin
+        earliest[origin] = depart_after - min_connection
+        horizon = depart_after + MAX_JOURNEY_DAYS * 1440
+
+        dep, arr, trip = self.dep, self.arr, self.trip
+        orig, dest = self.origin, self.dest
+
+        for c in range(bisect_left(dep, depart_after), len(dep)):
+            departs = dep[c]
+            if departs >= earliest[destination] or departs > horizon:
+                break
+
+            t = trip[c]
+            entered = trip_boarded[t]
+            if entered == -1:
+                if earliest[orig[c]] + min_connection > departs:
+                    continue
+                entered = trip_boarded[t] = c
+
+            station = dest[c]
+            if arr[c] < earliest[station]:
+                earliest[station] = arr[c]
+                reached_by[station] = c
+                boarded_at[station] = entered
+
+        if reached_by[destination] == -1:
+            return None
+        return reached_by, boarded_at
+
+    def _path(self, origin, destination, reached_by, boarded_at) -> list[int]:
+        """Connection indices ridden, walking back from the destination."""
+        rides = []
+        station = destination
+        while station != origin:
+            exit_c, enter_c = reached_by[station], boarded_at[station]
+            ride = [enter_c]
+            while ride[-1] != exit_c:
+                ride.append(self.next_same_train[ride[-1]])
+            rides.append(ride)
+            station = self.origin[enter_c]
+        return [c for ride in reversed(rides) for c in ride]
+
+    def earliest_arrival(
+        self,
+        origin_station_id: int,
+        destination_station_id: int,
+        depart_after: int,
+        *,
+        min_connection: int = MIN_CONNECTION_MINUTES,
+    ) -> dict | None:
+        """
+        Earliest-arrival itinerary leaving `origin_station_id` at or after
+        `depart_after` (minutes, see `_minutes`), or None.
+        """
+        origin = self.station_index.get(origin_station_id)
+        destination = self.station_index.get(destination_station_id)
+        if origin is None or destination is None or origin == destination:
+            return None
+
+        found = self._scan(origin, destination, depart_after, min_connection)
+        if found is None:
+            return None
+
+        path = self._path(origin, destination, *found)
+        return build_itinerary(self.legs, self.next_same_train, path)
+
+
+_router_lock = threading.Lock()
+_router: tuple | None = None  # ((id(index), version), ConnectionScan)
+_rebuild: threading.Thread | None = None
+
+
+def _build_router(index) -> ConnectionScan:
+    """Build a router over the active trains in `index` and install it,
+    unless a newer one was installed meanwhile."""
+    global _router
+
+    # patches hold the index lock, so the rows match the version
+    with index.lock:
+        stamp = (id(index), index.version)
+        rows = list(index.by_id.values())
+    router = ConnectionScan(row for row in rows if row.train_status == "active")
+    with _router_lock:
+        if _router is None or _router[0][0] != stamp[0] or _router[0][1] < stamp[1]:
+            _router = (stamp, router)
+    return router
+
+
+def _rebuild_in_background(index) -> None:
+    global _rebuild
+    try:
+        _build_router(index)
+    finally:
+        with _router_lock:
+            _rebuild = None
+
+
+def _current_router() -> ConnectionScan:
+    """A router over the active trains in the in-memory timetable.
+
+    The first query on a timetable builds the router. After a patch the
+    previous router keeps answering while a background thread rebuilds
+    it, so no query waits out a rebuild after an edit; queries may miss
+    edits made during the last rebuild. Bookings are checked against the
+    database, so a stale route is never booked.
+    """
+    global _rebuild
+
+    index = timetable.get_index()
+    stamp = (id(index), index.version)
+    with _router_lock:
+        current = _router
+        if current is not None and current[0] == stamp:
+            return current[1]
+        if current is not None and current[0][0] == stamp[0]:
+            if _rebuild is None:
+                _rebuild = threading.Thread(
+                    target=_rebuild_in_background,
+                    args=(index,),
+                    name="csa-rebuild",
+                    daemon=True,
+                )
+                _rebuild.start()
+            return current[1]
+
+    return _build_router(index)
+
+
+def _reset_after_fork() -> None:
+    # the rebuild thread does not survive a fork
+    global _rebuild
+    _rebuild = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def earliest_arrival(
+    origin_station_id: int,
+    destination_station_id: int,
+    travel_date: str,
+    *,
+    depart_after: str = "00:00",
+    min_connection: int = MIN_CONNECTION_MINUTES,
+) -> dict | None:
+    """
+    Earliest arrival at `destination_station_id` leaving
+    `origin_station_id` on or after `travel_date` `depart_after`.
+
+    Returns an itinerary dict (see `services.journey.plan_journeys`) or None
+    if the destination cannot be reached within MAX_JOURNEY_DAYS.
+    """
+    try:
+        date.fromisoformat(travel_date)
+        start = _minutes(travel_date, depart_after)
+    except Exception:
+        raise ValueError("travel_date must be YYYY-MM-DD and depart_after HH:MM")
+
+    if origin_station_id == destination_station_id:
+        raise ValueError("Origin and destination cannot be same")
+    if min_connection < 0:
+        raise ValueError("min_connection cannot be negative")
+
+    service_pattern.ensure_horizon()
+    return _current_router().earliest_arrival(
+        origin_station_id,
+        destination_station_id,
+        start,
+        min_connection=min_connection,
+    )
@@ -0,0 +1,327 @@
+"""Seat inventory: coach layouts per train and seat allocation per journey.
+
+A train *run* is the chain of `schedules` legs one train covers in a single
+trip (train 1: Indore → Rewa → Bhopal → Delhi → Agra is four legs). Each seat
+on a run is tracked as a bitset over leg indices, so "is seat 12 free from
+Rewa to Delhi" is `mask & journey_mask == 0`, and the same seat can be sold
+to journeys that do not overlap.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from database import connection, queries
+from services import timetable
+
+
+SEAT_CLASSES = ("sleeper", "3ac", "2ac", "1ac", "chair")
+
+# (coach_code, seat_class, seat_count) given to every new train
+DEFAULT_COACH_LAYOUT = (
+    ("S1", "sleeper", 72),
+    ("S2", "sleeper", 72),
+    ("B1", "3ac", 64),
+    ("A1", "2ac", 48),
+)
+
+
+def validate_layout(layout) -> list[tuple[str, str, int]]:
+    """Return `layout` as a list of tuples, raising ValueError if invalid."""
+    rows = []
+    codes = set()
+    for coach_code, seat_class, seat_count in layout:
+        if not coach_code:
+            raise ValueError("coach code is required")
+        if coach_code in codes:
+            raise ValueError(f"duplicate coach code {coach_code}")
+        if seat_class not in SEAT_CLASSES:
+            raise ValueError(f"seat class must be one of {', '.join(SEAT_CLASSES)}")
+        if not isinstance(seat_count, int) or seat_count < 1:
+            raise ValueError("seat count must be a positive integer")
+        codes.add(coach_code)
+        rows.append((coach_code, seat_class, seat_count))
+    if not rows:
+        raise ValueError("a train needs at least one coach")
+    return rows
+
+
+def configure_coaches(train_id: int, layout) -> None:
+    """Add coaches to a train that has none yet."""
+    rows = validate_layout(layout)
+
+    with connection.connect() as conn:
+        if not queries.get_train_by_id(conn, train_id):
+            raise ValueError("Train does not exist")
+        if queries.get_coaches_by_train(conn, train_id):
+            raise ValueError("Train already has coaches")
+
+        queries.create_coaches(conn, train_id, rows)
+
+
+# legs of one run are chained if the next leg leaves the previous leg's
+# destination within this long of arriving there
+MAX_LAYOVER = timedelta(hours=12)
+
+# how many days either side of a travel date to look for the rest of a run
+MAX_RUN_DAYS = 3
+
+
+def _departure(leg) -> datetime:
+    return datetime.strptime(
+        f"{leg['departure_date']} {leg['departure_time']}", "%Y-%m-%d %H:%M"
+    )
+
+
+def _arrival(leg) -> datetime:
+    return datetime.strptime(
+        f"{leg['arrival_date']} {leg['arrival_time']}", "%Y-%m-%d %H:%M"
+    )
+
+
+class TrainRun:
+    """The ordered legs of one trip of a train."""
+
+    __slots__ = ("train_id", "legs", "index")
+
+    def __init__(self, train_id: int, legs: list):
+        self.train_id = train_id
+        self.legs = legs
+        self.index = {leg["id"]: i for i, leg in enumerate(legs)}
+
+    @property
+    def schedule_ids(self) -> list[int]:
+        return [leg["id"] for leg in self.legs]
+
+    @staticmethod
+    def span_mask(first: int, last: int) -> int:
+        """Bitmask covering leg indices `first`..`last` inclusive."""
+        return ((1 << (last - first + 1)) - 1) << first
+
+    def find_span(self, origin_station_id, destination_station_id, travel_date):
+        """Return `(first, last)` leg indices for a journey on this run, or None."""
+        for first, leg in enumerate(self.legs):
+            if (
+                leg["origin_station_id"] != origin_station_id
+                or leg["departure_date"] != travel_date
+            ):
+                continue
+            for last in range(first, len(self.legs)):
+                if self.legs[last]["destination_station_id"] == destination_station_id:
+                    return first, last
+        return None
+
+
+def build_runs(legs) -> list[TrainRun]:
+    """Group one train's legs into runs by chaining station and time."""
+    runs: list[TrainRun] = []
+    chains: list[list] = []
+
+    for leg in sorted(legs, key=_departure):
+        departs = _departure(leg)
+        best = None
+        for chain in chains:
+            tail = chain[-1]
+            arrived = _arrival(tail)
+            if (
+                tail["destination_station_id"] == leg["origin_station_id"]
+                and arrived <= departs <= arrived + MAX_LAYOVER
+                and (best is None or arrived > _arrival(best[-1]))
+            ):
+                best = chain
+        if best is None:
+            chains.append([leg])
+        else:
+            best.append(leg)
+
+    for chain in chains:
+        runs.append(TrainRun(chain[0]["train_id"], chain))
+    return runs
+
+
+def load_runs(conn, train_id: int, travel_date: str) -> list[TrainRun]:
+    """Return the runs of a train that touch `travel_date`."""
+    day = datetime.strptime(travel_date, "%Y-%m-%d")
+    legs = timetable.get_index(conn).train_legs_between(
+        train_id,
+        (day - timedelta(days=MAX_RUN_DAYS)).strftime("%Y-%m-%d"),
+        (day + timedelta(days=MAX_RUN_DAYS)).strftime("%Y-%m-%d"),
+    )
+    return build_runs(legs)
+
+
+def find_journey(conn, train_id, origin_station_id, destination_station_id, travel_date):
+    """
+    Find a journey on one train, possibly spanning several legs.
+
+    Returns `(run, first, last)` or None if the train does not run from
+    origin on `travel_date` to destination.
+    """
+    for run in load_runs(conn, train_id, travel_date):
+        span = run.find_span(origin_station_id, destination_station_id, travel_date)
+        if span:
+            return run, span[0], span[1]
+    return None
+
+
+def run_for_schedule(conn, schedule) -> TrainRun:
+    """Return the run that contains a schedule row."""
+    for run in load_runs(conn, schedule["train_id"], schedule["departure_date"]):
+        if schedule["id"] in run.index:
+            return run
+    return TrainRun(schedule["train_id"], [schedule])
+
+
+class SeatMap:
+    """Per-seat leg bitsets for every coach on one run."""
+
+    __slots__ = ("coaches", "masks")
+
+    def __init__(self, coaches):
+        self.coaches = list(coaches)
+        self.masks = {c["id"]: [0] * c["seat_count"] for c in self.coaches}
+
+    def occupy(self, coach_id: int, seat_number: int, mask: int) -> None:
+        seats = self.masks.get(coach_id)
+        if seats is not None and 1 <= seat_number <= len(seats):
+            seats[seat_number - 1] |= mask
+
+    def find_free_seats(self, mask: int, count: int, seat_class: str | None = None) -> list:
+        """Return up to `count` `(coach, seat_number)` pairs free over `mask`,
+        filling coaches in order so a group sits together where possible."""
+        found = []
+        for coach in self.coaches:
+            if seat_class is not None and coach["seat_class"] != seat_class:
+                continue
+            for number, held in enumerate(self.masks[coach["id"]], start=1):
+                if not held & mask:
+                    found.append((coach, number))
+                    if len(found) == count:
+                        return found
+        return found
+
+    def free_counts(self, mask: int) -> dict[str, int]:
+        """Free seats per seat class over `mask`."""
+        free: dict[str, int] = {}
+        for coach in self.coaches:
+            count = sum(1 for held in self.masks[coach["id"]] if not held & mask)
+            free[coach["seat_class"]] = free.get(coach["seat_class"], 0) + count
+        return free
+
+
+def load_seat_map(conn, run: TrainRun) -> SeatMap:
+    """Build the seat bitsets for a run from its confirmed bookings."""
+    seat_map = SeatMap(queries.get_coaches_by_train(conn, run.train_id))
+    for row in queries.get_seat_bookings(conn, run.schedule_ids):
+        first = run.index.get(row["schedule_id"])
+        if first is None:
+            continue
+        last = run.index.get(row["end_schedule_id"] or row["schedule_id"], first)
+        seat_map.occupy(row["coach_id"], row["seat_number"], run.span_mask(first, last))
+    return seat_map
+
+
+def allocate_seat(conn, run: TrainRun, first: int, last: int, seat_class: str | None = None) -> dict:
+    """
+    Pick the first seat free on legs `first`..`last` of a run, optionally
+    within a seat class.
+
+    Must run inside the caller's write transaction (`BEGIN IMMEDIATE`) so the
+    seat cannot be taken between this read and the booking insert. Returns
+    `{"coach_id", "coach_code", "seat_class", "seat_number"}`.
+    Raises ValueError when no seat is left.
+    """
+    return allocate_seats(conn, run, first, last, 1, seat_class)[0]
+
+
+def allocate_seats(
+    conn,
+    run: TrainRun,
+    first: int,
+    last: int,
+    count: int,
+    seat_class: str | None = None,
+) -> list[dict]:
+    """
+    Like `allocate_seat`, for `count` seats at once (all or none).
+
+    Raises ValueError if fewer than `count` seats are free.
+    """
+    if seat_class is not None and seat_class not in SEAT_CLASSES:
+        raise ValueError(f"seat class must be one of {', '.join(SEAT_CLASSES)}")
+
+    seat_map = load_seat_map(conn, run)
+    if not any(seat_class in (None, c["seat_class"]) for c in seat_map.coaches):
+        raise ValueError("No seats configured for this train")
+
+    found = seat_map.find_free_seats(run.span_mask(first, last), count, seat_class)
+    if not found:
+        raise ValueError("No seats available on this train")
+    if len(found) < count:
+        raise ValueError(f"Only {len(found)} seats available on this train")
+
+    return [
+        {
+            "coach_id": coach["id"],
+            "coach_code": coach["coach_code"],
+            "seat_class": coach["seat_class"],
+            "seat_number": seat_number,
+        }
+        for coach, seat_number in found
+    ]
+
+
+def schedule_has_riders(conn, schedule) -> bool:
+    """True if any confirmed booking's journey covers this schedule leg."""
+    run = run_for_schedule(conn, schedule)
+    leg_bit = 1 << run.index[schedule["id"]]
+    for row in queries.get_seat_bookings(conn, run.schedule_ids):
+        first = run.index.get(row["schedule_id"])
+        if first is None:
+            continue
+        last = run.index.get(row["end_schedule_id"] or row["schedule_id"], first)
+        if run.span_mask(first, last) & leg_bit:
+            return True
+    return False
+
+
+def get_seat_availability(schedule_id: int) -> dict:
+    """Return free seat counts per seat class on one schedule leg."""
+    with connection.connect() as conn:
+        schedule = queries.get_schedule_by_id(conn, schedule_id)
+        if not schedule:
+            raise ValueError("Schedule does not exist")
+
+        run = run_for_schedule(conn, schedule)
+        seat_map = load_seat_map(conn, run)
+        return seat_map.free_counts(1 << run.index[schedule_id])
+
+
+def annotate_availability(conn, schedules) -> list[dict]:
+    """
+    Return `schedules` rows as dicts with `seats_by_class` and
+    `available_seats` added.
+
+    Builds one seat map per run, however many legs of it are listed.
+    """
+    runs: dict[int, TrainRun] = {}
+    maps: dict[int, SeatMap] = {}
+    results = []
+
+    for row in schedules:
+        run = runs.get(row["id"])
+        if run is None:
+            run = run_for_schedule(conn, row)
+            for schedule_id in run.index:
+                runs[schedule_id] = run
+        key = id(run)
+        if key not in maps:
+            maps[key] = load_seat_map(conn, run)
+
+        free = maps[key].free_counts(1 << run.index[row["id"]])
+        item = dict(row)
+        item["seats_by_class"] = free
+        item["available_seats"] = sum(free.values())
+        results.append(item)
+
+    return results
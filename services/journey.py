@@ -0,0 +1,354 @@
+"""Journey planner: connecting itineraries over the schedule graph.
+
+The timetable is treated as a time-expanded graph whose nodes are leg
+departures. From a departure you can ride the leg; on arrival you can stay
+on the same train (its next leg from that station) or, after at least the
+minimum connection time, board any later departure at that station. Waiting
+at a station is an edge from one departure to the next one there.
+
+Earliest-arrival and cheapest itineraries are found with Dijkstra over that
+graph; the graph is built once from a set of schedule rows and can answer
+many queries.
+"""
+
+from __future__ import annotations
+
+import heapq
+import threading
+from bisect import bisect_left
+from datetime import date, timedelta
+
+from services import service_pattern, timetable
+from services.inventory import MAX_LAYOVER
+
+MIN_CONNECTION_MINUTES = 30
+
+# longest journey the planner considers, counted from the travel date
+MAX_JOURNEY_DAYS = 2
+
+# the cheapest itinerary may arrive at most this long after the earliest one
+CHEAPEST_MAX_DELAY_MINUTES = 6 * 60
+
+_MAX_LAYOVER_MINUTES = int(MAX_LAYOVER.total_seconds() // 60)
+
+# planners for recent travel dates, rebuilt when the timetable changes
+PLANNER_CACHE_SIZE = 8
+
+_planners_lock = threading.Lock()
+_planners: dict[str, tuple] = {}
+
+
+def _minutes(day: str, hhmm: str) -> int:
+    """Minutes since 0001-01-01 for a YYYY-MM-DD date and HH:MM time."""
+    hours, minutes = hhmm.split(":")
+    return date.fromisoformat(day).toordinal() * 1440 + int(hours) * 60 + int(minutes)
+
+
+def same_train_continuations(train, origin, dest, dep, arr) -> list[int]:
+    """
+    For legs given as parallel sequences (sorted by departure), return the
+    index of the leg the same train continues with after each one arrives,
+    or -1.
+    """
+    by_train_station: dict[tuple[int, int], list[int]] = {}
+    for i in range(len(train)):
+        by_train_station.setdefault((train[i], origin[i]), []).append(i)
+
+    following = [-1] * len(train)
+    for i in range(len(train)):
+        for j in by_train_station.get((train[i], dest[i]), ()):
+            if arr[i] <= dep[j] <= arr[i] + _MAX_LAYOVER_MINUTES:
+                following[i] = j
+                break
+    return following
+
+
+def build_itinerary(legs, next_same_train, path: list[int]) -> dict:
+    """Turn the leg indices ridden into an itinerary, merging consecutive
+    legs of one train into a single ride."""
+    rides = []
+    prev = -1
+    for leg in path:
+        row = legs[leg]
+        if prev != -1 and next_same_train[prev] == leg:
+            ride = rides[-1]
+            ride["destination_station_id"] = row["destination_station_id"]
+            ride["arrival_date"] = row["arrival_date"]
+            ride["arrival_time"] = row["arrival_time"]
+            ride["fare"] += float(row["fare"])
+            ride["schedule_ids"].append(row["id"])
+        else:
+            rides.append(
+                {
+                    "train_id": row["train_id"],
+                    "train_number": row["train_number"],
+                    "train_name": row["train_name"],
+                    "origin_station_id": row["origin_station_id"],
+                    "destination_station_id": row["destination_station_id"],
+                    "departure_date": row["departure_date"],
+                    "departure_time": row["departure_time"],
+                    "arrival_date": row["arrival_date"],
+                    "arrival_time": row["arrival_time"],
+                    "fare": float(row["fare"]),
+                    "schedule_ids": [row["id"]],
+                }
+            )
+        prev = leg
+
+    first, last = rides[0], rides[-1]
+    return {
+        "rides": rides,
+        "transfers": len(rides) - 1,
+        "departure_date": first["departure_date"],
+        "departure_time": first["departure_time"],
+        "arrival_date": last["arrival_date"],
+        "arrival_time": last["arrival_time"],
+        "duration_minutes": _minutes(last["arrival_date"], last["arrival_time"])
+        - _minutes(first["departure_date"], first["departure_time"]),
+        "fare": round(sum(ride["fare"] for ride in rides), 2),
+    }
+
+
+class JourneyPlanner:
+    """Time-expanded graph over a fixed set of schedule legs."""
+
+    __slots__ = (
+        "legs",
+        "dep",
+        "arr",
+        "origin",
+        "dest",
+        "train",
+        "fare",
+        "next_same_train",
+        "station_deps",
+        "station_times",
+        "station_pos",
+    )
+
+    def __init__(self, schedules):
+        legs = sorted(
+            schedules,
+            key=lambda s: (s["departure_date"], s["departure_time"], s["id"]),
+        )
+        self.legs = legs
+        self.dep = [_minutes(s["departure_date"], s["departure_time"]) for s in legs]
+        self.arr = [_minutes(s["arrival_date"], s["arrival_time"]) for s in legs]
+        self.origin = [s["origin_station_id"] for s in legs]
+        self.dest = [s["destination_station_id"] for s in legs]
+        self.train = [s["train_id"] for s in legs]
+        self.fare = [float(s["fare"]) for s in legs]
+
+        # departures per station, in time order (legs are already sorted)
+        self.station_deps: dict[int, list[int]] = {}
+        self.station_pos = [0] * len(legs)
+        for i, station in enumerate(self.origin):
+            deps = self.station_deps.setdefault(station, [])
+            self.station_pos[i] = len(deps)
+            deps.append(i)
+        self.station_times = {
+            station: [self.dep[i] for i in deps]
+            for station, deps in self.station_deps.items()
+        }
+
+        self.next_same_train = same_train_continuations(
+            self.train, self.origin, self.dest, self.dep, self.arr
+        )
+
+    def _first_departure(self, station: int, not_before: int) -> int:
+        """Index into `station_deps[station]` of the first departure >= not_before."""
+        return bisect_left(self.station_times.get(station, ()), not_before)
+
+    def _search(self, origin, destination, start, end, min_connection, cheapest, deadline=None):
+        """
+        Dijkstra from `origin` (departing in [start, end)) to `destination`.
+
+        A node is a leg departure, either boarded from the platform or stayed
+        on from the train's previous leg (`node = leg * 2 + seated`); only
+        platform nodes may wait for a later departure, so staying seated can
+        never be used to skip the connection time. Riding a leg queues an
+        arrival at its destination station. Keys are time-first for earliest
+        arrival and fare-first for cheapest, so an arrival that is no better
+        on the other measure than one already settled at that station cannot
+        lead anywhere new by changing trains. Nothing departing or arriving
+        after `deadline` (minutes) is used. Returns the leg indices ridden,
+        or None.
+        """
+        deps = self.station_deps.get(origin)
+        if not deps or origin == destination:
+            return None
+
+        heap = []
+        best: dict[int, tuple] = {}
+        parent: dict[int, int] = {}
+        settled: dict[int, float] = {}  # station -> best secondary measure on arrival
+
+        def key_for(fare, minutes):
+            return (fare, minutes) if cheapest else (minutes, fare)
+
+        def push(node, fare, prev):
+            minutes = self.dep[node >> 1]
+            if deadline is not None and minutes > deadline:
+                return
+            key = key_for(fare, minutes)
+            if node not in best or key < best[node]:
+                best[node] = key
+                parent[node] = prev
+                heapq.heappush(heap, (key, node, False))
+
+        for pos in range(self._first_departure(origin, start), len(deps)):
+            leg = deps[pos]
+            if self.dep[leg] >= end:
+                break
+            push(leg * 2, 0.0, -1)
+
+        done = set()
+        while heap:
+            key, node, arrived = heapq.heappop(heap)
+            leg = node >> 1
+
+            if arrived:
+                station = self.dest[leg]
+                if station == destination:
+                    # the first arrival popped at the destination is optimal
+                    path = []
+                    while node != -1:
+                        path.append(node >> 1)
+                        node = parent[node]
+                    return path[::-1]
+
+                fare, arrival = key if cheapest else key[::-1]
+
+                # stay on the same train
+                nxt = self.next_same_train[leg]
+                if nxt != -1:
+                    push(nxt * 2 + 1, fare, node)
+
+                # change trains: the first departure after the connection
+                # time (later ones are reached by waiting)
+                if settled.get(station, float("inf")) <= key[1]:
+                    continue
+                settled[station] = key[1]
+                station_legs = self.station_deps.get(station)
+                if station_legs:
+                    pos = self._first_departure(station, arrival + min_connection)
+                    if pos < len(station_legs):
+                        push(station_legs[pos] * 2, fare, node)
+                continue
+
+            if node in done or best.get(node) != key:
+                continue
+            done.add(node)
+            fare_before = key[0] if cheapest else key[1]
+
+            # wait on the platform for the next departure from here
+            if not node & 1:
+                siblings = self.station_deps[self.origin[leg]]
+                pos = self.station_pos[leg] + 1
+                if pos < len(siblings):
+                    push(siblings[pos] * 2, fare_before, parent[node])
+
+            # ride the leg
+            arrival = self.arr[leg]
+            if deadline is None or arrival <= deadline:
+                fare = fare_before + self.fare[leg]
+                heapq.heappush(heap, (key_for(fare, arrival), node, True))
+
+        return None
+
+    def plan(
+        self,
+        origin_station_id: int,
+        destination_station_id: int,
+        travel_date: str,
+        *,
+        earliest_time: str = "00:00",
+        min_connection: int = MIN_CONNECTION_MINUTES,
+        max_delay: int | None = CHEAPEST_MAX_DELAY_MINUTES,
+    ) -> dict:
+        """
+        Return `{"earliest": itinerary | None, "cheapest": itinerary | None}`
+        for journeys leaving `origin_station_id` on `travel_date` at or after
+        `earliest_time`.
+
+        The cheapest itinerary is searched among those arriving within
+        `max_delay` minutes of the earliest arrival (None for no limit),
+        which keeps the fare-first search from wandering the whole timetable.
+        """
+        start = _minutes(travel_date, earliest_time)
+        end = _minutes(travel_date, "00:00") + 1440
+        search = (origin_station_id, destination_station_id, start, end, min_connection)
+
+        fastest = self._search(*search, cheapest=False)
+        if not fastest:
+            return {"earliest": None, "cheapest": None}
+
+        deadline = None if max_delay is None else self.arr[fastest[-1]] + max_delay
+        cheapest = self._search(*search, cheapest=True, deadline=deadline)
+        return {
+            "earliest": build_itinerary(self.legs, self.next_same_train, fastest),
+            "cheapest": build_itinerary(self.legs, self.next_same_train, cheapest or fastest),
+        }
+
+
+def _planner_for(day: date) -> JourneyPlanner:
+    """The planner for journeys starting on `day`, built from the in-memory
+    timetable and reused until the timetable is patched."""
+    index = timetable.get_index()
+    key = day.isoformat()
+    stamp = (id(index), index.version)
+
+    with _planners_lock:
+        cached = _planners.get(key)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+    legs = index.active_between(
+        key, (day + timedelta(days=MAX_JOURNEY_DAYS)).isoformat()
+    )
+    planner = JourneyPlanner(legs)
+
+    with _planners_lock:
+        if len(_planners) >= PLANNER_CACHE_SIZE:
+            _planners.pop(next(iter(_planners)))
+        _planners[key] = (stamp, planner)
+    return planner
+
+
+def plan_journeys(
+    origin_station_id: int,
+    destination_station_id: int,
+    travel_date: str,
+    *,
+    earliest_time: str = "00:00",
+    min_connection: int = MIN_CONNECTION_MINUTES,
+    max_delay: int | None = CHEAPEST_MAX_DELAY_MINUTES,
+) -> dict:
+    """
+    Plan journeys between two stations, including same-train continuation
+    and changes of train.
+
+    Returns `{"earliest": ..., "cheapest": ...}`; each is None when no
+    itinerary exists or an itinerary dict with `rides`, `transfers`,
+    departure/arrival, `duration_minutes` and `fare`.
+    """
+    try:
+        day = date.fromisoformat(travel_date)
+    except Exception:
+        raise ValueError("travel_date must be YYYY-MM-DD")
+
+    if origin_station_id == destination_station_id:
+        raise ValueError("Origin and destination cannot be same")
+    if min_connection < 0:
+        raise ValueError("min_connection cannot be negative")
+
+    service_pattern.ensure_horizon()
+    planner = _planner_for(day)
+    return planner.plan(
+        origin_station_id,
+        destination_station_id,
+        travel_date,
+        earliest_time=earliest_time,
+        min_connection=min_connection,
+        max_delay=max_delay,
+    )
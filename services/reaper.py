@@ -0,0 +1,176 @@
+"""Background cleanup of expired rows, off the request path.
+
+A `Reaper` works through a fixed list of tasks:
+
+- sessions: delete sessions past `expires_at`;
+- payments: mark payments still pending after PENDING_PAYMENT_TTL as
+  failed (payments are kept for the record, never deleted);
+- idempotency_keys: delete keys older than IDEMPOTENCY_KEY_TTL, after
+  which a retried request is treated as a new one.
+
+Each task runs in batches of at most `batch_size` rows, one short
+`BEGIN IMMEDIATE` transaction per batch, so the SQLite write lock is never
+held for long and bookings can interleave with a large cleanup.
+
+`start()` runs the reaper for the current database every REAP_INTERVAL
+seconds on a daemon thread, which also keeps recurring services expanded
+through their rolling horizon as the date changes; `metrics()` reports
+rows reaped and time spent per task since the process started.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from database import connection, queries
+from services import service_pattern
+
+# rows per delete/update transaction
+REAP_BATCH_SIZE = 500
+
+# seconds between background runs
+REAP_INTERVAL = 60.0
+
+PENDING_PAYMENT_TTL = timedelta(minutes=30)
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+TASKS = ("sessions", "payments", "idempotency_keys")
+
+
+def _sql_timestamp(moment: datetime) -> str:
+    # the format of CURRENT_TIMESTAMP, used by the created_at defaults
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+class Reaper:
+    """Batched cleanup of one database, with running totals per task."""
+
+    def __init__(self, db_path, *, batch_size: int = REAP_BATCH_SIZE, clock=time.time):
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.db_path = str(Path(db_path))
+        self.batch_size = batch_size
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._metrics = {
+            task: {"runs": 0, "batches": 0, "rows": 0, "seconds": 0.0}
+            for task in TASKS
+        }
+        self.last_run_at: str | None = None
+
+    def _tasks(self):
+        """(name, query, cutoff) for each task, with cutoffs as of now."""
+        now = datetime.fromtimestamp(self._clock(), timezone.utc)
+        return (
+            ("sessions", queries.delete_expired_sessions, now.isoformat()),
+            (
+                "payments",
+                queries.fail_stale_pending_payments,
+                _sql_timestamp(now - PENDING_PAYMENT_TTL),
+            ),
+            (
+                "idempotency_keys",
+                queries.delete_idempotency_keys_before,
+                _sql_timestamp(now - IDEMPOTENCY_KEY_TTL),
+            ),
+        )
+
+    def run_once(self) -> dict[str, int]:
+        """Reap everything currently expired; return rows reaped per task."""
+        reaped = {}
+        with self._lock:
+            for name, query, cutoff in self._tasks():
+                started = time.perf_counter()
+                rows = batches = 0
+                while True:
+                    with connection.connect(self.db_path) as conn:
+                        conn.execute("BEGIN IMMEDIATE")
+                        count = query(conn, cutoff, self.batch_size)
+                    batches += 1
+                    rows += count
+                    if count < self.batch_size:
+                        break
+
+                totals = self._metrics[name]
+                totals["runs"] += 1
+                totals["batches"] += batches
+                totals["rows"] += rows
+                totals["seconds"] += time.perf_counter() - started
+                reaped[name] = rows
+            self.last_run_at = datetime.now(timezone.utc).isoformat()
+        return reaped
+
+    def metrics(self) -> dict:
+        """`{task: {"runs", "batches", "rows", "seconds"}}` since creation,
+        plus `last_run_at`."""
+        with self._lock:
+            result = {task: dict(totals) for task, totals in self._metrics.items()}
+            result["last_run_at"] = self.last_run_at
+        return result
+
+
+_reaper_lock = threading.Lock()
+_reaper: Reaper | None = None
+_worker: threading.Thread | None = None
+
+
+def get_reaper() -> Reaper:
+    """Return the reaper for the current database."""
+    global _reaper
+
+    db_key = str(Path(connection.DB_PATH))
+    reaper = _reaper
+    if reaper is not None and reaper.db_path == db_key:
+        return reaper
+
+    with _reaper_lock:
+        if _reaper is None or _reaper.db_path != db_key:
+            _reaper = Reaper(db_key)
+        return _reaper
+
+
+def run_once() -> dict[str, int]:
+    return get_reaper().run_once()
+
+
+def metrics() -> dict:
+    return get_reaper().metrics()
+
+
+def start(interval: float = REAP_INTERVAL) -> None:
+    """Reap the current database now and every `interval` seconds, on a
+    daemon thread. Does nothing if the thread is already running."""
+    global _worker
+    with _reaper_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(
+            target=_run_worker, args=(interval,), name="reaper", daemon=True
+        )
+        _worker.start()
+
+
+def _run_worker(interval: float) -> None:
+    while True:
+        for step in (service_pattern.ensure_horizon, run_once):
+            try:
+                step()
+            except sqlite3.Error:
+                # e.g. the database is busy; the next run picks up the rest
+                pass
+        time.sleep(interval)
+
+
+def _reset_after_fork() -> None:
+    # the worker thread does not survive a fork
+    global _worker
+    _worker = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
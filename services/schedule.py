@@ -3,8 +3,14 @@ from __future__ import annotations
 from datetime import datetime,timedelta
 
 from database import connection, queries
+from services import inventory, timetable
 from utils.validators import is_valid_schedule_date, is_valid_time
 
+# limits every schedule leg must satisfy
+MIN_FARE = 50
+MAX_FARE = 400000
+MIN_DURATION = timedelta(minutes=30)
+MAX_DURATION = timedelta(days=31)
 
 
 def create_schedule(
@@ -24,10 +30,10 @@ def create_schedule(
     except:
         raise ValueError("Fare must be a number")
 
-    if fare < 50:
+    if fare < MIN_FARE:
         raise ValueError("Minimum fare must be ₹50")
 
-    if fare > 400000:
+    if fare > MAX_FARE:
         raise ValueError("Maximum fare cannot exceed ₹4,00,000")
 
     # ================= DATETIME VALIDATION =================
@@ -46,16 +52,14 @@ def create_schedule(
 
     duration = arr_dt - dep_dt
 
-    if duration < timedelta(minutes=30):
+    if duration < MIN_DURATION:
         raise ValueError("Minimum journey duration must be 30 minutes")
 
-    if duration > timedelta(days=31):
+    if duration > MAX_DURATION:
         raise ValueError("Journey duration cannot exceed 1 month")
 
     # ================= DATABASE VALIDATION =================
-    conn = connection.get_connection()
-
-    try:
+    with connection.connect() as conn:
         if not queries.get_train_by_id(conn, train_id):
             raise ValueError("train_id does not exist")
 
@@ -68,7 +72,7 @@ def create_schedule(
         if origin_station_id == destination_station_id:
             raise ValueError("origin and destination must be different")
 
-        return queries.create_schedule(
+        schedule_id = queries.create_schedule(
             conn,
             train_id,
             origin_station_id,
@@ -79,9 +83,10 @@ def create_schedule(
             arrival_time,
             fare,
         )
+        row = queries.get_timetable_row(conn, schedule_id)
 
-    finally:
-        connection.close_connection(conn)
+    timetable.schedule_saved(row)
+    return schedule_id
 
 
 
@@ -127,10 +132,10 @@ def update_schedule(
     except Exception:
         raise ValueError("Fare must be a number")
 
-    if fare < 50:
+    if fare < MIN_FARE:
         raise ValueError("Minimum fare must be ₹50")
 
-    if fare > 400000:
+    if fare > MAX_FARE:
         raise ValueError("Maximum fare cannot exceed ₹4,00,000")
 
     # ================= DATETIME LOGIC =================
@@ -150,17 +155,15 @@ def update_schedule(
 
     duration = arr_dt - dep_dt
 
-    if duration < timedelta(minutes=30):
+    if duration < MIN_DURATION:
         raise ValueError("Minimum journey duration must be 30 minutes")
 
-    if duration > timedelta(days=31):
+    if duration > MAX_DURATION:
         raise ValueError("Journey duration cannot exceed 1 month")
 
     # ================= DATABASE VALIDATION =================
 
-    conn = connection.get_connection()
-
-    try:
+    with connection.connect() as conn:
         # Schedule existence
         if not queries.get_schedule_by_id(conn, int(schedule_id)):
             raise ValueError("schedule_id does not exist")
@@ -208,32 +211,25 @@ def update_schedule(
             arrival_time,
             fare,
         )
+        row = queries.get_timetable_row(conn, int(schedule_id))
+
+    timetable.schedule_saved(row)
 
-    finally:
-        connection.close_connection(conn)
 
 def list_schedules() -> list:
     """Return all schedules as a list of rows."""
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         return queries.get_all_schedules(conn)
-    finally:
-        connection.close_connection(conn)
 
 
 def get_schedules_by_train(train_id: int) -> list:
     """Return all schedules for a specific train as a list of rows."""
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         return queries.get_schedules_by_train(conn, train_id)
-    finally:
-        connection.close_connection(conn)
 
 def delete_schedule(schedule_id: int) -> None:
 
-    conn = connection.get_connection()
-
-    try:
+    with connection.connect() as conn:
         schedule = queries.get_schedule_by_id(conn, schedule_id)
 
         if not schedule:
@@ -250,12 +246,96 @@ def delete_schedule(schedule_id: int) -> None:
             origin_id,
             dest_id,
             departure_date,
-        ):
+        ) or inventory.schedule_has_riders(conn, schedule):
             raise ValueError(
                 "Cannot delete schedule. Bookings exist for this journey."
             )
 
         queries.delete_schedule(conn, schedule_id)
 
-    finally:
-        connection.close_connection(conn)
+    timetable.schedule_deleted(schedule_id)
+
+
+def _ensure_recurring_services() -> None:
+    # imported here: service_pattern validates legs with this module's limits
+    from services import service_pattern
+
+    service_pattern.ensure_horizon()
+
+
+def search_schedules(
+    origin_station_id: int,
+    destination_station_id: int,
+    departure_date: str,
+) -> list[dict]:
+    """
+    Return direct schedules for a route and date, each with
+    `available_seats` and `seats_by_class` free-seat counts.
+
+    Schedules come from the in-memory timetable; only seat counts are read
+    from the database.
+    """
+    _ensure_recurring_services()
+    with connection.connect() as conn:
+        rows = timetable.get_index(conn).search(
+            origin_station_id, destination_station_id, departure_date
+        )
+        return inventory.annotate_availability(conn, rows)
+
+
+# widest window find_schedules_range will search
+MAX_RANGE_DAYS = 31
+
+
+def find_schedules_range(
+    origin_station_id: int,
+    destination_station_id: int,
+    start_date: str,
+    end_date: str,
+) -> list[dict]:
+    """
+    Return a fare/time calendar for a route, one entry per day from
+    `start_date` to `end_date` (inclusive):
+
+        {"date", "schedules", "cheapest_fare", "earliest_departure"}
+
+    `schedules` are the direct legs that day with seat counts, as from
+    `search_schedules`; days without trains have an empty list and None
+    for the summary fields. The whole window is one range read of the
+    timetable's route index.
+    """
+    try:
+        first = datetime.strptime(start_date, "%Y-%m-%d").date()
+        last = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError("Dates must be YYYY-MM-DD")
+
+    if last < first:
+        raise ValueError("end_date must not be before start_date")
+    if (last - first).days >= MAX_RANGE_DAYS:
+        raise ValueError(f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+
+    _ensure_recurring_services()
+    with connection.connect() as conn:
+        rows = timetable.get_index(conn).search_range(
+            origin_station_id, destination_station_id, start_date, end_date
+        )
+        rows = inventory.annotate_availability(conn, rows)
+
+    by_day: dict[str, list[dict]] = {}
+    for row in rows:
+        by_day.setdefault(row["departure_date"], []).append(row)
+
+    calendar = []
+    for offset in range((last - first).days + 1):
+        day = (first + timedelta(days=offset)).isoformat()
+        schedules = by_day.get(day, [])
+        calendar.append(
+            {
+                "date": day,
+                "schedules": schedules,
+                "cheapest_fare": min((s["fare"] for s in schedules), default=None),
+                "earliest_departure": schedules[0]["departure_time"] if schedules else None,
+            }
+        )
+    return calendar
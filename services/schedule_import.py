@@ -0,0 +1,219 @@
+"""Bulk import of schedule legs from a CSV or JSON Lines timetable file.
+
+The file is streamed in chunks of `IMPORT_CHUNK_SIZE` rows. Train and
+station ids are read once into sets, so validating a chunk costs no
+queries; the valid rows of a chunk are inserted with one `executemany` in
+their own transaction. Invalid rows are skipped and reported by line
+number rather than failing the whole import.
+
+Both formats carry the same fields as `services.schedule.create_schedule`:
+
+    train_id, origin_station_id, destination_station_id,
+    departure_date, arrival_date, departure_time, arrival_time, fare
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import re
+import sqlite3
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+from database import connection, queries
+from services import timetable
+from services.schedule import MAX_DURATION, MAX_FARE, MIN_DURATION, MIN_FARE
+
+FIELDS = (
+    "train_id",
+    "origin_station_id",
+    "destination_station_id",
+    "departure_date",
+    "arrival_date",
+    "departure_time",
+    "arrival_time",
+    "fare",
+)
+
+# rows validated and inserted per transaction
+IMPORT_CHUNK_SIZE = 10_000
+
+# errors kept in the report; later ones are only counted
+MAX_REPORTED_ERRORS = 1_000
+
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_TIME = re.compile(r"\d{2}:\d{2}")
+
+
+def _read_csv(f):
+    reader = csv.reader(f)
+    header = next(reader, [])
+    missing = [name for name in FIELDS if name not in header]
+    if missing:
+        raise ValueError(f"CSV header is missing: {', '.join(missing)}")
+    if list(FIELDS) == header:
+        for row in reader:
+            if row:
+                yield reader.line_num, row
+        return
+    positions = [header.index(name) for name in FIELDS]
+    for row in reader:
+        if not row:
+            continue
+        try:
+            yield reader.line_num, [row[i] for i in positions]
+        except IndexError:
+            yield reader.line_num, "missing fields"
+
+
+def _read_jsonl(f):
+    for line_no, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            yield line_no, "not a JSON object"
+        else:
+            yield line_no, [row.get(name) for name in FIELDS]
+
+
+def _parse(row, train_ids, station_ids) -> tuple:
+    """Validate one row of FIELDS values (the same rules as
+    `create_schedule`) and return it as a `queries.create_schedules`
+    tuple. Raises ValueError."""
+    if isinstance(row, str):
+        raise ValueError(row)
+    if len(row) != len(FIELDS):
+        raise ValueError("wrong number of fields")
+    train_id, origin, dest, dep_date, arr_date, dep_time, arr_time, fare = row
+    try:
+        train_id, origin, dest = int(train_id), int(origin), int(dest)
+    except (TypeError, ValueError):
+        raise ValueError("train and station ids must be integers")
+
+    if not (
+        isinstance(dep_date, str) and _DATE.fullmatch(dep_date)
+        and isinstance(arr_date, str) and _DATE.fullmatch(arr_date)
+    ):
+        raise ValueError("dates must be YYYY-MM-DD")
+    if not (
+        isinstance(dep_time, str) and _TIME.fullmatch(dep_time)
+        and isinstance(arr_time, str) and _TIME.fullmatch(arr_time)
+    ):
+        raise ValueError("times must be HH:MM")
+
+    try:
+        fare = float(fare)
+    except (TypeError, ValueError):
+        raise ValueError("Fare must be a number")
+    if fare < MIN_FARE:
+        raise ValueError("Minimum fare must be ₹50")
+    if fare > MAX_FARE:
+        raise ValueError("Maximum fare cannot exceed ₹4,00,000")
+
+    try:
+        departs = datetime.fromisoformat(f"{dep_date}T{dep_time}")
+        arrives = datetime.fromisoformat(f"{arr_date}T{arr_time}")
+    except ValueError:
+        raise ValueError("invalid date or time")
+    if arrives <= departs:
+        raise ValueError("Arrival must be after departure")
+    if arrives - departs < MIN_DURATION:
+        raise ValueError("Minimum journey duration must be 30 minutes")
+    if arrives - departs > MAX_DURATION:
+        raise ValueError("Journey duration cannot exceed 1 month")
+
+    if train_id not in train_ids:
+        raise ValueError("train_id does not exist")
+    if origin not in station_ids:
+        raise ValueError("origin station does not exist")
+    if dest not in station_ids:
+        raise ValueError("destination station does not exist")
+    if origin == dest:
+        raise ValueError("origin and destination must be different")
+
+    return (train_id, origin, dest, dep_date, arr_date, dep_time, arr_time, fare)
+
+
+def _insert_chunk(rows: list, line_numbers: list, errors: list) -> int:
+    """Insert one chunk in one transaction and return how many rows went in.
+
+    If the chunk hits the schedules UNIQUE constraint it is rolled back and
+    retried row by row (one transaction still), so only the duplicates are
+    reported.
+    """
+    try:
+        with connection.connect() as conn:
+            queries.create_schedules(conn, rows)
+        return len(rows)
+    except sqlite3.IntegrityError:
+        pass
+
+    inserted = 0
+    with connection.connect() as conn:
+        for line_no, row in zip(line_numbers, rows):
+            try:
+                queries.create_schedules(conn, [row])
+                inserted += 1
+            except sqlite3.IntegrityError:
+                errors.append((line_no, "duplicate schedule"))
+    return inserted
+
+
+def import_schedules(path, *, chunk_size: int = IMPORT_CHUNK_SIZE) -> dict:
+    """
+    Import schedule legs from a `.csv` or `.jsonl` file.
+
+    Returns `{"rows", "imported", "failed", "errors"}`, where `errors` lists
+    the first MAX_REPORTED_ERRORS `(line_number, message)` pairs. Raises
+    ValueError if the file cannot be read as a timetable at all.
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        reader = _read_csv
+    elif suffix in (".jsonl", ".ndjson"):
+        reader = _read_jsonl
+    else:
+        raise ValueError("Timetable file must be .csv or .jsonl")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+
+    with connection.connect() as conn:
+        train_ids = queries.get_train_ids(conn)
+        station_ids = queries.get_station_ids(conn)
+
+    total = imported = failed = 0
+    errors: list[tuple[int, str]] = []
+
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = reader(f)
+            while chunk := list(islice(rows, chunk_size)):
+                valid, line_numbers, chunk_errors = [], [], []
+                for line_no, row in chunk:
+                    try:
+                        valid.append(_parse(row, train_ids, station_ids))
+                        line_numbers.append(line_no)
+                    except ValueError as e:
+                        chunk_errors.append((line_no, str(e)))
+
+                if valid:
+                    imported += _insert_chunk(valid, line_numbers, chunk_errors)
+                total += len(chunk)
+                failed += len(chunk_errors)
+                chunk_errors.sort()
+                errors.extend(chunk_errors[: MAX_REPORTED_ERRORS - len(errors)])
+    except OSError as e:
+        raise ValueError(f"Cannot read timetable file: {e}") from None
+    finally:
+        # many legs at once: reload the timetable rather than patch it
+        if imported:
+            timetable.reset()
+
+    return {"rows": total, "imported": imported, "failed": failed, "errors": errors}
@@ -0,0 +1,261 @@
+"""Recurring services: a train's legs plus the weekdays it runs.
+
+A service pattern stores one run of a train (leg times with day offsets
+from the run's start date), a weekday mask and a validity period. Patterns
+are expanded into ordinary `schedules` rows, so searches, bookings and
+`queries.find_schedules` need no changes:
+
+- on write: `create_pattern` expands the new pattern up to
+  ROLLING_HORIZON_DAYS ahead before it returns, so every reader of
+  `schedules` (bookings, admin listings, cancellations) sees its legs;
+- daily: `ensure_horizon()` moves the horizon forward as the date
+  changes. The reaper's background tick calls it, and so do the search
+  services; it costs a dict lookup once the horizon is current for the day;
+- in bulk: `materialize(through_date)` expands up to any date, e.g. to
+  publish a timetable beyond the booking horizon.
+
+Expansion skips legs that already exist (the schedules UNIQUE key), so a
+pattern can overlap hand-entered schedules and re-running it is harmless.
+Skipped legs are logged as a warning with their pattern.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+from database import connection, queries
+from services import timetable
+from services.schedule import MAX_DURATION, MAX_FARE, MIN_DURATION, MIN_FARE
+from utils.validators import is_valid_time
+
+logger = logging.getLogger(__name__)
+
+# how far ahead patterns are expanded on demand (the booking window)
+ROLLING_HORIZON_DAYS = 120
+
+# Monday = 0 ... Sunday = 6, as `date.weekday()`
+DAILY = tuple(range(7))
+WEEKDAYS = tuple(range(5))
+
+# furthest a leg may depart or arrive after the run's start date
+MAX_DAY_OFFSET = 31
+
+_horizon_lock = threading.Lock()
+_horizons: dict[str, str] = {}  # database -> date expanded through today
+
+
+def _parse_date(value, name: str) -> date:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be YYYY-MM-DD")
+
+
+def _days_mask(days) -> int:
+    mask = 0
+    for day in days:
+        if not isinstance(day, int) or not 0 <= day <= 6:
+            raise ValueError("days must be weekday numbers 0 (Monday) to 6 (Sunday)")
+        mask |= 1 << day
+    if not mask:
+        raise ValueError("a service must run on at least one day")
+    return mask
+
+
+def _leg_values(leg: dict, station_ids: set) -> tuple:
+    """Validate one pattern leg (the same rules as `create_schedule`) and
+    return its `queries.create_service_pattern` tuple."""
+    try:
+        origin = int(leg["origin_station_id"])
+        dest = int(leg["destination_station_id"])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("origin and destination station ids are required")
+    if origin not in station_ids:
+        raise ValueError("origin station does not exist")
+    if dest not in station_ids:
+        raise ValueError("destination station does not exist")
+    if origin == dest:
+        raise ValueError("origin and destination must be different")
+
+    dep_time, arr_time = leg.get("departure_time"), leg.get("arrival_time")
+    if not is_valid_time(dep_time) or not is_valid_time(arr_time):
+        raise ValueError("departure_time and arrival_time must be HH:MM")
+
+    dep_offset = leg.get("departure_day_offset", 0)
+    arr_offset = leg.get("arrival_day_offset", dep_offset)
+    for offset in (dep_offset, arr_offset):
+        if not isinstance(offset, int) or not 0 <= offset <= MAX_DAY_OFFSET:
+            raise ValueError(f"day offsets must be between 0 and {MAX_DAY_OFFSET}")
+
+    try:
+        fare = float(leg.get("fare"))
+    except (TypeError, ValueError):
+        raise ValueError("Fare must be a number")
+    if fare < MIN_FARE:
+        raise ValueError("Minimum fare must be ₹50")
+    if fare > MAX_FARE:
+        raise ValueError("Maximum fare cannot exceed ₹4,00,000")
+
+    duration = _offset_time(arr_offset, arr_time) - _offset_time(dep_offset, dep_time)
+    if duration <= timedelta(0):
+        raise ValueError("Arrival must be after departure")
+    if duration < MIN_DURATION:
+        raise ValueError("Minimum journey duration must be 30 minutes")
+    if duration > MAX_DURATION:
+        raise ValueError("Journey duration cannot exceed 1 month")
+
+    return (origin, dest, dep_time, arr_time, dep_offset, arr_offset, fare)
+
+
+def _offset_time(day_offset: int, hhmm: str) -> timedelta:
+    hours, minutes = hhmm.split(":")
+    return timedelta(days=day_offset, hours=int(hours), minutes=int(minutes))
+
+
+def create_pattern(
+    train_id: int,
+    legs: list[dict],
+    *,
+    valid_from: str,
+    valid_to: str | None = None,
+    days=DAILY,
+) -> int:
+    """
+    Add a recurring service for a train and return its id.
+
+    `legs` are dicts with `origin_station_id`, `destination_station_id`,
+    `departure_time`, `arrival_time`, `fare` and optionally
+    `departure_day_offset` / `arrival_day_offset` (days after the run's
+    start date, default 0), in running order. The train runs on `days`
+    (weekday numbers, Monday = 0) from `valid_from` to `valid_to`
+    inclusive, or indefinitely if `valid_to` is None.
+
+    Runs up to ROLLING_HORIZON_DAYS ahead are expanded before returning.
+    """
+    mask = _days_mask(days)
+    first = _parse_date(valid_from, "valid_from")
+    if valid_to is not None and _parse_date(valid_to, "valid_to") < first:
+        raise ValueError("valid_to must not be before valid_from")
+    if not legs:
+        raise ValueError("a service needs at least one leg")
+
+    with connection.connect() as conn:
+        train = queries.get_train_by_id(conn, train_id)
+        if not train:
+            raise ValueError("train_id does not exist")
+        if train["status"] != "active":
+            raise ValueError("train is not active")
+
+        station_ids = queries.get_station_ids(conn)
+        rows = [_leg_values(leg, station_ids) for leg in legs]
+        for before, after in zip(rows, rows[1:]):
+            if _offset_time(after[4], after[2]) < _offset_time(before[5], before[3]):
+                raise ValueError("each leg must depart after the previous leg arrives")
+
+        pattern_id = queries.create_service_pattern(
+            conn, train_id, mask, valid_from, valid_to, rows
+        )
+
+    # the new pattern is not expanded yet, so the horizon is stale
+    with _horizon_lock:
+        _horizons.pop(str(Path(connection.DB_PATH)), None)
+    ensure_horizon()
+    return pattern_id
+
+
+def list_patterns() -> list:
+    with connection.connect() as conn:
+        return queries.get_all_service_patterns(conn)
+
+
+def _expand(pattern, legs, start: date, end: date) -> list[tuple]:
+    """Concrete schedule rows for runs starting `start`..`end` (inclusive)."""
+    rows = []
+    mask = pattern["days_mask"]
+    day = start
+    while day <= end:
+        if mask >> day.weekday() & 1:
+            for leg in legs:
+                rows.append(
+                    (
+                        pattern["train_id"],
+                        leg["origin_station_id"],
+                        leg["destination_station_id"],
+                        (day + timedelta(days=leg["departure_day_offset"])).isoformat(),
+                        (day + timedelta(days=leg["arrival_day_offset"])).isoformat(),
+                        leg["departure_time"],
+                        leg["arrival_time"],
+                        leg["fare"],
+                    )
+                )
+        day += timedelta(days=1)
+    return rows
+
+
+def materialize(through_date: str) -> int:
+    """
+    Expand every active pattern into schedules for runs starting up to
+    `through_date`, continuing from where each was last expanded. A
+    pattern's first expansion starts today at the earliest, however far
+    back `valid_from` is.
+
+    Runs in one write transaction; returns the number of schedules added.
+    Legs that clash with an existing schedule are skipped and logged.
+    """
+    through = _parse_date(through_date, "through_date")
+    today = date.today()
+
+    inserted = 0
+    with connection.connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        for pattern in queries.get_service_patterns_due(conn, through_date):
+            start = date.fromisoformat(pattern["valid_from"])
+            if pattern["materialized_until"]:
+                resume = date.fromisoformat(pattern["materialized_until"]) + timedelta(days=1)
+                start = max(start, resume)
+            else:
+                # a backdated pattern starts today, not with its departed runs
+                start = max(start, today)
+            end = through
+            if pattern["valid_to"]:
+                end = min(end, date.fromisoformat(pattern["valid_to"]))
+
+            legs = queries.get_service_pattern_legs(conn, pattern["id"])
+            rows = _expand(pattern, legs, start, end)
+            added = queries.create_pattern_schedules(conn, pattern["id"], rows)
+            if added < len(rows):
+                logger.warning(
+                    "service pattern %s: skipped %d of %d legs through %s that "
+                    "clash with existing schedules",
+                    pattern["id"], len(rows) - added, len(rows), end.isoformat(),
+                )
+            inserted += added
+            queries.set_pattern_materialized(conn, pattern["id"], end.isoformat())
+
+    # possibly many legs at once: reload the timetable rather than patch it
+    if inserted:
+        timetable.reset()
+    return inserted
+
+
+def ensure_horizon() -> int:
+    """
+    Expand patterns through ROLLING_HORIZON_DAYS from today, if that has
+    not been done yet today in this process. Returns the schedules added.
+    """
+    through = (date.today() + timedelta(days=ROLLING_HORIZON_DAYS)).isoformat()
+    db_key = str(Path(connection.DB_PATH))
+    if _horizons.get(db_key) == through:
+        return 0
+
+    with _horizon_lock:
+        if _horizons.get(db_key) == through:
+            return 0
+        with connection.connect() as conn:
+            due = queries.get_service_patterns_due(conn, through)
+        inserted = materialize(through) if due else 0
+        _horizons[db_key] = through
+    return inserted
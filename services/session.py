@@ -1,58 +1,356 @@
+"""Customer sessions, held in memory and persisted write-behind.
+
+Active sessions live in a `SessionStore`: a dict from token to
+`(user_id, expires_ts, expires_at, created_at)` plus a min-heap of
+`(expires_ts, token)`. Validating a token is a dict lookup and a clock
+comparison; it never writes to the database.
+
+Changes are queued in the store and written to `sessions` by a background
+thread every FLUSH_INTERVAL seconds (one transaction per flush), which also
+sweeps expired tokens off the heap. Whatever is still queued is flushed at
+interpreter exit, so a session created just before the program quits is
+there on the next run. Switching to another database retires the store
+after flushing it; a store whose flush fails stays retired, and the
+background thread and the exit flush retry it. A token not in memory (e.g. created by an earlier
+run) is read through from the database once and then cached.
+
+The store belongs to one process: sessions changed by another process (or
+by raw SQL) while they are cached here are not seen.
+
+Each database also has a device pointer: a small file next to it holding
+the token this device last signed in with, so auto-login at startup is a
+lookup by token instead of a search of every session.
+"""
+
 from __future__ import annotations
 
+import atexit
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
 import uuid
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 
 from database import connection, queries
 
+logger = logging.getLogger(__name__)
 
 SESSION_TTL = timedelta(hours=24)
 
+# seconds between background sweeps and write-behind flushes
+FLUSH_INTERVAL = 1.0
+
+
+class SessionStore:
+    """The active sessions of one database."""
+
+    def __init__(self, db_path, clock=time.time):
+        self.db_path = str(Path(db_path))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sessions: dict[str, tuple] = {}
+        self._expiries: list[tuple[float, str]] = []
+        # token -> row tuple to save, or None to delete; the latest change wins
+        self._pending: dict[str, tuple | None] = {}
+        # changes taken by a flush that has not committed yet
+        self._inflight: dict[str, tuple | None] = {}
+        self._flush_lock = threading.Lock()
+        self._flushes = 0  # flushes committed, so `_load` can spot one
+
+    def _cache(self, token, user_id, expires_ts, expires_at, created_at) -> None:
+        # call with `_lock` held
+        self._sessions[token] = (user_id, expires_ts, expires_at, created_at)
+        heapq.heappush(self._expiries, (expires_ts, token))
+
+    def _drop(self, token: str) -> None:
+        # call with `_lock` held
+        self._sessions.pop(token, None)
+        self._pending[token] = None
+
+    def create(self, user_id: int) -> str:
+        """Start a session for a user and return its token."""
+        token = uuid.uuid4().hex
+        now = datetime.fromtimestamp(self._clock(), timezone.utc)
+        expires = now + SESSION_TTL
+        expires_at = expires.isoformat()
+        # the format of the column's CURRENT_TIMESTAMP default
+        created_at = now.strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._cache(token, user_id, expires.timestamp(), expires_at, created_at)
+            self._pending[token] = (token, user_id, expires_at, created_at)
+        return token
+
+    def get(self, token: str) -> dict | None:
+        """The session for `token` as a dict, or None if unknown or expired."""
+        entry = self._sessions.get(token)
+        if entry is None:
+            entry = self._load(token)
+            if entry is None:
+                return None
+
+        user_id, expires_ts, expires_at, created_at = entry
+        if expires_ts <= self._clock():
+            with self._lock:
+                self._drop(token)
+            return None
+        return {
+            "token": token,
+            "user_id": user_id,
+            "expires_at": expires_at,
+            "created_at": created_at,
+        }
+
+    def _queued(self, token: str) -> bool:
+        # call with `_lock` held
+        return token in self._pending or token in self._inflight
+
+    def _load(self, token: str) -> tuple | None:
+        """Read a token through from the database and cache it."""
+        while True:
+            with self._lock:
+                if self._queued(token):
+                    # changed here but not committed yet
+                    return None
+                flushes = self._flushes
+            with connection.connect(self.db_path) as conn:
+                row = queries.get_session(conn, token)
+
+            with self._lock:
+                if self._queued(token):
+                    return None
+                if self._flushes != flushes:
+                    # a flush committed while we read: the row may be gone
+                    continue
+                if row is None:
+                    return None
+                expires_ts = datetime.fromisoformat(row["expires_at"]).timestamp()
+                self._cache(token, row["user_id"], expires_ts, row["expires_at"], row["created_at"])
+                return self._sessions[token]
+
+    def invalidate(self, token: str) -> None:
+        with self._lock:
+            self._drop(token)
+
+    def sweep(self) -> int:
+        """Drop expired sessions from memory (queueing their deletes) and
+        return how many were dropped."""
+        now = self._clock()
+        dropped = 0
+        with self._lock:
+            while self._expiries and self._expiries[0][0] <= now:
+                expires_ts, token = heapq.heappop(self._expiries)
+                entry = self._sessions.get(token)
+                # skip heap entries left behind by invalidated sessions
+                if entry is not None and entry[1] == expires_ts:
+                    self._drop(token)
+                    dropped += 1
+        return dropped
+
+    def flush(self) -> int:
+        """Write queued changes in one transaction and return how many.
+
+        If the write fails the changes stay queued (behind any newer ones)
+        for the next flush. Until the write commits its changes stay in
+        `_inflight`, so a read-through cannot cache a row being deleted.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self._inflight = self._pending
+                self._pending = {}
+            if not pending:
+                return 0
+
+            saves = [row for row in pending.values() if row is not None]
+            deletes = [token for token, row in pending.items() if row is None]
+            try:
+                with connection.connect(self.db_path) as conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    queries.save_sessions(conn, saves)
+                    queries.delete_sessions(conn, deletes)
+            except BaseException:
+                with self._lock:
+                    for token, row in pending.items():
+                        self._pending.setdefault(token, row)
+                    self._inflight = {}
+                raise
+            with self._lock:
+                self._inflight = {}
+                self._flushes += 1
+            return len(pending)
+
+
+_store_lock = threading.Lock()
+_store: SessionStore | None = None
+_retired: list[SessionStore] = []  # stores of earlier databases, not yet flushed
+_worker: threading.Thread | None = None
+
+
+def get_store() -> SessionStore:
+    """Return the session store for the current database.
+
+    Switching to another database retires the previous store and flushes
+    it; see `_flush_retired`.
+    """
+    global _store
+
+    db_key = str(Path(connection.DB_PATH))
+    store = _store
+    if store is not None and store.db_path == db_key:
+        return store
+
+    with _store_lock:
+        previous = _store
+        if previous is None or previous.db_path != db_key:
+            # switching back: pick up changes of ours still waiting to flush
+            store = next((s for s in _retired if s.db_path == db_key), None)
+            if store is not None:
+                _retired.remove(store)
+            _store = store or SessionStore(db_key)
+            if previous is not None:
+                _retired.append(previous)
+        store = _store
+        _start_worker()
+
+    if previous is not None and previous is not store:
+        _flush_retired()
+    return store
 
-def _now_iso() -> str:
-    # timezone-aware UTC ISO timestamp
-    return datetime.now(timezone.utc).isoformat()
 
+def _flush_retired() -> None:
+    """Flush the stores of databases switched away from. A store whose
+    flush fails is logged and kept, so the next call retries it."""
+    with _store_lock:
+        retired = list(_retired)
+    for store in retired:
+        try:
+            store.flush()
+        except sqlite3.Error as exc:
+            logger.warning("could not flush sessions to %s: %s", store.db_path, exc)
+            continue
+        with _store_lock:
+            if store in _retired and not store._pending:
+                _retired.remove(store)
 
-def _expires_iso() -> str:
-    # timezone-aware UTC ISO timestamp for expiry
-    return (datetime.now(timezone.utc) + SESSION_TTL).isoformat()
+
+def _start_worker() -> None:
+    # call with `_store_lock` held
+    global _worker
+    if _worker is None or not _worker.is_alive():
+        _worker = threading.Thread(target=_run_worker, name="session-store", daemon=True)
+        _worker.start()
+
+
+def _run_worker() -> None:
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        if _retired:
+            _flush_retired()
+        store = _store
+        if store is None:
+            continue
+        store.sweep()
+        try:
+            store.flush()
+        except sqlite3.Error:
+            # still queued; retried on the next tick
+            pass
+
+
+def flush() -> int:
+    """Write queued session changes now, e.g. before reading `sessions`
+    with SQL. Returns how many were written."""
+    store = _store
+    return store.flush() if store is not None else 0
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    _flush_retired()
+    try:
+        flush()
+    except sqlite3.Error:
+        pass
+
+
+def _reset_after_fork() -> None:
+    # the worker thread does not survive a fork
+    global _worker
+    _worker = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _device_file() -> Path:
+    return Path(f"{connection.DB_PATH}.session")
+
+
+def remember_device(token: str) -> None:
+    """Point this device's auto-login at `token`."""
+    path = _device_file()
+    tmp = path.with_name(path.name + ".tmp")
+    # the token is a credential: readable by this user only
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+    os.replace(tmp, path)
+
+
+def _forget_device(token: str | None = None) -> None:
+    """Clear the device pointer (only if it holds `token`, when given)."""
+    path = _device_file()
+    try:
+        if token is None or path.read_text(encoding="utf-8").strip() == token:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def get_device_session() -> dict | None:
+    """The session this device last signed in with, if still valid, as a
+    dict with the user's `username` and `role` added; else None.
+
+    Costs a primary-key lookup of the token (unless already cached) and one
+    of the user.
+    """
+    try:
+        token = _device_file().read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+
+    session = get_store().get(token) if token else None
+    if session is not None:
+        with connection.connect() as conn:
+            user = queries.get_user_by_id(conn, session["user_id"])
+        if user is not None:
+            session["username"] = user["username"]
+            session["role"] = user["role"]
+            return session
+    _forget_device(token)
+    return None
 
 
 def create_session_for_user(user_id: int) -> str:
     """Create a session token for given user_id and return the token."""
-    token = uuid.uuid4().hex
-    expires_at = _expires_iso()
-    conn = connection.get_connection()
-    try:
-        queries.create_session(conn, token, user_id, expires_at)
-        return token
-    finally:
-        connection.close_connection(conn)
+    return get_store().create(user_id)
 
 
 def validate_session(token: str) -> dict:
-    """Validate a session token and return the session row as dict.
+    """Validate a session token and return the session as a dict.
 
     Raises ValueError if token is invalid or expired.
     """
-    conn = connection.get_connection()
-    try:
-        now = _now_iso()
-        # cleanup expired sessions first
-        queries.delete_expired_sessions(conn, now)
-        row = queries.get_session(conn, token)
-        if not row:
-            raise ValueError("Session invalid or expired")
-        return dict(row)
-    finally:
-        connection.close_connection(conn)
+    session = get_store().get(token)
+    if session is None:
+        raise ValueError("Session invalid or expired")
+    return session
 
 
 def invalidate_session(token: str) -> None:
-    conn = connection.get_connection()
-    try:
-        queries.delete_session(conn, token)
-    finally:
-        connection.close_connection(conn)
-
+    get_store().invalidate(token)
+    _forget_device(token)
@@ -1,4 +1,5 @@
 from database import connection, queries
+from services import timetable
 from utils.validators import is_valid_name
 
 
@@ -12,14 +13,11 @@ def add_station(code: str, name: str, city: str) -> int:
             "Station name must be alphanumeric (letters, numbers, spaces only)"
         )
 
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         if queries.get_station_by_code(conn, code):
             raise ValueError("Station code already exists")
 
         return queries.create_station(conn, code, name, city)
-    finally:
-        connection.close_connection(conn)
 
 
 def update_station(station_id: int, new_station_name: str) -> None:
@@ -30,30 +28,23 @@ def update_station(station_id: int, new_station_name: str) -> None:
             "Station name must be alphanumeric (letters, numbers, spaces only)"
         )
 
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         # Check station exists
         if not queries.get_station_by_id(conn, station_id):
             raise ValueError("Station does not exist")
 
         queries.update_station_name(conn, station_id, new_station_name.strip())
 
-    finally:
-        connection.close_connection(conn)
 
-
-def remove_train(station_id: int) -> None:
+def remove_train(train_id: int) -> None:
     """Mark a train as inactive (soft delete)."""
-    conn = connection.get_connection()
-    try:
-        queries.delete_train(conn, station_id)
-    finally:
-        connection.close_connection(conn)
+    with connection.connect() as conn:
+        queries.delete_train(conn, train_id)
+        legs = queries.get_timetable_rows_for_train(conn, train_id)
+
+    timetable.train_changed(train_id, legs)
 
 
 def list_stations() -> list:
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         return queries.get_all_stations(conn)
-    finally:
-        connection.close_connection(conn)
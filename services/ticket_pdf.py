@@ -38,6 +38,7 @@ def generate_ticket_pdf(booking: dict, file_path: str) -> None:
         ["Route", f'{booking["origin_station"]} → {booking["destination_station"]}'],
         ["Departure", f'{booking["departure_date"]} {booking["departure_time"]}'],
         ["Arrival", f'{booking["arrival_date"]} {booking["arrival_time"]}'],
+        ["Seat", f'{booking.get("coach_code") or "-"} / {booking.get("seat_number") or "-"}'],
         ["Fare Paid", f'₹{booking["fare"]}'],
         ["Booking Status", booking["booking_status"]],
         ["Payment Status", booking.get("payment_status", "N/A")],
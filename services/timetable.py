@@ -0,0 +1,258 @@
+"""Process-wide in-memory timetable.
+
+Schedules change rarely but are read on every search and booking, so the
+whole `schedules` table (joined to its train) is loaded once, lazily, into
+`__slots__` rows indexed by route, by train and by departure date.
+The schedule and train services patch the index after each write they
+commit, so reads never go back to SQLite.
+
+The index belongs to one process: writes made by another process (or by
+raw SQL) are not seen until `reset()` is called.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from pathlib import Path
+
+from database import connection, queries
+
+
+class TimetableRow:
+    """One schedule leg with its train's number, name and status.
+
+    Supports `row["field"]` and `dict(row)` like `sqlite3.Row`, so it can be
+    passed wherever schedule rows are used.
+    """
+
+    __slots__ = (
+        "id",
+        "train_id",
+        "origin_station_id",
+        "destination_station_id",
+        "departure_date",
+        "departure_time",
+        "arrival_date",
+        "arrival_time",
+        "fare",
+        "train_number",
+        "train_name",
+        "train_status",
+    )
+
+    def __init__(self, row):
+        for field in self.__slots__:
+            setattr(self, field, row[field])
+
+    def keys(self):
+        return self.__slots__
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    @property
+    def sort_key(self) -> tuple:
+        return (self.departure_date, self.departure_time, self.id)
+
+    def __repr__(self):
+        return f"TimetableRow(id={self.id}, train_id={self.train_id})"
+
+
+def _sort_key(row: TimetableRow) -> tuple:
+    return row.sort_key
+
+
+class TimetableIndex:
+    """Schedule rows indexed by (origin, destination), train and date.
+
+    Every list is kept sorted by departure date, time and id. Writers hold
+    `lock` and replace lists rather than mutate them, so readers never see a
+    half-applied patch. `version` goes up with every patch, for caches
+    derived from the index.
+    """
+
+    __slots__ = ("lock", "version", "by_id", "by_route", "by_train", "by_date")
+
+    def __init__(self, rows=()):
+        self.lock = threading.Lock()
+        self.version = 0
+        self.by_id: dict[int, TimetableRow] = {}
+        self.by_route: dict[tuple, list[TimetableRow]] = {}
+        self.by_train: dict[int, list[TimetableRow]] = {}
+        self.by_date: dict[str, list[TimetableRow]] = {}
+
+        for row in sorted(map(TimetableRow, rows), key=_sort_key):
+            self.by_id[row.id] = row
+            self.by_route.setdefault(self._route_key(row), []).append(row)
+            self.by_train.setdefault(row.train_id, []).append(row)
+            self.by_date.setdefault(row.departure_date, []).append(row)
+
+    @staticmethod
+    def _route_key(row: TimetableRow) -> tuple:
+        return (row.origin_station_id, row.destination_station_id)
+
+    # ---------- reads ----------
+
+    def get(self, schedule_id: int) -> TimetableRow | None:
+        return self.by_id.get(schedule_id)
+
+    @staticmethod
+    def _between(rows: list, date_from: str, date_to: str) -> list:
+        """The slice of a sorted list departing between two dates (inclusive)."""
+        lo = bisect_left(rows, (date_from,), key=_sort_key)
+        hi = bisect_right(rows, (date_to, "\uffff"), key=_sort_key)
+        return rows[lo:hi]
+
+    def search(self, origin_station_id, destination_station_id, departure_date) -> list:
+        """Direct legs for a route and date, in departure order."""
+        return self.search_range(
+            origin_station_id, destination_station_id, departure_date, departure_date
+        )
+
+    def search_range(self, origin_station_id, destination_station_id, date_from, date_to) -> list:
+        """Direct legs for a route departing between two dates (inclusive),
+        in departure order."""
+        rows = self.by_route.get((origin_station_id, destination_station_id), [])
+        return self._between(rows, date_from, date_to)
+
+    def train_legs_between(self, train_id: int, date_from: str, date_to: str) -> list:
+        """A train's legs departing between two dates (inclusive)."""
+        return self._between(self.by_train.get(train_id, []), date_from, date_to)
+
+    def active_between(self, date_from: str, date_to: str) -> list:
+        """Legs of active trains departing between two dates (inclusive)."""
+        dates = sorted(d for d in self.by_date if date_from <= d <= date_to)
+        return [
+            row
+            for day in dates
+            for row in self.by_date[day]
+            if row.train_status == "active"
+        ]
+
+    # ---------- patches ----------
+
+    def _insert(self, row: TimetableRow) -> None:
+        self.by_id[row.id] = row
+        for index, key in (
+            (self.by_route, self._route_key(row)),
+            (self.by_train, row.train_id),
+            (self.by_date, row.departure_date),
+        ):
+            rows = list(index.get(key, ()))
+            insort(rows, row, key=_sort_key)
+            index[key] = rows
+
+    def _delete(self, schedule_id: int) -> None:
+        row = self.by_id.pop(schedule_id, None)
+        if row is None:
+            return
+        for index, key in (
+            (self.by_route, self._route_key(row)),
+            (self.by_train, row.train_id),
+            (self.by_date, row.departure_date),
+        ):
+            rows = [r for r in index.get(key, ()) if r.id != schedule_id]
+            if rows:
+                index[key] = rows
+            else:
+                index.pop(key, None)
+
+    def upsert(self, row) -> None:
+        """Add or replace one schedule row."""
+        with self.lock:
+            self._delete(row["id"])
+            self._insert(TimetableRow(row))
+            self.version += 1
+
+    def remove(self, schedule_id: int) -> None:
+        with self.lock:
+            self._delete(schedule_id)
+            self.version += 1
+
+    def replace_train(self, train_id: int, rows) -> None:
+        """Replace every leg of one train (after its name or status changed)."""
+        with self.lock:
+            for row in list(self.by_train.get(train_id, ())):
+                self._delete(row.id)
+            for row in rows:
+                self._insert(TimetableRow(row))
+            self.version += 1
+
+
+_lock = threading.Lock()
+_index: TimetableIndex | None = None
+_index_db: str | None = None
+
+
+def get_index(conn=None) -> TimetableIndex:
+    """Return the timetable for the current database, loading it on first use.
+
+    `conn` is used for the initial load if given (e.g. to read inside the
+    caller's transaction); otherwise a pooled connection is borrowed.
+    """
+    global _index, _index_db
+
+    db_key = str(Path(connection.DB_PATH))
+    index = _index
+    if index is not None and _index_db == db_key:
+        return index
+
+    with _lock:
+        if _index is None or _index_db != db_key:
+            if conn is not None:
+                rows = queries.get_timetable_rows(conn)
+            else:
+                with connection.connect() as own:
+                    rows = queries.get_timetable_rows(own)
+            _index = TimetableIndex(rows)
+            _index_db = db_key
+        return _index
+
+
+def reset() -> None:
+    """Drop the index; the next read reloads it from the database."""
+    global _index, _index_db
+    with _lock:
+        _index = None
+        _index_db = None
+
+
+def _loaded() -> TimetableIndex | None:
+    """The index for the current database, or None if it is not loaded yet
+    (then there is nothing to patch). Call with `_lock` held, so a patch
+    cannot slip in between a concurrent load reading the table and
+    publishing the index."""
+    if _index is not None and _index_db == str(Path(connection.DB_PATH)):
+        return _index
+    return None
+
+
+def schedule_saved(row) -> None:
+    """Patch the index with a committed schedule row (`queries.get_timetable_row`)."""
+    with _lock:
+        index = _loaded()
+        if index is not None:
+            index.upsert(row)
+
+
+def schedule_deleted(schedule_id: int) -> None:
+    with _lock:
+        index = _loaded()
+        if index is not None:
+            index.remove(schedule_id)
+
+
+def train_changed(train_id: int, rows) -> None:
+    """Patch the index after a train was renamed or deactivated; `rows` are
+    its legs from `queries.get_timetable_rows_for_train`."""
+    with _lock:
+        index = _loaded()
+        if index is not None:
+            index.replace_train(train_id, rows)
@@ -1,4 +1,6 @@
 from database import connection, queries
+from services import timetable
+from services.inventory import DEFAULT_COACH_LAYOUT
 from utils.validators import is_valid_name
 
 
@@ -11,14 +13,13 @@ def add_train(train_number: str, train_name: str) -> int:
             "Train name must be alphanumeric (letters, numbers, spaces only)"
         )
 
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         if queries.get_train_by_number(conn, train_number):
             raise ValueError("Train number already exists")
 
-        return queries.create_train(conn, train_number, train_name)
-    finally:
-        connection.close_connection(conn)
+        train_id = queries.create_train(conn, train_number, train_name)
+        queries.create_coaches(conn, train_id, DEFAULT_COACH_LAYOUT)
+        return train_id
 
 
 def update_train(train_id: int, new_name: str) -> None:
@@ -29,32 +30,28 @@ def update_train(train_id: int, new_name: str) -> None:
             "Train name must be alphanumeric (letters, numbers, spaces only)"
         )
 
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         # Check train exists
         if not queries.get_train_by_id(conn, train_id):
             raise ValueError("Train does not exist")
 
         queries.update_train_name(conn, train_id, new_name.strip())
+        legs = queries.get_timetable_rows_for_train(conn, train_id)
 
-    finally:
-        connection.close_connection(conn)
+    timetable.train_changed(train_id, legs)
 
 
 
 def remove_train(train_id: int) -> None:
     """Mark a train as inactive (soft delete)."""
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         queries.delete_train(conn, train_id)
-    finally:
-        connection.close_connection(conn)
+        legs = queries.get_timetable_rows_for_train(conn, train_id)
+
+    timetable.train_changed(train_id, legs)
 
 
 def list_trains() -> list:
     """Return all trains as a list of rows."""
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         return queries.get_all_trains(conn)
-    finally:
-        connection.close_connection(conn)
@@ -5,14 +5,34 @@ Keep logic side-effect free where possible; database operations are delegated to
 """
 
 from __future__ import annotations
+import sqlite3
 from typing import Optional
 
 from database import connection, queries
 from utils.validators import is_valid_email, is_strong_password
-from utils.security import hash_password, verify_password
+from utils.security import hash_password, needs_rehash, verify_dummy, verify_password
 import json
 
 
+# columns with a UNIQUE constraint, as named in signup errors
+_UNIQUE_FIELDS = ("username", "email", "mobile", "aadhaar")
+
+
+def _insert_user(conn, username, email, password_hash, **fields) -> int:
+    """`queries.create_user`, turning a UNIQUE violation into a ValueError
+    naming the field, so signup needs no lookups before its insert."""
+    try:
+        return queries.create_user(conn, username, email, password_hash, **fields)
+    except sqlite3.IntegrityError as e:
+        # e.g. "UNIQUE constraint failed: users.email"
+        message = str(e)
+        if message.startswith("UNIQUE constraint failed"):
+            for field in _UNIQUE_FIELDS:
+                if message.endswith(f"users.{field}"):
+                    raise ValueError(f"{field} already exists") from None
+        raise
+
+
 def create_admin(
     username: str,
     email: str,
@@ -39,16 +59,10 @@ def create_admin(
     if not is_strong_password(password):
         raise ValueError("password must be at least 8 characters")
 
-    conn = connection.get_connection()
-    try:
-        # ensure uniqueness
-        if queries.get_user_by_username(conn, username):
-            raise ValueError("username already exists")
-        if queries.get_user_by_email(conn, email):
-            raise ValueError("email already exists")
-
-        password_hash = hash_password(password)
-        user_id = queries.create_user(
+    # hashing is slow: do it before taking a connection
+    password_hash = hash_password(password)
+    with connection.connect() as conn:
+        user_id = _insert_user(
             conn,
             username,
             email,
@@ -61,11 +75,11 @@ def create_admin(
             aadhaar=aadhaar,
             nationality=nationality,
             address=address,
-            passengers=passengers,
+        )
+        queries.create_passengers(
+            conn, ((user_id, p) for p in queries.decode_passengers(passengers))
         )
         return {"id": user_id, "username": username}
-    finally:
-        connection.close_connection(conn)
 
 
 def create_customer(
@@ -103,17 +117,10 @@ def create_customer(
     if not gender:
         raise ValueError("gender is required for customer signup")
 
-    conn = connection.get_connection()
-    try:
-        if queries.get_user_by_username(conn, username):
-            raise ValueError("username already exists")
-        if email and queries.get_user_by_email(conn, email):
-            raise ValueError("email already exists")
-        if mobile and queries.get_user_by_mobile(conn, mobile):
-            raise ValueError("mobile already exists")
-
-        password_hash = hash_password(password)
-        user_id = queries.create_user(
+    # hashing is slow: do it before taking a connection
+    password_hash = hash_password(password)
+    with connection.connect() as conn:
+        user_id = _insert_user(
             conn,
             username,
             email,
@@ -126,11 +133,31 @@ def create_customer(
             aadhaar=aadhaar,
             nationality=nationality,
             address=address,
-            passengers=passengers,
+        )
+        queries.create_passengers(
+            conn, ((user_id, p) for p in queries.decode_passengers(passengers))
         )
         return {"id": user_id, "username": username}
-    finally:
-        connection.close_connection(conn)
+
+
+def _check_password(user, password: str) -> bool:
+    """Verify `password` for a user row, storing a fresh hash if theirs was
+    made with an older algorithm or cost. Call without holding a
+    connection: hashing takes tens of milliseconds."""
+    if not verify_password(password, user["password_hash"]):
+        return False
+    if needs_rehash(user["password_hash"]):
+        password_hash = hash_password(password)
+        with connection.connect() as conn:
+            queries.update_password_hash(conn, user["id"], password_hash)
+    return True
+
+
+def _reject(password: str, message: str):
+    """Fail a sign-in that has no password hash to check, after spending as
+    long as checking one, so timing does not reveal which accounts exist."""
+    verify_dummy(password)
+    raise ValueError(message)
 
 
 def authenticate_admin(username: str, password: str) -> dict:
@@ -142,26 +169,20 @@ def authenticate_admin(username: str, password: str) -> dict:
     if not username or not password:
         raise ValueError("username and password required")
 
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         user = queries.get_user_by_username(conn, username)
 
-        if not user:
-            raise ValueError("Invalid username or password")
+    if not user:
+        _reject(password, "Invalid username or password")
+    if user["role"] != "admin":
+        _reject(password, "Unauthorized access")
+    if user["status"] != "active":
+        _reject(password, "Admin account is inactive")
 
-        if user["role"] != "admin":
-            raise ValueError("Unauthorized access")
+    if not _check_password(user, password):
+        raise ValueError("Invalid username or password")
 
-        if user["status"] != "active":
-            raise ValueError("Admin account is inactive")
-
-        if not verify_password(password, user["password_hash"]):
-            raise ValueError("Invalid username or password")
-
-        return dict(user)
-
-    finally:
-        connection.close_connection(conn)
+    return dict(user)
 
 
 def authenticate_customer(username: str, password: str) -> dict:
@@ -171,152 +192,106 @@ def authenticate_customer(username: str, password: str) -> dict:
     if not username or not password:
         raise ValueError("username and password required")
 
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         user = queries.get_user_by_username(conn, username)
 
-        if not user:
-            raise ValueError("Invalid username or password")
-
-        if user["role"] != "customer":
-            raise ValueError("Unauthorized access")
+    if not user:
+        _reject(password, "Invalid username or password")
+    if user["role"] != "customer":
+        _reject(password, "Unauthorized access")
+    if user["status"] != "active":
+        _reject(password, "Customer account is inactive")
 
-        if user["status"] != "active":
-            raise ValueError("Customer account is inactive")
+    if not _check_password(user, password):
+        raise ValueError("Invalid username or password")
 
-        if not verify_password(password, user["password_hash"]):
-            raise ValueError("Invalid username or password")
-
-        return dict(user)
-
-    finally:
-        connection.close_connection(conn)
+    return dict(user)
 
 
 def authenticate_user(identifier: str, password: str) -> dict:
-    """Generic authenticate: identifier may be username or email.
+    """Generic authenticate: identifier may be username, email or mobile.
 
     Returns user dict on success. Raises ValueError on failure.
     """
     if not identifier or not password:
         raise ValueError("identifier and password required")
 
-    conn = connection.get_connection()
-    try:
-        # try username first, then email
-        user = queries.get_user_by_username(conn, identifier)
-        if not user:
-            user = queries.get_user_by_email(conn, identifier)
+    with connection.connect() as conn:
+        user = queries.get_user_by_identifier(conn, identifier)
 
-        if not user:
-            raise ValueError("Invalid credentials")
+    if not user:
+        _reject(password, "Invalid credentials")
+    if user["status"] != "active":
+        _reject(password, "Account is inactive")
 
-        if user["status"] != "active":
-            raise ValueError("Account is inactive")
+    if not _check_password(user, password):
+        raise ValueError("Invalid credentials")
 
-        if not verify_password(password, user["password_hash"]):
-            raise ValueError("Invalid credentials")
+    return dict(user)
 
-        return dict(user)
 
-    finally:
-        connection.close_connection(conn)
+### Saved passengers (one `passengers` row each)
+def _passenger_dict(row) -> dict:
+    passenger = {"id": row["id"]}
+    for field in ("name", "dob", "gender"):
+        if row[field] is not None:
+            passenger[field] = row[field]
+    if row["details"]:
+        passenger.update(json.loads(row["details"]))
+    return passenger
 
 
-### Passenger list helpers (JSON stored in users.passengers)
 def list_passengers(user_id: int) -> list:
-    """Return a list of passenger dicts for the given user.
+    """Return a list of passenger dicts for the given user, oldest first.
 
+    Each dict has the passenger's `id` plus the fields it was saved with.
     If no passengers are stored, returns an empty list.
     """
-    conn = connection.get_connection()
-    try:
-        raw = queries.get_passengers_for_user(conn, user_id)
-        if not raw:
-            return []
-        try:
-            return json.loads(raw)
-        except Exception:
-            # corrupted JSON -> return empty list to avoid crashes
-            return []
-    finally:
-        connection.close_connection(conn)
-
-
-def add_passenger(user_id: int, passenger: dict) -> list:
-    """Add a passenger (dict) to the user's passengers list and return updated list."""
-    conn = connection.get_connection()
-    try:
-        current = queries.get_passengers_for_user(conn, user_id)
-        if not current:
-            lst = []
-        else:
-            try:
-                lst = json.loads(current)
-            except Exception:
-                lst = []
-
-        lst.append(passenger)
-        queries.save_passengers_for_user(conn, user_id, json.dumps(lst))
-        return lst
-    finally:
-        connection.close_connection(conn)
-
-
-def update_passenger(user_id: int, index: int, passenger: dict) -> list:
-    """Update passenger at 0-based index. Returns updated list.
-
-    Raises IndexError if index is out of range.
+    with connection.connect() as conn:
+        return [_passenger_dict(row) for row in queries.get_passengers(conn, user_id)]
+
+
+def get_passenger(user_id: int, passenger_id: int) -> dict:
+    """Return one of the user's saved passengers by id.
+
+    Raises ValueError if the user has no passenger with that id.
     """
-    conn = connection.get_connection()
-    try:
-        current = queries.get_passengers_for_user(conn, user_id)
-        if not current:
-            raise IndexError("no passengers to update")
-        try:
-            lst = json.loads(current)
-        except Exception:
-            raise IndexError("passenger list corrupted")
+    with connection.connect() as conn:
+        row = queries.get_passenger(conn, user_id, passenger_id)
+    if row is None:
+        raise ValueError("Passenger not found")
+    return _passenger_dict(row)
 
-        if index < 0 or index >= len(lst):
-            raise IndexError("passenger index out of range")
 
-        lst[index] = passenger
-        queries.save_passengers_for_user(conn, user_id, json.dumps(lst))
-        return lst
-    finally:
-        connection.close_connection(conn)
+def add_passenger(user_id: int, passenger: dict) -> dict:
+    """Save a passenger (dict) for the user and return it with its `id`."""
+    with connection.connect() as conn:
+        passenger_id = queries.create_passenger(conn, user_id, passenger)
+    return {**passenger, "id": passenger_id}
 
 
-def remove_passenger(user_id: int, index: int) -> list:
-    """Remove passenger at 0-based index. Returns updated list.
+def update_passenger(user_id: int, passenger_id: int, passenger: dict) -> dict:
+    """Replace the fields of one of the user's passengers and return it.
 
-    Raises IndexError if index is out of range.
+    Raises ValueError if the user has no passenger with that id.
     """
-    conn = connection.get_connection()
-    try:
-        current = queries.get_passengers_for_user(conn, user_id)
-        if not current:
-            raise IndexError("no passengers to remove")
-        try:
-            lst = json.loads(current)
-        except Exception:
-            raise IndexError("passenger list corrupted")
+    with connection.connect() as conn:
+        if not queries.update_passenger(conn, user_id, passenger_id, passenger):
+            raise ValueError("Passenger not found")
+    return {**passenger, "id": passenger_id}
+
 
-        if index < 0 or index >= len(lst):
-            raise IndexError("passenger index out of range")
+def remove_passenger(user_id: int, passenger_id: int) -> None:
+    """Delete one of the user's passengers.
 
-        lst.pop(index)
-        queries.save_passengers_for_user(conn, user_id, json.dumps(lst))
-        return lst
-    finally:
-        connection.close_connection(conn)
+    Raises ValueError if the user has no passenger with that id.
+    """
+    with connection.connect() as conn:
+        if not queries.delete_passenger(conn, user_id, passenger_id):
+            raise ValueError("Passenger not found")
 
 
 def get_all_users() -> list[dict]:
     """Return a list of all users (customer) in the system."""
-    conn = connection.get_connection()
-    try:
+    with connection.connect() as conn:
         return queries.get_all_users(conn)
-    finally:
-        connection.close_connection(conn)
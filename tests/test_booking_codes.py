@@ -0,0 +1,94 @@
+import multiprocessing
+import threading
+
+import pytest
+
+from services import booking_codes
+from services.booking_codes import BookingCodeGenerator
+
+BASE = 1_780_000_000.0  # 2026-05-28 UTC
+
+
+class StepClock:
+    """Advances one millisecond every `calls_per_ms` reads."""
+
+    def __init__(self, start=BASE, calls_per_ms=100):
+        self.calls = 0
+        self.start = start
+        self.calls_per_ms = calls_per_ms
+
+    def __call__(self):
+        self.calls += 1
+        return self.start + (self.calls // self.calls_per_ms) / 1000
+
+
+def test_code_format():
+    code = BookingCodeGenerator(7, clock=lambda: BASE).next_code()
+    assert code.startswith("BK20260528")
+    assert len(code) == 2 + 8 + booking_codes.SUFFIX_LENGTH
+    assert code[2:].isalnum() and code.isupper()
+
+
+def test_codes_unique_when_sequence_overflows():
+    # 1024 codes fit in one millisecond; the rest wait for the next one
+    generator = BookingCodeGenerator(1, clock=StepClock(calls_per_ms=5000))
+    codes = [generator.next_code() for _ in range(5000)]
+    assert len(set(codes)) == len(codes)
+
+
+def test_codes_unique_when_clock_goes_backwards():
+    times = iter([BASE + 1, BASE, BASE - 5] + [BASE + 2] * 10)
+    generator = BookingCodeGenerator(1, clock=lambda: next(times))
+    codes = [generator.next_code() for _ in range(6)]
+    assert len(set(codes)) == 6
+
+
+def test_workers_never_collide():
+    clock = lambda: BASE  # noqa: E731 - same instant for both
+    a = BookingCodeGenerator(1, clock=clock)
+    b = BookingCodeGenerator(2, clock=clock)
+    assert {a.next_code() for _ in range(500)}.isdisjoint(
+        {b.next_code() for _ in range(500)}
+    )
+
+
+def test_worker_id_bounds():
+    with pytest.raises(ValueError):
+        BookingCodeGenerator(-1)
+    with pytest.raises(ValueError):
+        BookingCodeGenerator(booking_codes.MAX_WORKER_ID + 1)
+
+
+def test_threads_share_generator_without_duplicates():
+    codes = []
+    lock = threading.Lock()
+
+    def mint():
+        batch = [booking_codes.next_code() for _ in range(2000)]
+        with lock:
+            codes.extend(batch)
+
+    threads = [threading.Thread(target=mint) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(codes)) == len(codes) == 16000
+
+
+def _mint(queue):
+    queue.put([booking_codes.next_code() for _ in range(2000)])
+
+
+def test_processes_mint_unique_codes():
+    booking_codes.next_code()  # parent generator exists before forking
+    ctx = multiprocessing.get_context()
+    queue = ctx.Queue()
+    workers = [ctx.Process(target=_mint, args=(queue,)) for _ in range(4)]
+    for w in workers:
+        w.start()
+    codes = [code for _ in workers for code in queue.get(timeout=30)]
+    for w in workers:
+        w.join()
+    codes += [booking_codes.next_code() for _ in range(2000)]
+    assert len(set(codes)) == len(codes) == 10000
@@ -0,0 +1,486 @@
+import sqlite3
+
+import pytest
+
+from database import connection, queries
+from services import booking as booking_service
+from services import user as user_service
+from services.payments import process_payment
+
+PASSWORD = "Str0ng!Pass"
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+def make_customer(username):
+    return user_service.create_customer(
+        username,
+        f"{username}@example.com",
+        PASSWORD,
+        full_name="Booking Tester",
+        dob="1990-01-01",
+        gender="other",
+    )
+
+
+def book_seeded_leg(username, **overrides):
+    # seeded leg: train 1, Indore (1) -> Rewa (2) on 2026-02-15, fare 220
+    params = dict(
+        username=username,
+        train_id=1,
+        origin_station_id=1,
+        destination_station_id=2,
+        travel_date="2026-02-15",
+        fare=220,
+        payment=process_payment(amount=220, method="card"),
+    )
+    params.update(overrides)
+    return booking_service.book_ticket(**params)
+
+
+def test_booking_history_includes_schedule_details(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("histuser")
+
+    booking = book_seeded_leg("histuser")
+
+    history = booking_service.get_booking_history("histuser")
+    assert len(history) == 1
+    row = history[0]
+    assert row["booking_code"] == booking["booking_code"]
+    assert row["departure_time"] == "06:00"
+    assert row["arrival_time"] == "09:30"
+    assert row["departure_date"] == "2026-02-15"
+    assert row["arrival_date"] == "2026-02-15"
+    assert row["payment_status"] == "success"
+
+
+def unlink_schedule(booking_code):
+    # as an older booking the schedule_id backfill could not resolve
+    with connection.connect() as conn:
+        conn.execute(
+            "UPDATE bookings SET schedule_id = NULL, end_schedule_id = NULL "
+            "WHERE booking_code = ?",
+            (booking_code,),
+        )
+
+
+def test_unlinked_booking_details_fall_back_to_matching_leg(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("oldbooker")
+    booking = book_seeded_leg("oldbooker")
+    unlink_schedule(booking["booking_code"])
+
+    [row] = booking_service.get_booking_history("oldbooker")
+    assert (row["departure_date"], row["departure_time"]) == ("2026-02-15", "06:00")
+    assert (row["arrival_date"], row["arrival_time"]) == ("2026-02-15", "09:30")
+
+
+def test_unlinked_booking_can_be_cancelled(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("oldcanceller")
+    booking = book_seeded_leg("oldcanceller")
+    unlink_schedule(booking["booking_code"])
+
+    # the seeded run has departed: 10% is kept
+    result = booking_service.cancel_booking_by_code(booking["booking_code"])
+    assert (result["refund_amount"], result["deduction"]) == (198, 22)
+    [row] = booking_service.get_booking_history("oldcanceller")
+    assert (row["booking_status"], row["payment_status"]) == ("cancelled", "refunded")
+
+
+def test_booking_stores_schedule_id(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    make_customer("sidUser")
+
+    booking = book_seeded_leg("sidUser")
+
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    row = queries.get_booking_by_code(conn, booking["booking_code"])
+    schedule = queries.get_schedule_by_id(conn, row["schedule_id"])
+    conn.close()
+    assert schedule["train_id"] == 1
+    assert schedule["departure_date"] == "2026-02-15"
+
+
+def test_book_ticket_unknown_user(tmp_path):
+    setup_temp_db(tmp_path)
+    with pytest.raises(ValueError):
+        book_seeded_leg("nobody")
+
+
+def test_history_pages_follow_cursor(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("pageuser")
+    codes = [book_seeded_leg("pageuser")["booking_code"] for _ in range(5)]
+
+    page1, cursor = booking_service.get_booking_history_page("pageuser", page_size=2)
+    page2, cursor = booking_service.get_booking_history_page(
+        "pageuser", cursor=cursor, page_size=2
+    )
+    page3, cursor = booking_service.get_booking_history_page(
+        "pageuser", cursor=cursor, page_size=2
+    )
+
+    assert cursor is None
+    seen = [b["booking_code"] for b in page1 + page2 + page3]
+    assert seen == list(reversed(codes))
+
+
+def test_iter_history_filters_by_status_and_date(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("iteruser")
+    first = book_seeded_leg("iteruser")["booking_code"]
+    book_seeded_leg("iteruser")
+    # seeded leg: train 1, Rewa (2) -> Bhopal (3) on 2026-02-12, fare 200
+    other_day = book_seeded_leg(
+        "iteruser", origin_station_id=2, destination_station_id=3, travel_date="2026-02-12"
+    )["booking_code"]
+    booking_service.cancel_booking_by_code(first)
+
+    all_rows = list(booking_service.iter_booking_history("iteruser", page_size=1))
+    assert len(all_rows) == 3
+
+    cancelled = list(booking_service.iter_booking_history("iteruser", status="cancelled"))
+    assert [b["booking_code"] for b in cancelled] == [first]
+
+    dated = list(
+        booking_service.iter_booking_history(
+            "iteruser", start_date="2026-02-01", end_date="2026-02-13"
+        )
+    )
+    assert [b["booking_code"] for b in dated] == [other_day]
+
+
+def test_history_rejects_bad_filters(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("badfilter")
+    with pytest.raises(ValueError):
+        booking_service.get_booking_history_page("badfilter", status="pending")
+    with pytest.raises(ValueError):
+        list(booking_service.iter_booking_history("badfilter", start_date="15-02-2026"))
+
+
+def test_booking_reserves_distinct_seats(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("seatuser")
+
+    first = book_seeded_leg("seatuser")
+    second = book_seeded_leg("seatuser", seat_class="3ac")
+
+    assert (first["coach_code"], first["seat_number"]) == ("S1", 1)
+    assert (second["coach_code"], second["seat_class"], second["seat_number"]) == ("B1", "3ac", 1)
+
+    history = booking_service.get_booking_history("seatuser")
+    assert {(b["coach_code"], b["seat_number"]) for b in history} == {("S1", 1), ("B1", 1)}
+
+
+def test_cancelled_booking_releases_seat(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("releaser")
+
+    first = book_seeded_leg("releaser")
+    booking_service.cancel_booking_by_code(first["booking_code"])
+
+    again = book_seeded_leg("releaser")
+    assert (again["coach_code"], again["seat_number"]) == ("S1", 1)
+
+
+def count_rows(table):
+    with connection.connect() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_retry_with_idempotency_key_returns_original_booking(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    make_customer("retryuser")
+
+    first = book_seeded_leg("retryuser", idempotency_key="req-1")
+
+    # a replay must not validate or allocate again
+    def fail(*args, **kwargs):
+        raise AssertionError("retry repeated the booking work")
+
+    monkeypatch.setattr(booking_service.inventory, "find_journey", fail)
+    monkeypatch.setattr(queries, "get_user_by_username", fail)
+
+    again = book_seeded_leg("retryuser", idempotency_key="req-1")
+
+    assert again == first
+    assert count_rows("bookings") == 1
+    assert count_rows("payments") == 1
+
+
+def test_idempotency_key_reused_for_other_request_is_rejected(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("keyreuse")
+    book_seeded_leg("keyreuse", idempotency_key="req-2")
+
+    with pytest.raises(ValueError):
+        book_seeded_leg("keyreuse", idempotency_key="req-2", destination_station_id=3)
+
+    assert count_rows("bookings") == 1
+
+
+def test_failed_booking_does_not_store_key(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("failkey")
+
+    with pytest.raises(ValueError):
+        book_seeded_leg("failkey", idempotency_key="req-3", seat_class="1ac")
+    assert count_rows("idempotency_keys") == 0
+
+    booking = book_seeded_leg("failkey", idempotency_key="req-4")
+    assert booking["status"] == "confirmed"
+
+
+def test_concurrent_retries_book_once(tmp_path):
+    import threading
+
+    setup_temp_db(tmp_path)
+    make_customer("racer")
+    results, errors = [], []
+
+    def attempt():
+        try:
+            results.append(book_seeded_leg("racer", idempotency_key="req-5"))
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=attempt) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    assert len({r["booking_code"] for r in results}) == 1
+    assert count_rows("bookings") == 1
+
+
+def test_booking_rolls_back_when_payment_insert_fails(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    make_customer("atomic")
+
+    def broken_payment(*args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(queries, "create_payment", broken_payment)
+    with pytest.raises(sqlite3.OperationalError):
+        book_seeded_leg("atomic")
+
+    assert count_rows("bookings") == 0
+
+
+def test_cancel_rolls_back_when_refund_fails(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    make_customer("halfcancel")
+    booking = book_seeded_leg("halfcancel")
+
+    def broken_refund(*args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(queries, "refund_payment_by_booking_id", broken_refund)
+    with pytest.raises(sqlite3.OperationalError):
+        booking_service.cancel_booking_by_code(booking["booking_code"])
+
+    with connection.connect() as conn:
+        row = queries.get_booking_by_code(conn, booking["booking_code"])
+    assert row["status"] == "confirmed"
+
+
+def test_booking_commits_once(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    make_customer("onecommit")
+    connection.close_all()  # pooled connections are reopened with tracing
+
+    statements = []
+    real_open = connection._open
+
+    def traced_open(db_path):
+        conn = real_open(db_path)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    monkeypatch.setattr(connection, "_open", traced_open)
+    book_seeded_leg("onecommit")
+
+    assert [s for s in statements if s.strip().upper() == "COMMIT"] == ["COMMIT"]
+
+
+def make_family(username, size):
+    user = make_customer(username)
+    for i in range(size):
+        user_service.add_passenger(
+            user["id"], {"name": f"Traveller {i}", "dob": "2000-01-01", "gender": "other"}
+        )
+    return user
+
+
+def book_seeded_group(username, indices, **overrides):
+    # seeded schedule 1: train 1, Indore -> Rewa on 2026-02-15, fare 220
+    params = dict(
+        payment=process_payment(amount=220 * len(indices), method="upi"),
+    )
+    params.update(overrides)
+    return booking_service.book_group(username, 1, indices, **params)
+
+
+def test_group_booking_books_every_passenger_with_one_payment(tmp_path):
+    setup_temp_db(tmp_path)
+    make_family("family", 4)
+
+    group = book_seeded_group("family", [0, 2, 3])
+
+    tickets = group["tickets"]
+    assert [t["passenger_name"] for t in tickets] == ["Traveller 0", "Traveller 2", "Traveller 3"]
+    assert len({t["booking_code"] for t in tickets}) == 3
+    assert group["group_code"] == tickets[0]["booking_code"]
+    assert [(t["coach_code"], t["seat_number"]) for t in tickets] == [("S1", 1), ("S1", 2), ("S1", 3)]
+    assert group["total_fare"] == 660
+    assert count_rows("bookings") == 3
+    assert count_rows("payments") == 1
+
+    history = booking_service.get_booking_history("family")
+    assert {row["passenger_name"] for row in history} == {"Traveller 0", "Traveller 2", "Traveller 3"}
+    assert {row["payment_amount"] for row in history} == {660}
+
+
+def test_group_booking_is_all_or_nothing(tmp_path):
+    setup_temp_db(tmp_path)
+    make_family("bigfamily", 3)
+    with connection.connect() as conn:
+        conn.execute("DELETE FROM coaches WHERE train_id = 1")
+        queries.create_coaches(conn, 1, [("C1", "chair", 2)])
+
+    with pytest.raises(ValueError, match="Only 2 seats"):
+        book_seeded_group("bigfamily", [0, 1, 2])
+
+    assert count_rows("bookings") == 0
+    assert count_rows("payments") == 0
+
+
+@pytest.mark.parametrize("indices", [[], [0, 0], [5], list(range(7))])
+def test_group_booking_validates_passengers(tmp_path, indices):
+    setup_temp_db(tmp_path)
+    make_family("checker", 2)
+
+    with pytest.raises(ValueError):
+        book_seeded_group("checker", indices, payment=process_payment(amount=220, method="card"))
+
+
+def test_group_payment_refunded_with_last_ticket(tmp_path):
+    setup_temp_db(tmp_path)
+    make_family("canceller", 2)
+    group = book_seeded_group("canceller", [0, 1])
+    first, second = (t["booking_code"] for t in group["tickets"])
+
+    def payment_status():
+        with connection.connect() as conn:
+            return conn.execute("SELECT status FROM payments").fetchone()[0]
+
+    booking_service.cancel_booking_by_code(second)
+    assert payment_status() == "success"
+
+    booking_service.cancel_booking_by_code(first)
+    assert payment_status() == "refunded"
+
+
+def test_group_refunds_recorded_per_ticket(tmp_path):
+    setup_temp_db(tmp_path)
+    make_family("partial", 3)
+    group = book_seeded_group("partial", [0, 1, 2])
+    first, *rest = (t["booking_code"] for t in group["tickets"])
+
+    def payment():
+        with connection.connect() as conn:
+            return tuple(
+                conn.execute("SELECT status, amount, refunded_amount FROM payments").fetchone()
+            )
+
+    # the seeded run has departed: every cancellation loses 10%
+    result = booking_service.cancel_booking_by_code(rest[0])
+    assert (result["refund_amount"], result["deduction"]) == (198, 22)
+    assert payment() == ("success", 660, 198)
+
+    for code in (rest[1], first):
+        booking_service.cancel_booking_by_code(code)
+    assert payment() == ("refunded", 660, 3 * 198)
+
+
+def test_cancel_train_run_refunds_rest_of_partly_refunded_group(tmp_path):
+    setup_temp_db(tmp_path)
+    make_family("partrun", 2)
+    group = book_seeded_group("partrun", [0, 1])
+    booking_service.cancel_booking_by_code(group["tickets"][1]["booking_code"])
+
+    summary = booking_service.cancel_train_run(1, "2026-02-15")
+    assert summary["refund_amount"] == 440 - 198
+    with connection.connect() as conn:
+        row = conn.execute("SELECT status, refunded_amount FROM payments").fetchone()
+    assert tuple(row) == ("refunded", 440)
+
+
+def payment_statuses():
+    with connection.connect() as conn:
+        return [
+            row[0] for row in conn.execute("SELECT status FROM payments ORDER BY id")
+        ]
+
+
+def test_cancel_train_run_cancels_and_refunds_every_booking(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("runner1")
+    make_family("runner2", 2)
+
+    single = book_seeded_leg("runner1")
+    through = book_seeded_leg(  # Indore -> Bhopal: both legs of the run
+        "runner1", destination_station_id=3, fare=400,
+        payment=process_payment(amount=400, method="card"),
+    )
+    group = book_seeded_group("runner2", [0, 1])
+    other = book_seeded_leg(  # train 2 on the 16th: not affected
+        "runner1", train_id=2, origin_station_id=4, destination_station_id=5,
+        travel_date="2026-02-16", fare=150,
+        payment=process_payment(amount=150, method="card"),
+    )
+
+    summary = booking_service.cancel_train_run(1, "2026-02-15")
+
+    assert summary["bookings_cancelled"] == 4
+    assert summary["users_affected"] == 2
+    assert summary["payments_refunded"] == 3
+    assert summary["refund_amount"] == 220 + 400 + 440
+    assert payment_statuses() == ["refunded", "refunded", "refunded", "success"]
+
+    with connection.connect() as conn:
+        statuses = {
+            code: queries.get_booking_by_code(conn, code)["status"]
+            for code in (
+                single["booking_code"],
+                through["booking_code"],
+                other["booking_code"],
+                *(t["booking_code"] for t in group["tickets"]),
+            )
+        }
+    assert statuses.pop(other["booking_code"]) == "confirmed"
+    assert set(statuses.values()) == {"cancelled"}
+
+    again = booking_service.cancel_train_run(1, "2026-02-15")
+    assert again["bookings_cancelled"] == again["payments_refunded"] == 0
+
+
+def test_cancel_train_run_requires_a_run_on_that_date(tmp_path):
+    setup_temp_db(tmp_path)
+
+    with pytest.raises(ValueError, match="does not run"):
+        booking_service.cancel_train_run(1, "2026-02-16")
+    with pytest.raises(ValueError, match="YYYY-MM-DD"):
+        booking_service.cancel_train_run(1, "15-02-2026")
@@ -0,0 +1,106 @@
+import questionary
+
+from database import connection
+from cli import passenger as passenger_cli
+from services import booking as booking_service
+from services import user as user_service
+from services.payments import process_payment
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+class Dummy:
+    def __init__(self, val):
+        self._val = val
+
+    def ask(self):
+        return self._val
+
+
+def test_booking_history_pages_lazily(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    user_service.create_customer(
+        "clihist", "clihist@example.com", "Str0ng!Pass",
+        full_name="Cli Hist", dob="1990-01-01", gender="other",
+    )
+    for _ in range(3):
+        booking_service.book_ticket(
+            username="clihist", train_id=1, origin_station_id=1,
+            destination_station_id=2, travel_date="2026-02-15", fare=220,
+            payment=process_payment(amount=220, method="card"),
+        )
+
+    pages_seen = []
+    real_page = booking_service.get_booking_history_page
+
+    def spy_page(username, **kwargs):
+        rows, cursor = real_page(username, page_size=2, **kwargs)
+        pages_seen.append(len(rows))
+        return rows, cursor
+
+    monkeypatch.setattr(booking_service, "get_booking_history_page", spy_page)
+
+    answers = ["All bookings", "Next page", "Back"]
+    monkeypatch.setattr(questionary, "select", lambda *a, **k: Dummy(answers.pop(0)))
+
+    passenger_cli.booking_history_dashboard("clihist")
+
+    assert pages_seen == [2, 1]
+    assert answers == []
+
+
+def test_connecting_journeys_offer_single_train_rides(tmp_path):
+    from rich.console import Console
+
+    setup_temp_db(tmp_path)
+
+    # Indore -> Delhi has no direct leg, but train 1 covers it over three
+    rides = passenger_cli._show_connecting_journeys(Console(), 1, 4, "2026-02-15")
+
+    assert len(rides) == 1
+    assert rides[0]["train_id"] == 1
+    assert len(rides[0]["schedule_ids"]) == 3
+    assert rides[0]["fare"] == 700
+
+
+def test_saved_passengers_are_edited_by_id(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    uid = user_service.create_customer(
+        "clipass", "clipass@example.com", "Str0ng!Pass",
+        full_name="Cli Pass", dob="1990-01-01", gender="other",
+    )["id"]
+    a, b, c = (user_service.add_passenger(uid, {"name": n}) for n in "ABC")
+
+    real_list = user_service.list_passengers
+    removed = []
+
+    def stale_list(user_id):
+        rows = real_list(user_id)
+        if not removed:
+            # another session removes A just after the menu shows [A, B, C]
+            user_service.remove_passenger(uid, a["id"])
+            removed.append(a)
+        return rows
+
+    monkeypatch.setattr(user_service, "list_passengers", stale_list)
+    selects = [
+        "Remove Passenger", f"{b['id']} - B",
+        "Edit Passenger", f"{c['id']} - C", "female",
+        "Back",
+    ]
+    texts = ["Cee", "2015-06-01"]
+    monkeypatch.setattr(questionary, "select", lambda *a, **k: Dummy(selects.pop(0)))
+    monkeypatch.setattr(questionary, "text", lambda *a, **k: Dummy(texts.pop(0)))
+
+    passenger_cli.saved_passengers_dashboard("clipass")
+
+    assert selects == [] and texts == []
+    assert real_list(uid) == [
+        {"id": c["id"], "name": "Cee", "dob": "2015-06-01", "gender": "female"}
+    ]
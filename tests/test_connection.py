@@ -0,0 +1,59 @@
+import sqlite3
+
+import pytest
+
+from database import connection, queries
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    return db_file
+
+
+def test_connect_reuses_pooled_connection(tmp_path):
+    setup_temp_db(tmp_path)
+
+    with connection.connect() as conn:
+        first = conn
+        assert queries.get_station_by_code(conn, "IND001") is not None
+
+    with connection.connect() as conn:
+        assert conn is first
+
+
+def test_migrations_run_once_per_db(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+
+    calls = []
+    real_open = connection._open
+
+    def counting_open(db_path):
+        conn = real_open(db_path)
+        calls.append(db_path)
+        return conn
+
+    monkeypatch.setattr(connection, "_open", counting_open)
+
+    for _ in range(5):
+        with connection.connect() as conn:
+            queries.get_all_stations(conn)
+
+    # one connection to run migrations, one pooled connection reused
+    assert len(calls) == 2
+
+
+def test_connect_rolls_back_on_error(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        with connection.connect() as conn:
+            conn.execute(
+                "INSERT INTO stations (code, name, city) VALUES ('TMP001', 'Tmp', 'Tmp')"
+            )
+            raise RuntimeError("boom")
+
+    raw = sqlite3.connect(db_file)
+    row = raw.execute("SELECT 1 FROM stations WHERE code = 'TMP001'").fetchone()
+    raw.close()
+    assert row is None
@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+from database import connection
+from services import csa
+from services import schedule as schedule_service
+from services.csa import ConnectionScan
+from services.journey import JourneyPlanner, _minutes
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+_ids = iter(range(1, 10**9))
+
+
+def leg(train, origin, dest, dep, arr, day="2026-03-01", arr_day=None, fare=100):
+    return {
+        "id": next(_ids),
+        "train_id": train,
+        "train_number": f"T{train}",
+        "train_name": f"Train {train}",
+        "origin_station_id": origin,
+        "destination_station_id": dest,
+        "departure_date": day,
+        "departure_time": dep,
+        "arrival_date": arr_day or day,
+        "arrival_time": arr,
+        "fare": fare,
+    }
+
+
+def test_seeded_route_over_three_legs(tmp_path):
+    setup_temp_db(tmp_path)
+
+    result = csa.earliest_arrival(1, 4, "2026-02-15")
+
+    assert result["transfers"] == 0
+    assert result["rides"][0]["schedule_ids"] == [1, 2, 3]
+    assert (result["arrival_date"], result["arrival_time"]) == ("2026-02-15", "18:30")
+
+
+def test_departure_time_is_respected():
+    router = ConnectionScan(
+        [
+            leg(1, 1, 2, "08:00", "09:00"),
+            leg(2, 1, 2, "12:00", "13:00"),
+        ]
+    )
+    result = router.earliest_arrival(1, 2, _minutes("2026-03-01", "08:01"))
+    assert result["rides"][0]["train_id"] == 2
+
+
+def test_overnight_legs_and_connection_time():
+    router = ConnectionScan(
+        [
+            leg(1, 1, 2, "21:00", "01:00", arr_day="2026-03-02"),
+            leg(2, 2, 3, "01:10", "03:00", day="2026-03-02"),  # too tight
+            leg(3, 2, 3, "01:40", "04:00", day="2026-03-02"),
+        ]
+    )
+    start = _minutes("2026-03-01", "00:00")
+
+    result = router.earliest_arrival(1, 3, start, min_connection=30)
+    assert [r["train_id"] for r in result["rides"]] == [1, 3]
+    assert (result["arrival_date"], result["arrival_time"]) == ("2026-03-02", "04:00")
+
+    relaxed = router.earliest_arrival(1, 3, start, min_connection=5)
+    assert [r["train_id"] for r in relaxed["rides"]] == [1, 2]
+
+
+def test_unreachable_returns_none():
+    router = ConnectionScan([leg(1, 1, 2, "08:00", "09:00")])
+    start = _minutes("2026-03-01", "00:00")
+    assert router.earliest_arrival(2, 1, start) is None
+    assert router.earliest_arrival(1, 99, start) is None
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_agrees_with_journey_planner(seed):
+    rng = random.Random(seed)
+    legs = []
+    for train in range(1, 9):
+        station = rng.randint(1, 7)
+        minute = rng.randint(5 * 60, 14 * 60)
+        for _ in range(rng.randint(1, 4)):
+            nxt = rng.choice([s for s in range(1, 8) if s != station])
+            ride = rng.randint(30, 240)
+            arrive = minute + ride
+            legs.append(
+                leg(
+                    train, station, nxt,
+                    f"{minute // 60 % 24:02d}:{minute % 60:02d}",
+                    f"{arrive // 60 % 24:02d}:{arrive % 60:02d}",
+                    day=f"2026-03-0{1 + minute // 1440}",
+                    arr_day=f"2026-03-0{1 + arrive // 1440}",
+                )
+            )
+            station = nxt
+            minute = arrive + rng.randint(0, 60)
+
+    origin, destination = rng.sample(range(1, 8), 2)
+    planned = JourneyPlanner(legs).plan(origin, destination, "2026-03-01")["earliest"]
+    scanned = ConnectionScan(legs).earliest_arrival(
+        origin, destination, _minutes("2026-03-01", "00:00")
+    )
+
+    # the planner only departs on the travel date; the scan may leave later
+    if planned is None:
+        assert scanned is None or scanned["departure_date"] != "2026-03-01"
+    else:
+        assert (scanned["arrival_date"], scanned["arrival_time"]) == (
+            planned["arrival_date"],
+            planned["arrival_time"],
+        )
+
+
+def test_router_follows_timetable_changes(tmp_path):
+    setup_temp_db(tmp_path)
+    assert csa.earliest_arrival(5, 1, "2026-02-15") is None
+
+    schedule_service.create_schedule(
+        2, 5, 1, "2026-02-16", "2026-02-17", "22:00", "02:00", 300
+    )
+    # the old router answers while the new one is built off the request path
+    assert csa.earliest_arrival(5, 1, "2026-02-15") is None
+    rebuild = csa._rebuild
+    if rebuild is not None:
+        rebuild.join()
+
+    result = csa.earliest_arrival(5, 1, "2026-02-15")
+    assert (result["arrival_date"], result["arrival_time"]) == ("2026-02-17", "02:00")
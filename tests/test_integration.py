@@ -135,3 +135,25 @@ def test_customer_session_expiry_across_rerun(tmp_path, monkeypatch):
     s = queries.get_session(conn, token)
     assert s is None
     conn.close()
+
+
+def test_main_menu_auto_login_from_device_session(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    user = user_service.create_customer(
+        "auto_cust", "auto_cust@example.com", "Str0ng!Pass",
+        full_name="Auto Cust", dob="1992-02-02", gender="other",
+    )
+    token = session_service.create_session_for_user(user["id"])
+    session_service.remember_device(token)
+
+    opened = []
+    monkeypatch.setattr(
+        passenger_cli,
+        "passenger_dashboard",
+        lambda username, session_token=None: opened.append((username, session_token)),
+    )
+    monkeypatch.setattr(questionary, "select", lambda *a, **k: DummyPrompt("Exit"))
+    with pytest.raises(SystemExit):
+        menu_cli.main_menu()
+
+    assert opened == [("auto_cust", token)]
@@ -0,0 +1,179 @@
+import random
+
+import pytest
+
+from database import connection
+from services import journey
+from services.journey import JourneyPlanner
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+_ids = iter(range(1, 10**9))
+
+
+def leg(train, origin, dest, dep, arr, fare, day="2026-03-01", arr_day=None):
+    return {
+        "id": next(_ids),
+        "train_id": train,
+        "train_number": f"T{train}",
+        "train_name": f"Train {train}",
+        "origin_station_id": origin,
+        "destination_station_id": dest,
+        "departure_date": day,
+        "departure_time": dep,
+        "arrival_date": arr_day or day,
+        "arrival_time": arr,
+        "fare": fare,
+    }
+
+
+def test_seeded_indore_to_delhi_uses_same_train_continuation(tmp_path):
+    setup_temp_db(tmp_path)
+
+    result = journey.plan_journeys(1, 4, "2026-02-15")
+
+    earliest = result["earliest"]
+    assert earliest["transfers"] == 0
+    assert earliest["rides"][0]["train_number"] == "12001"
+    assert len(earliest["rides"][0]["schedule_ids"]) == 3
+    assert (earliest["departure_time"], earliest["arrival_time"]) == ("06:00", "18:30")
+    assert earliest["fare"] == 220 + 180 + 300
+
+
+def test_transfer_respects_minimum_connection_time():
+    planner = JourneyPlanner(
+        [
+            leg(1, 1, 2, "08:00", "10:00", 100),
+            leg(2, 2, 3, "10:10", "11:00", 100),  # too tight a change
+            leg(3, 2, 3, "10:45", "12:00", 100),
+        ]
+    )
+
+    result = planner.plan(1, 3, "2026-03-01", min_connection=30)
+    rides = result["earliest"]["rides"]
+    assert [r["train_id"] for r in rides] == [1, 3]
+    assert result["earliest"]["transfers"] == 1
+
+    relaxed = planner.plan(1, 3, "2026-03-01", min_connection=5)
+    assert [r["train_id"] for r in relaxed["earliest"]["rides"]] == [1, 2]
+
+
+def test_staying_seated_does_not_bypass_connection_time():
+    planner = JourneyPlanner(
+        [
+            leg(1, 1, 2, "08:00", "10:00", 100),
+            leg(1, 2, 4, "10:05", "13:00", 100),  # train 1 continues elsewhere
+            leg(2, 2, 3, "10:10", "11:00", 100),  # only 10 minutes after arrival
+        ]
+    )
+    assert planner.plan(1, 3, "2026-03-01", min_connection=30)["earliest"] is None
+
+
+def test_earliest_and_cheapest_can_differ():
+    planner = JourneyPlanner(
+        [
+            leg(1, 1, 3, "08:00", "10:00", 900),  # fast, expensive
+            leg(2, 1, 2, "08:30", "12:00", 100),
+            leg(3, 2, 3, "13:00", "16:00", 100),
+        ]
+    )
+    result = planner.plan(1, 3, "2026-03-01")
+    assert result["earliest"]["fare"] == 900
+    assert result["cheapest"]["fare"] == 200
+    assert result["cheapest"]["arrival_time"] == "16:00"
+
+    # a cheaper itinerary arriving too long after the earliest is not offered
+    limited = planner.plan(1, 3, "2026-03-01", max_delay=60)
+    assert limited["cheapest"]["fare"] == 900
+
+
+def test_overnight_legs():
+    planner = JourneyPlanner(
+        [
+            leg(1, 1, 2, "22:00", "04:00", 100, arr_day="2026-03-02"),
+            leg(2, 2, 3, "05:00", "07:00", 100, day="2026-03-02"),
+        ]
+    )
+    earliest = planner.plan(1, 3, "2026-03-01")["earliest"]
+    assert (earliest["arrival_date"], earliest["arrival_time"]) == ("2026-03-02", "07:00")
+    assert earliest["duration_minutes"] == 9 * 60
+
+
+def brute_force(legs, origin, destination, min_connection):
+    """Exhaustive search for (earliest arrival, cheapest fare)."""
+    planner = JourneyPlanner(legs)
+    best_arrival, best_fare = None, None
+
+    def walk(i, fare):
+        nonlocal best_arrival, best_fare
+        fare += planner.fare[i]
+        if planner.dest[i] == destination:
+            arrival = planner.arr[i]
+            best_arrival = arrival if best_arrival is None else min(best_arrival, arrival)
+            best_fare = fare if best_fare is None else min(best_fare, fare)
+            return
+        for j in range(len(planner.legs)):
+            seated = planner.next_same_train[i] == j
+            change = (
+                planner.origin[j] == planner.dest[i]
+                and planner.dep[j] >= planner.arr[i] + min_connection
+            )
+            if seated or change:
+                walk(j, fare)
+
+    for i in range(len(planner.legs)):
+        if planner.origin[i] == origin:
+            walk(i, 0.0)
+    return planner, best_arrival, best_fare
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_matches_brute_force_on_random_timetables(seed):
+    rng = random.Random(seed)
+    legs = []
+    for train in range(1, 7):
+        station = rng.randint(1, 6)
+        minute = rng.randint(5 * 60, 12 * 60)
+        for _ in range(rng.randint(1, 4)):
+            nxt = rng.choice([s for s in range(1, 7) if s != station])
+            ride = rng.randint(30, 180)
+            legs.append(
+                leg(
+                    train, station, nxt,
+                    f"{minute // 60:02d}:{minute % 60:02d}",
+                    f"{(minute + ride) // 60:02d}:{(minute + ride) % 60:02d}",
+                    rng.randint(50, 400),
+                )
+            )
+            station = nxt
+            minute += ride + rng.randint(0, 60)
+
+    origin, destination = rng.sample(range(1, 7), 2)
+    planner, arrival, fare = brute_force(legs, origin, destination, 30)
+    result = planner.plan(
+        origin, destination, "2026-03-01", min_connection=30, max_delay=None
+    )
+
+    if arrival is None:
+        assert result["earliest"] is None and result["cheapest"] is None
+        return
+    earliest, cheapest = result["earliest"], result["cheapest"]
+    assert planner.arr[planner.legs.index(next(
+        l for l in planner.legs if l["id"] == earliest["rides"][-1]["schedule_ids"][-1]
+    ))] == arrival
+    assert cheapest["fare"] == pytest.approx(fare)
+
+
+def test_plan_journeys_validates_input(tmp_path):
+    setup_temp_db(tmp_path)
+    with pytest.raises(ValueError):
+        journey.plan_journeys(1, 1, "2026-02-15")
+    with pytest.raises(ValueError):
+        journey.plan_journeys(1, 4, "15/02/2026")
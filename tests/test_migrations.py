@@ -0,0 +1,185 @@
+import shutil
+import sqlite3
+
+import pytest
+
+from database import connection, migrate
+
+
+def open_db(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+@pytest.fixture
+def migrations_dir(tmp_path, monkeypatch):
+    """A private copy of the migrations folder that tests can add files to."""
+    target = tmp_path / "migrations"
+    shutil.copytree(migrate.MIGRATIONS_DIR, target)
+    monkeypatch.setattr(migrate, "MIGRATIONS_DIR", target)
+    monkeypatch.setattr(migrate, "SEED_PATH", target / "seed.sql")
+    migrate.available_migrations.cache_clear()
+    yield target
+    migrate.available_migrations.cache_clear()
+
+
+def test_fresh_database_is_migrated_and_seeded_once(tmp_path):
+    conn = open_db(tmp_path / "fresh.db")
+
+    applied = migrate.migrate(conn)
+    assert applied == [v for v, _, _ in migrate.available_migrations()]
+    assert migrate.current_version(conn) == migrate.latest_version()
+
+    stations = conn.execute("SELECT COUNT(*) FROM stations").fetchone()[0]
+    assert stations > 0
+
+    # second run is a no-op version check and does not re-seed
+    conn.execute("DELETE FROM stations")
+    conn.commit()
+    assert migrate.migrate(conn) == []
+    assert conn.execute("SELECT COUNT(*) FROM stations").fetchone()[0] == 0
+    conn.close()
+
+
+def test_legacy_database_is_adopted_without_losing_data(tmp_path):
+    db_file = tmp_path / "legacy.db"
+    conn = open_db(db_file)
+    conn.execute(
+        "CREATE TABLE stations (id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " code TEXT NOT NULL UNIQUE, name TEXT NOT NULL, city TEXT NOT NULL)"
+    )
+    conn.execute("INSERT INTO stations (code, name, city) VALUES ('OLD001', 'Old', 'Old')")
+    conn.commit()
+
+    migrate.migrate(conn)
+
+    assert conn.execute("SELECT 1 FROM stations WHERE code = 'OLD001'").fetchone()
+    assert migrate.current_version(conn) == migrate.latest_version()
+    conn.close()
+
+
+def test_only_pending_migrations_run(tmp_path, migrations_dir):
+    conn = open_db(tmp_path / "live.db")
+    migrate.migrate(conn)
+    base = migrate.latest_version()
+
+    (migrations_dir / f"{base + 1:04d}_add_notes.sql").write_text(
+        "CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT);\n"
+        "CREATE INDEX idx_notes_body ON notes (body);\n"
+    )
+    migrate.available_migrations.cache_clear()
+
+    assert migrate.migrate(conn) == [base + 1]
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'idx_notes_body'").fetchone()
+    conn.close()
+
+
+def test_failed_migration_rolls_back(tmp_path, migrations_dir):
+    conn = open_db(tmp_path / "broken.db")
+    migrate.migrate(conn)
+    base = migrate.latest_version()
+
+    (migrations_dir / f"{base + 1:04d}_broken.sql").write_text(
+        "CREATE TABLE half_done (id INTEGER PRIMARY KEY);\n"
+        "INSERT INTO no_such_table VALUES (1);\n"
+    )
+    migrate.available_migrations.cache_clear()
+
+    with pytest.raises(sqlite3.OperationalError):
+        migrate.migrate(conn)
+
+    assert migrate.current_version(conn) == base
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchone() is None
+    conn.close()
+
+
+def test_main_migrate_flag(tmp_path, capsys):
+    import main
+
+    connection.DB_PATH = tmp_path / "cli.db"
+    main.main(["--migrate"])
+    assert "Applied migrations" in capsys.readouterr().out
+
+    main.main(["--migrate"])
+    assert "up to date" in capsys.readouterr().out
+
+
+def test_main_migrate_flag_exits_non_zero_on_failure(tmp_path, capsys):
+    import main
+
+    # a directory cannot be opened as a database
+    connection.DB_PATH = tmp_path
+    with pytest.raises(SystemExit) as exited:
+        main.main(["--migrate"])
+    assert exited.value.code == 1
+    assert "Migration failed" in capsys.readouterr().out
+
+
+def test_booking_schedule_backfill_is_batched_and_skips_ambiguous(tmp_path, caplog):
+    conn = open_db(tmp_path / "backfill.db")
+    migrate.migrate(conn)
+
+    legs = [
+        # train 1 runs 1 -> 2 twice that day: bookings on it are ambiguous
+        (1, 1, 2, "2030-01-01", "08:00", "10:00"),
+        (1, 1, 2, "2030-01-01", "18:00", "20:00"),
+        (2, 2, 3, "2030-01-01", "09:00", "11:00"),
+    ]
+    for train_id, origin, dest, day, dep, arr in legs:
+        conn.execute(
+            """
+            INSERT INTO schedules (train_id, origin_station_id, destination_station_id,
+                departure_date, arrival_date, departure_time, arrival_time, fare)
+            VALUES (?, ?, ?, ?, ?, ?, ?, 100)
+            """,
+            (train_id, origin, dest, day, day, dep, arr),
+        )
+    unique_leg = conn.execute(
+        "SELECT id FROM schedules WHERE train_id = 2 AND departure_date = '2030-01-01'"
+    ).fetchone()[0]
+
+    bookings = [(1, 1, 2), (2, 2, 3), (2, 2, 3), (3, 4, 5)]
+    for i, (train_id, origin, dest) in enumerate(bookings):
+        conn.execute(
+            """
+            INSERT INTO bookings (booking_code, user_id, train_id, origin_station_id,
+                destination_station_id, travel_date, fare)
+            VALUES (?, 1, ?, ?, ?, '2030-01-01', 100)
+            """,
+            (f"OLD{i}", train_id, origin, dest),
+        )
+    conn.commit()
+
+    with caplog.at_level("WARNING", logger="database.migrate"):
+        assert migrate.backfill_booking_schedules(conn, batch_size=1) == 2
+    assert "1 bookings match several schedules" in caplog.text
+    assert "1 bookings match no schedule" in caplog.text
+
+    linked = dict(conn.execute("SELECT booking_code, schedule_id FROM bookings"))
+    assert linked == {"OLD0": None, "OLD1": unique_leg, "OLD2": unique_leg, "OLD3": None}
+
+    # finished: later runs do not revisit the rows left NULL
+    assert migrate.backfill_booking_schedules(conn) == 0
+    assert conn.execute("SELECT 1 FROM data_backfills WHERE name = 'booking_schedule_id'").fetchone()
+    conn.close()
+
+
+def test_refunded_amount_backfill_marks_old_refunds_full(tmp_path):
+    conn = open_db(tmp_path / "refunds.db")
+    migrate.migrate(conn)
+    conn.executemany(
+        """
+        INSERT INTO payments (booking_id, amount, method, status, transaction_id)
+        VALUES (?, ?, 'upi', ?, ?)
+        """,
+        [(1, 220, "refunded", "TX1"), (2, 150, "success", "TX2"), (3, 300, "refunded", "TX3")],
+    )
+    conn.commit()
+
+    assert migrate.backfill_refunded_amounts(conn, batch_size=1) == 2
+    assert dict(conn.execute("SELECT transaction_id, refunded_amount FROM payments")) == {
+        "TX1": 220, "TX2": 0, "TX3": 300,
+    }
+    assert migrate.backfill_refunded_amounts(conn) == 0
+    conn.close()
@@ -1,6 +1,6 @@
 import sqlite3
 
-from database import connection, queries
+from database import connection, migrate
 from services import user as user_service
 
 
@@ -26,21 +26,22 @@ def test_passenger_list_add_update_remove(tmp_path):
 
     # add passenger
     p = {"name": "Child One", "dob": "2010-05-05", "gender": "female"}
-    updated = user_service.add_passenger(uid, p)
-    assert len(updated) == 1
-    assert updated[0]["name"] == "Child One"
+    added = user_service.add_passenger(uid, p)
+    assert added["name"] == "Child One"
+    assert user_service.list_passengers(uid) == [added]
 
     # update passenger
     newp = {"name": "Child One Jr", "dob": "2010-05-05", "gender": "female"}
-    updated2 = user_service.update_passenger(uid, 0, newp)
-    assert updated2[0]["name"] == "Child One Jr"
+    updated = user_service.update_passenger(uid, added["id"], newp)
+    assert updated == {**newp, "id": added["id"]}
+    assert user_service.list_passengers(uid) == [updated]
 
     # remove passenger
-    updated3 = user_service.remove_passenger(uid, 0)
-    assert updated3 == []
+    user_service.remove_passenger(uid, added["id"])
+    assert user_service.list_passengers(uid) == []
 
 
-def test_update_out_of_range_raises(tmp_path):
+def test_update_unknown_passenger_raises(tmp_path):
     setup_temp_db(tmp_path)
     res = user_service.create_customer(
         "puser2", "puser2@example.com", "pass1234", full_name="P2", dob="1992-02-02", gender="other"
@@ -48,7 +49,109 @@ def test_update_out_of_range_raises(tmp_path):
     uid = res["id"]
 
     try:
-        user_service.update_passenger(uid, 0, {"name": "x"})
-        assert False, "expected IndexError"
-    except IndexError:
+        user_service.update_passenger(uid, 1, {"name": "x"})
+        assert False, "expected ValueError"
+    except ValueError:
         pass
+
+
+def test_passengers_are_rows_with_ids(tmp_path):
+    setup_temp_db(tmp_path)
+    uid = user_service.create_customer(
+        "puser3", "puser3@example.com", "Str0ng!Pass", full_name="P3", dob="1993-03-03", gender="female"
+    )["id"]
+
+    a = user_service.add_passenger(uid, {"name": "A", "dob": "2001-01-01", "berth": "lower"})
+    b = user_service.add_passenger(uid, {"name": "B"})
+    user_service.remove_passenger(uid, a["id"])
+
+    assert [p["name"] for p in user_service.list_passengers(uid)] == ["B"]
+    with connection.connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM passengers").fetchone()[0] == 1
+
+    user_service.update_passenger(uid, b["id"], {"name": "B2", "berth": "upper"})
+    assert user_service.get_passenger(uid, b["id"]) == {"id": b["id"], "name": "B2", "berth": "upper"}
+
+    try:
+        user_service.remove_passenger(uid, a["id"])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_passenger_ids_survive_concurrent_edits_and_stay_owned(tmp_path):
+    setup_temp_db(tmp_path)
+    uid, other = (
+        user_service.create_customer(
+            name, f"{name}@example.com", "Str0ng!Pass", full_name=name, dob="1990-01-01", gender="other"
+        )["id"]
+        for name in ("owner5", "other5")
+    )
+    a, b, c = (user_service.add_passenger(uid, {"name": n}) for n in "ABC")
+
+    # a session holding the list [A, B, C] removes B after another removed A
+    stale = user_service.list_passengers(uid)
+    user_service.remove_passenger(uid, a["id"])
+    user_service.remove_passenger(uid, stale[1]["id"])
+    assert [p["name"] for p in user_service.list_passengers(uid)] == ["C"]
+
+    # another user's passenger ids are not found
+    for attempt in (
+        lambda: user_service.get_passenger(other, c["id"]),
+        lambda: user_service.update_passenger(other, c["id"], {"name": "X"}),
+        lambda: user_service.remove_passenger(other, c["id"]),
+    ):
+        try:
+            attempt()
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+    assert user_service.get_passenger(uid, c["id"])["name"] == "C"
+
+
+def test_signup_passengers_json_is_stored_as_rows(tmp_path):
+    setup_temp_db(tmp_path)
+    uid = user_service.create_customer(
+        "puser4",
+        "puser4@example.com",
+        "Str0ng!Pass",
+        full_name="P4",
+        dob="1994-04-04",
+        gender="male",
+        passengers='[{"name": "Kid"}]',
+    )["id"]
+
+    assert [p["name"] for p in user_service.list_passengers(uid)] == ["Kid"]
+
+
+def test_legacy_passenger_blobs_are_converted_in_batches(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    blobs = [
+        '[{"name": "One", "dob": "2000-01-01"}, {"name": "Two", "age": 7}]',
+        "[]",
+        "not json",
+        '[{"name": "Three"}]',
+        None,
+        '[{"name": "Four", "gender": "female"}]',
+    ]
+    for i, blob in enumerate(blobs):
+        conn.execute(
+            "INSERT INTO users (username, email, password_hash, role, passengers)"
+            " VALUES (?, ?, 'x', 'customer', ?)",
+            (f"legacy{i}", f"legacy{i}@example.com", blob),
+        )
+    conn.commit()
+    first = conn.execute("SELECT id FROM users WHERE username = 'legacy0'").fetchone()[0]
+
+    assert migrate.convert_passenger_blobs(conn, batch_size=2) == 5
+    assert migrate.convert_passenger_blobs(conn, batch_size=2) == 0
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE passengers IS NOT NULL").fetchone()[0] == 0
+    conn.close()
+
+    assert user_service.list_passengers(first) == [
+        {"id": 1, "name": "One", "dob": "2000-01-01"},
+        {"id": 2, "name": "Two", "age": 7},
+    ]
+    assert [p["name"] for p in user_service.list_passengers(first + 5)] == ["Four"]
@@ -0,0 +1,127 @@
+"""EXPLAIN QUERY PLAN regression tests for the hot queries.
+
+Runs the real `database.queries` helpers against a database seeded with
+1M bookings and fails if any statement they issue needs a full scan.
+"""
+import sqlite3
+
+import pytest
+
+from database import migrate, queries
+
+BOOKING_ROWS = 1_000_000
+USERS = 1_000
+
+
+@pytest.fixture(scope="module")
+def big_db(tmp_path_factory):
+    db_file = tmp_path_factory.mktemp("plans") / "big.db"
+    conn = sqlite3.connect(db_file)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    migrate.migrate(conn)
+
+    conn.execute(
+        f"""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {USERS})
+        INSERT INTO users (username, email, password_hash, role)
+        SELECT 'u' || i, 'u' || i || '@example.com', 'x', 'customer' FROM n
+        """
+    )
+    conn.execute(
+        f"""
+        WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {BOOKING_ROWS})
+        INSERT INTO bookings (
+            booking_code, user_id, train_id, origin_station_id,
+            destination_station_id, travel_date, fare, created_at
+        )
+        SELECT 'BK' || i, 2 + i % {USERS}, 1 + i % 5, 1 + i % 20, 2 + i % 20,
+               date('2026-01-01', '+' || (i % 365) || ' days'), 100,
+               datetime('2026-01-01', '+' || i || ' seconds')
+        FROM n
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO payments (booking_id, amount, method, status, transaction_id)
+        SELECT id, fare, 'card', 'success', 'TX' || id FROM bookings
+        """
+    )
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def plans_for(conn, call):
+    """Run `call(conn)` and return the query plan of every statement it issued."""
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        call(conn)
+    finally:
+        conn.set_trace_callback(None)
+
+    plans = []
+    for sql in statements:
+        if not sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            continue
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        plans.append((sql, [row["detail"] for row in rows]))
+    assert plans, "no statements captured"
+    return plans
+
+
+def assert_no_full_scan(plans):
+    for sql, details in plans:
+        scans = [d for d in details if d.startswith("SCAN")]
+        assert not scans, f"full scan {scans} in:\n{sql}"
+
+
+def test_find_schedules_uses_index(big_db):
+    assert_no_full_scan(
+        plans_for(big_db, lambda c: queries.find_schedules(c, 1, 2, "2026-02-15"))
+    )
+
+
+def test_get_bookings_by_user_uses_index(big_db):
+    assert_no_full_scan(plans_for(big_db, lambda c: queries.get_bookings_by_user(c, 42)))
+
+
+def test_booking_exists_for_schedule_uses_index(big_db):
+    assert_no_full_scan(
+        plans_for(
+            big_db,
+            lambda c: queries.booking_exists_for_schedule(c, 1, 1, 2, "2026-02-15"),
+        )
+    )
+
+
+def test_get_passengers_uses_index(big_db):
+    assert_no_full_scan(plans_for(big_db, lambda c: queries.get_passengers(c, 42)))
+
+
+def test_get_passenger_blobs_uses_partial_index(big_db):
+    assert_no_full_scan(plans_for(big_db, lambda c: queries.get_passenger_blobs(c, 0, 500)))
+
+
+def test_get_booking_details_by_code_uses_index(big_db):
+    assert_no_full_scan(
+        plans_for(big_db, lambda c: queries.get_booking_details_by_code(c, "BK500000"))
+    )
+
+
+def test_reaper_batches_use_indexes(big_db):
+    for query in (
+        queries.delete_expired_sessions,
+        queries.fail_stale_pending_payments,
+        queries.delete_idempotency_keys_before,
+    ):
+        assert_no_full_scan(plans_for(big_db, lambda c: query(c, "2026-01-01", 500)))
+    big_db.rollback()
+
+
+def test_get_user_by_identifier_uses_indexes(big_db):
+    assert_no_full_scan(
+        plans_for(big_db, lambda c: queries.get_user_by_identifier(c, "u42@example.com"))
+    )
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from database import connection
+from services import reaper
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+def sql_time(delta):
+    return (datetime.now(timezone.utc) + delta).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def insert(db_file, sql, rows):
+    conn = connection.get_connection()
+    conn.executemany(sql, rows)
+    conn.commit()
+    conn.close()
+
+
+def scalar(sql):
+    conn = connection.get_connection()
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_reaps_expired_sessions_in_batches(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    expired = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+    live = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    insert(
+        db_file,
+        "INSERT INTO sessions (token, user_id, expires_at) VALUES (?, 1, ?)",
+        [(f"old{i}", expired) for i in range(1200)] + [(f"live{i}", live) for i in range(3)],
+    )
+
+    r = reaper.Reaper(db_file, batch_size=500)
+    assert r.run_once()["sessions"] == 1200
+    assert scalar("SELECT COUNT(*) FROM sessions") == 3
+
+    stats = r.metrics()
+    assert stats["sessions"]["batches"] == 3
+    assert stats["sessions"]["rows"] == 1200
+    assert stats["sessions"]["seconds"] > 0
+    assert stats["last_run_at"] is not None
+
+
+def test_marks_stale_pending_payments_failed(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    stale = sql_time(-reaper.PENDING_PAYMENT_TTL - timedelta(minutes=1))
+    fresh = sql_time(timedelta(0))
+    insert(
+        db_file,
+        """
+        INSERT INTO payments (booking_id, amount, method, status, transaction_id, created_at)
+        VALUES (1, 100, 'upi', ?, ?, ?)
+        """,
+        [
+            ("pending", "TX1", stale),
+            ("pending", "TX2", fresh),
+            ("success", "TX3", stale),
+        ],
+    )
+
+    assert reaper.Reaper(db_file).run_once()["payments"] == 1
+    conn = connection.get_connection()
+    statuses = dict(conn.execute("SELECT transaction_id, status FROM payments"))
+    conn.close()
+    assert statuses == {"TX1": "failed", "TX2": "pending", "TX3": "success"}
+
+
+def test_deletes_old_idempotency_keys(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    insert(
+        db_file,
+        """
+        INSERT INTO idempotency_keys (idempotency_key, request_hash, booking_id, response, created_at)
+        VALUES (?, 'h', 1, '{}', ?)
+        """,
+        [
+            ("old1", sql_time(-reaper.IDEMPOTENCY_KEY_TTL - timedelta(hours=1))),
+            ("old2", sql_time(-reaper.IDEMPOTENCY_KEY_TTL - timedelta(hours=1))),
+            ("new", sql_time(timedelta(0))),
+        ],
+    )
+
+    r = reaper.Reaper(db_file, batch_size=2)
+    assert r.run_once() == {"sessions": 0, "payments": 0, "idempotency_keys": 2}
+    # a full batch is followed by one more to confirm nothing is left
+    assert r.metrics()["idempotency_keys"]["batches"] == 2
+    assert scalar("SELECT idempotency_key FROM idempotency_keys") == "new"
+
+
+def test_rejects_empty_batches(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    with pytest.raises(ValueError):
+        reaper.Reaper(db_file, batch_size=0)
+
+
+def test_main_reap_flag_exit_status(tmp_path, capsys, monkeypatch):
+    import sqlite3
+
+    import main
+
+    setup_temp_db(tmp_path)
+    main.main(["--reap"])
+    assert "sessions: 0 rows" in capsys.readouterr().out
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(reaper, "run_once", locked)
+    with pytest.raises(SystemExit) as exited:
+        main.main(["--reap"])
+    assert exited.value.code == 1
+    assert "Cleanup failed" in capsys.readouterr().out
@@ -0,0 +1,125 @@
+import json
+
+import pytest
+
+from database import connection
+from services import schedule as schedule_service
+from services import schedule_import, timetable
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+HEADER = ",".join(schedule_import.FIELDS)
+
+
+def write_csv(tmp_path, lines):
+    path = tmp_path / "timetable.csv"
+    path.write_text("\n".join([HEADER] + lines) + "\n")
+    return path
+
+
+def schedule_count():
+    with connection.connect() as conn:
+        return conn.execute("SELECT COUNT(*) FROM schedules").fetchone()[0]
+
+
+def test_csv_import_inserts_valid_rows_and_reports_bad_ones(tmp_path):
+    setup_temp_db(tmp_path)
+    before = schedule_count()
+    timetable.get_index()  # loaded before the import, must not go stale
+
+    path = write_csv(
+        tmp_path,
+        [
+            "1,1,2,2026-05-01,2026-05-01,06:00,09:30,220",
+            "1,2,3,2026-05-01,2026-05-01,10:00,13:00,180",
+            "999,1,2,2026-05-01,2026-05-01,06:00,09:30,220",  # unknown train
+            "1,1,1,2026-05-01,2026-05-01,06:00,09:30,220",  # same station
+            "1,1,2,2026-05-01,2026-05-01,09:30,06:00,220",  # arrives first
+            "1,1,2,2026-05-01,2026-05-01,06:00,09:30,10",  # fare too low
+            "1,1,2,01-05-2026,2026-05-01,06:00,09:30,220",  # bad date
+            "1,1,2,2026-05-01,2026-05-01,06:00,09:30,220",  # duplicate of line 2
+        ],
+    )
+
+    report = schedule_import.import_schedules(path, chunk_size=3)
+
+    assert report["rows"] == 8
+    assert report["imported"] == 2
+    assert report["failed"] == 6
+    assert report["errors"] == [
+        (4, "train_id does not exist"),
+        (5, "origin and destination must be different"),
+        (6, "Arrival must be after departure"),
+        (7, "Minimum fare must be ₹50"),
+        (8, "dates must be YYYY-MM-DD"),
+        (9, "duplicate schedule"),
+    ]
+    assert schedule_count() == before + 2
+
+    legs = schedule_service.search_schedules(1, 2, "2026-05-01")
+    assert [leg["departure_time"] for leg in legs] == ["06:00"]
+
+
+def test_jsonl_import_reports_malformed_lines(tmp_path):
+    setup_temp_db(tmp_path)
+    path = tmp_path / "timetable.jsonl"
+    good = dict(
+        train_id=2,
+        origin_station_id=4,
+        destination_station_id=5,
+        departure_date="2026-05-02",
+        arrival_date="2026-05-02",
+        departure_time="07:00",
+        arrival_time="08:45",
+        fare=150,
+    )
+    path.write_text(
+        json.dumps(good) + "\n{not json\n\n" + json.dumps(dict(good, train_id="x")) + "\n"
+    )
+
+    report = schedule_import.import_schedules(path)
+
+    assert report["imported"] == 1
+    assert report["errors"] == [
+        (2, "not a JSON object"),
+        (4, "train and station ids must be integers"),
+    ]
+
+
+def test_import_rejects_unusable_files(tmp_path):
+    setup_temp_db(tmp_path)
+
+    with pytest.raises(ValueError, match="csv or .jsonl"):
+        schedule_import.import_schedules(tmp_path / "timetable.txt")
+    with pytest.raises(ValueError, match="Cannot read"):
+        schedule_import.import_schedules(tmp_path / "missing.csv")
+
+    path = tmp_path / "short.csv"
+    path.write_text("train_id,fare\n1,100\n")
+    with pytest.raises(ValueError, match="header is missing"):
+        schedule_import.import_schedules(path)
+
+
+def test_main_import_flag_exit_status(tmp_path, capsys):
+    import main
+
+    setup_temp_db(tmp_path)
+    path = write_csv(tmp_path, [])
+    main.main(["--import-schedules", str(path)])
+    assert "Imported 0 of 0 rows" in capsys.readouterr().out
+
+    for argv, message in (
+        (["--import-schedules", str(tmp_path / "missing.csv")], "Import failed"),
+        (["--import-schedules"], "Usage"),
+    ):
+        with pytest.raises(SystemExit) as exited:
+            main.main(argv)
+        assert exited.value.code == 1
+        assert message in capsys.readouterr().out
@@ -82,3 +82,37 @@ def test_create_and_find_schedule(tmp_path):
     row = rows[0]
     assert row["train_number"] == "500X00"
     conn.close()
+
+
+def test_find_schedules_range_builds_calendar(tmp_path):
+    setup_temp_db(tmp_path)
+
+    # seed: Indore -> Rewa on 2026-02-12 (train 2) and 2026-02-15 (train 1)
+    calendar = schedule_service.find_schedules_range(1, 2, "2026-02-11", "2026-02-16")
+
+    assert [day["date"] for day in calendar] == [
+        "2026-02-11", "2026-02-12", "2026-02-13",
+        "2026-02-14", "2026-02-15", "2026-02-16",
+    ]
+    by_date = {day["date"]: day for day in calendar}
+    assert by_date["2026-02-11"]["schedules"] == []
+    assert by_date["2026-02-11"]["cheapest_fare"] is None
+    assert by_date["2026-02-15"]["cheapest_fare"] == 220
+    assert by_date["2026-02-15"]["earliest_departure"] == "06:00"
+    assert by_date["2026-02-15"]["schedules"][0]["available_seats"] > 0
+    assert len(by_date["2026-02-12"]["schedules"]) == 1
+
+
+def test_find_schedules_range_validates_window(tmp_path):
+    setup_temp_db(tmp_path)
+
+    for start, end in [
+        ("2026-02-15", "2026-02-10"),
+        ("2026-02-01", "2026-04-01"),
+        ("15-02-2026", "2026-02-16"),
+    ]:
+        try:
+            schedule_service.find_schedules_range(1, 2, start, end)
+            assert False, f"expected ValueError for {start}..{end}"
+        except ValueError:
+            pass
@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+from database import connection, queries
+from services import booking as booking_service
+from services import inventory
+from services import schedule as schedule_service
+from services import station as station_service
+from services import train as train_service
+from services import user as user_service
+from services.payments import process_payment
+
+WORKERS = 64
+CAPACITY = 10
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+def make_small_train(capacity):
+    """A train with a single chair-car coach and one schedule."""
+    with connection.connect() as conn:
+        train_id = queries.create_train(conn, "900T00", "Tiny Shuttle")
+        queries.create_coaches(conn, train_id, [("C1", "chair", capacity)])
+    origin = station_service.add_station("TNYA01", "Tiny A", "Alpha")
+    dest = station_service.add_station("TNYB02", "Tiny B", "Beta")
+    schedule_id = schedule_service.create_schedule(
+        train_id, origin, dest, "2026-03-01", "2026-03-01", "08:00", "10:00", 100
+    )
+    return train_id, origin, dest, schedule_id
+
+
+def test_new_train_gets_default_layout(tmp_path):
+    setup_temp_db(tmp_path)
+    train_id = train_service.add_train("901T00", "Layout Test")
+
+    with connection.connect() as conn:
+        coaches = queries.get_coaches_by_train(conn, train_id)
+    assert [(c["coach_code"], c["seat_class"], c["seat_count"]) for c in coaches] == list(
+        inventory.DEFAULT_COACH_LAYOUT
+    )
+
+
+def test_configure_coaches_validates_layout(tmp_path):
+    setup_temp_db(tmp_path)
+    with connection.connect() as conn:
+        train_id = queries.create_train(conn, "902T00", "Bare Train")
+
+    with pytest.raises(ValueError):
+        inventory.configure_coaches(train_id, [("X1", "economy", 10)])
+
+    inventory.configure_coaches(train_id, [("C1", "chair", 5)])
+    with pytest.raises(ValueError):
+        inventory.configure_coaches(train_id, [("C2", "chair", 5)])
+
+
+def test_concurrent_bookings_never_oversell(tmp_path):
+    setup_temp_db(tmp_path)
+    user_service.create_customer(
+        "crowd", "crowd@example.com", "Str0ng!Pass",
+        full_name="Crowd", dob="1990-01-01", gender="other",
+    )
+    train_id, origin, dest, schedule_id = make_small_train(CAPACITY)
+
+    barrier = threading.Barrier(WORKERS)
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def worker():
+        barrier.wait()
+        try:
+            booked = booking_service.book_ticket(
+                username="crowd",
+                train_id=train_id,
+                origin_station_id=origin,
+                destination_station_id=dest,
+                travel_date="2026-03-01",
+                fare=100,
+                payment=process_payment(amount=100, method="card"),
+            )
+            with lock:
+                results.append(booked)
+        except ValueError as exc:
+            with lock:
+                errors.append(str(exc))
+
+    threads = [threading.Thread(target=worker) for _ in range(WORKERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(results) == CAPACITY
+    assert len(errors) == WORKERS - CAPACITY
+    assert all("No seats available" in e for e in errors)
+    assert sorted(r["seat_number"] for r in results) == list(range(1, CAPACITY + 1))
+    assert inventory.get_seat_availability(schedule_id) == {"chair": 0}
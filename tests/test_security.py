@@ -0,0 +1,141 @@
+import hashlib
+import threading
+
+import pytest
+
+from database import connection, queries
+from services import user as user_service
+from utils import security
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+@pytest.fixture
+def cheap_scrypt():
+    """A low-cost scrypt hasher, restoring the default afterwards."""
+    previous = security._hasher
+    security.configure(hasher=security.ScryptHasher(n=2**10))
+    yield
+    security.configure(hasher=previous)
+
+
+def test_hashes_are_salted_and_self_describing(cheap_scrypt):
+    first = security.hash_password("Str0ng!Pass")
+    second = security.hash_password("Str0ng!Pass")
+    assert first != second
+    assert first.startswith("scrypt$n=1024,r=8,p=1$")
+    assert security.verify_password("Str0ng!Pass", first)
+    assert not security.verify_password("wrong", first)
+    assert not security.needs_rehash(first)
+
+
+def test_pbkdf2_hasher_round_trip(cheap_scrypt):
+    scrypt_hash = security.hash_password("Str0ng!Pass")
+    security.configure(hasher=security.Pbkdf2Hasher(iterations=1_000))
+
+    encoded = security.hash_password("Str0ng!Pass")
+    assert encoded.startswith("pbkdf2_sha256$1000$")
+    assert security.verify_password("Str0ng!Pass", encoded)
+    assert not security.verify_password("wrong", encoded)
+    # hashes from the previous hasher still verify but should be replaced
+    assert security.verify_password("Str0ng!Pass", scrypt_hash)
+    assert security.needs_rehash(scrypt_hash)
+
+
+def test_cost_change_needs_rehash(cheap_scrypt):
+    encoded = security.hash_password("Str0ng!Pass")
+    security.configure(hasher=security.ScryptHasher(n=2**11))
+    assert security.needs_rehash(encoded)
+    assert security.verify_password("Str0ng!Pass", encoded)
+
+
+def test_legacy_sha256_and_malformed_hashes():
+    legacy = hashlib.sha256(b"Str0ng!Pass").hexdigest()
+    assert security.verify_password("Str0ng!Pass", legacy)
+    assert not security.verify_password("wrong", legacy)
+    assert security.needs_rehash(legacy)
+
+    for broken in ("", "scrypt$garbage", "pbkdf2_sha256$x$y$z", "bcrypt$1$2$3"):
+        assert not security.verify_password("Str0ng!Pass", broken)
+
+
+def test_configure_rejects_empty_pool():
+    with pytest.raises(ValueError):
+        security.configure(workers=0)
+
+
+def test_login_upgrades_legacy_hash(tmp_path, cheap_scrypt):
+    setup_temp_db(tmp_path)
+    legacy = hashlib.sha256(b"Str0ng!Pass").hexdigest()
+    conn = connection.get_connection()
+    conn.execute(
+        "INSERT INTO users (username, email, password_hash, role) VALUES (?, ?, ?, 'customer')",
+        ("legacy", "legacy@example.com", legacy),
+    )
+    conn.commit()
+    conn.close()
+
+    user_service.authenticate_user("legacy", "Str0ng!Pass")
+    with connection.connect() as conn:
+        stored = queries.get_user_by_username(conn, "legacy")["password_hash"]
+    assert stored.startswith("scrypt$")
+
+    # the upgraded hash keeps working, and a wrong password still fails
+    assert user_service.authenticate_user("legacy", "Str0ng!Pass")["username"] == "legacy"
+    with pytest.raises(ValueError):
+        user_service.authenticate_user("legacy", "wrong")
+
+
+def test_resizing_pool_while_hashing(cheap_scrypt):
+    errors = []
+
+    def hash_many():
+        try:
+            for _ in range(20):
+                assert security.verify_password("Str0ng!Pass", security.hash_password("Str0ng!Pass"))
+        except Exception as exc:  # pragma: no cover - reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=hash_many) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for size in [1, 2, 3] * 10:
+        security.configure(workers=size)
+    for thread in threads:
+        thread.join()
+    security.configure(workers=security.HASH_WORKERS)
+    assert errors == []
+
+
+def test_failed_sign_ins_without_a_hash_still_hash(tmp_path, cheap_scrypt, monkeypatch):
+    setup_temp_db(tmp_path)
+    user_service.create_customer(
+        "sleeper", "sleeper@example.com", "Str0ng!Pass",
+        full_name="Sleeper", dob="1990-01-01", gender="male",
+    )
+    with connection.connect() as conn:
+        conn.execute("UPDATE users SET status = 'inactive' WHERE username = 'sleeper'")
+
+    verified = []
+    hasher = security._hasher
+    real_verify = hasher.verify
+    monkeypatch.setattr(
+        hasher, "verify", lambda password, encoded: verified.append(1) or real_verify(password, encoded)
+    )
+
+    for attempt in (
+        lambda: user_service.authenticate_user("nobody", "Str0ng!Pass"),
+        lambda: user_service.authenticate_user("sleeper", "Str0ng!Pass"),
+        lambda: user_service.authenticate_admin("sleeper", "Str0ng!Pass"),
+        lambda: user_service.authenticate_customer("nobody", "Str0ng!Pass"),
+    ):
+        verified.clear()
+        with pytest.raises(ValueError):
+            attempt()
+        assert verified == [1]
@@ -0,0 +1,114 @@
+from database import connection, queries
+from services import booking as booking_service
+from services import inventory
+from services import schedule as schedule_service
+from services import user as user_service
+from services.payments import process_payment
+
+# seeded train 1 run on 2026-02-15: Indore(1) -> Rewa(2) -> Bhopal(3) -> Delhi(4) -> Agra(5)
+TRAIN = 1
+DATE = "2026-02-15"
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+def setup_single_seat_train(tmp_path):
+    """Give seeded train 1 a single one-seat coach and a customer."""
+    setup_temp_db(tmp_path)
+    with connection.connect() as conn:
+        conn.execute("DELETE FROM coaches WHERE train_id = ?", (TRAIN,))
+        conn.commit()
+        queries.create_coaches(conn, TRAIN, [("C1", "chair", 1)])
+    user_service.create_customer(
+        "legrider", "legrider@example.com", "Str0ng!Pass",
+        full_name="Leg Rider", dob="1990-01-01", gender="other",
+    )
+
+
+def book(origin, destination):
+    return booking_service.book_ticket(
+        username="legrider",
+        train_id=TRAIN,
+        origin_station_id=origin,
+        destination_station_id=destination,
+        travel_date=DATE,
+        fare=1,
+        payment=process_payment(amount=1, method="card"),
+    )
+
+
+def test_runs_chain_legs_by_station_and_time(tmp_path):
+    setup_temp_db(tmp_path)
+    with connection.connect() as conn:
+        runs = inventory.load_runs(conn, TRAIN, DATE)
+
+    run = next(r for r in runs if r.legs[0]["departure_date"] == DATE)
+    stations = [leg["origin_station_id"] for leg in run.legs]
+    stations.append(run.legs[-1]["destination_station_id"])
+    assert stations == [1, 2, 3, 4, 5]
+    assert inventory.TrainRun.span_mask(1, 2) == 0b0110
+
+
+def test_multi_leg_booking_spans_legs_and_sums_fares(tmp_path):
+    setup_single_seat_train(tmp_path)
+
+    booked = book(2, 4)  # Rewa -> Delhi
+
+    assert booked["departure_time"] == "10:00"
+    assert booked["arrival_time"] == "18:30"
+    assert booked["fare"] == 180 + 300
+
+    history = booking_service.get_booking_history("legrider")
+    assert history[0]["departure_time"] == "10:00"
+    assert history[0]["arrival_time"] == "18:30"
+
+
+def test_seat_is_reused_by_non_overlapping_journeys(tmp_path):
+    setup_single_seat_train(tmp_path)
+
+    book(2, 4)  # Rewa -> Delhi holds the only seat on legs 1..2
+    before = book(1, 2)  # Indore -> Rewa, leg 0
+    after = book(4, 5)  # Delhi -> Agra, leg 3
+    assert before["seat_number"] == after["seat_number"] == 1
+
+    try:
+        book(3, 5)  # Bhopal -> Agra overlaps leg 2
+        assert False, "expected overlapping journey to be sold out"
+    except ValueError:
+        pass
+
+
+def test_search_reports_per_leg_availability(tmp_path):
+    setup_single_seat_train(tmp_path)
+    book(2, 4)
+
+    rewa_bhopal = schedule_service.search_schedules(2, 3, DATE)
+    delhi_agra = schedule_service.search_schedules(4, 5, DATE)
+
+    assert rewa_bhopal[0]["available_seats"] == 0
+    assert delhi_agra[0]["available_seats"] == 1
+    assert delhi_agra[0]["seats_by_class"] == {"chair": 1}
+
+
+def test_schedule_covered_by_journey_cannot_be_deleted(tmp_path):
+    setup_single_seat_train(tmp_path)
+    book(1, 4)
+
+    with connection.connect() as conn:
+        middle = conn.execute(
+            "SELECT id FROM schedules WHERE train_id = ? AND origin_station_id = 2"
+            " AND departure_date = ?",
+            (TRAIN, DATE),
+        ).fetchone()["id"]
+
+    try:
+        schedule_service.delete_schedule(middle)
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
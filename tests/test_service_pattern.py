@@ -0,0 +1,144 @@
+from datetime import date, timedelta
+
+import pytest
+
+from database import connection, queries
+from services import schedule as schedule_service
+from services import service_pattern
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+def day(offset):
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+# an overnight run of seeded train 1: station 1 -> 2 in the evening, 2 -> 3
+# the next morning
+OVERNIGHT = [
+    dict(origin_station_id=1, destination_station_id=2,
+         departure_time="20:00", arrival_time="23:30", fare=220),
+    dict(origin_station_id=2, destination_station_id=3,
+         departure_time="00:15", arrival_time="04:00", fare=180,
+         departure_day_offset=1),
+]
+
+
+def pattern_schedules(pattern_id):
+    with connection.connect() as conn:
+        return conn.execute(
+            "SELECT * FROM schedules WHERE pattern_id = ? ORDER BY departure_date, departure_time",
+            (pattern_id,),
+        ).fetchall()
+
+
+def test_materialize_expands_runs_on_selected_weekdays(tmp_path):
+    setup_temp_db(tmp_path)
+    start = date.today() + timedelta(days=10)
+    pattern_id = service_pattern.create_pattern(
+        1,
+        OVERNIGHT,
+        valid_from=start.isoformat(),
+        valid_to=(start + timedelta(days=13)).isoformat(),
+        days=service_pattern.WEEKDAYS,
+    )
+
+    # inside the horizon: expanded as soon as it is created
+    run_days = [start + timedelta(days=i) for i in range(14)]
+    run_days = [d for d in run_days if d.weekday() < 5]
+    rows = pattern_schedules(pattern_id)
+    assert len(rows) == len(run_days) * 2
+    assert [(r["departure_date"], r["arrival_date"]) for r in rows[:2]] == [
+        (run_days[0].isoformat(), run_days[0].isoformat()),
+        ((run_days[0] + timedelta(days=1)).isoformat(),) * 2,
+    ]
+
+    # already expanded up to valid_to: nothing more to do
+    assert service_pattern.materialize((start + timedelta(days=90)).isoformat()) == 0
+    assert service_pattern.list_patterns()[0]["materialized_until"] == (
+        start + timedelta(days=13)
+    ).isoformat()
+
+
+def test_materialize_expands_beyond_the_horizon(tmp_path):
+    setup_temp_db(tmp_path)
+    horizon = service_pattern.ROLLING_HORIZON_DAYS
+    pattern_id = service_pattern.create_pattern(
+        1, OVERNIGHT[:1], valid_from=day(0), valid_to=day(horizon + 10)
+    )
+    assert len(pattern_schedules(pattern_id)) == horizon + 1
+
+    assert service_pattern.materialize(day(horizon + 30)) == 10
+    assert len(pattern_schedules(pattern_id)) == horizon + 11
+
+
+def test_first_expansion_skips_runs_already_departed(tmp_path):
+    setup_temp_db(tmp_path)
+    pattern_id = service_pattern.create_pattern(
+        1, OVERNIGHT[:1], valid_from=day(-365), valid_to=day(5)
+    )
+
+    dates = [r["departure_date"] for r in pattern_schedules(pattern_id)]
+    assert dates == [day(i) for i in range(6)]
+
+
+def test_created_pattern_is_visible_without_a_search(tmp_path):
+    setup_temp_db(tmp_path)
+    service_pattern.create_pattern(1, OVERNIGHT, valid_from=day(0))
+
+    # readers that never call ensure_horizon see the legs straight away
+    with connection.connect() as conn:
+        assert len(queries.find_schedules(conn, 1, 2, day(5))) == 1
+
+
+def test_search_expands_patterns_within_the_horizon(tmp_path):
+    setup_temp_db(tmp_path)
+    service_pattern.create_pattern(1, OVERNIGHT, valid_from=day(0))
+
+    found = schedule_service.search_schedules(1, 2, day(5))
+    assert [(s["departure_time"], s["fare"]) for s in found] == [("20:00", 220)]
+
+    horizon = service_pattern.ROLLING_HORIZON_DAYS
+    assert len(pattern_schedules(1)) == (horizon + 1) * 2
+    assert schedule_service.search_schedules(1, 2, day(horizon + 5)) == []
+
+    # the horizon is current: later searches expand nothing
+    assert service_pattern.ensure_horizon() == 0
+
+
+def test_expansion_skips_existing_schedules(tmp_path, caplog):
+    setup_temp_db(tmp_path)
+    schedule_service.create_schedule(1, 1, 2, day(3), day(3), "20:00", "23:30", 250)
+    with caplog.at_level("WARNING", logger="services.service_pattern"):
+        pattern_id = service_pattern.create_pattern(
+            1, OVERNIGHT[:1], valid_from=day(0), valid_to=day(6)
+        )
+
+    rows = pattern_schedules(pattern_id)
+    assert len(rows) == 6
+    assert day(3) not in {r["departure_date"] for r in rows}
+    assert f"service pattern {pattern_id}: skipped 1 of 7 legs" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "legs, kwargs, message",
+    [
+        (OVERNIGHT, {"days": []}, "at least one day"),
+        (OVERNIGHT, {"days": [7]}, "weekday numbers"),
+        ([], {}, "at least one leg"),
+        (OVERNIGHT[::-1], {}, "previous leg arrives"),
+        ([dict(OVERNIGHT[0], fare=10)], {}, "Minimum fare"),
+        ([dict(OVERNIGHT[0], destination_station_id=1)], {}, "must be different"),
+        (OVERNIGHT, {"valid_to": "2000-01-01"}, "valid_to"),
+    ],
+)
+def test_create_pattern_validates(tmp_path, legs, kwargs, message):
+    setup_temp_db(tmp_path)
+    with pytest.raises(ValueError, match=message):
+        service_pattern.create_pattern(1, legs, **{"valid_from": day(0), **kwargs})
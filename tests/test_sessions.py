@@ -1,10 +1,12 @@
 import sqlite3
+import time
 from datetime import datetime, timedelta, timezone
 from services import user as user_service
 
 from database import connection, queries
 from services import session as session_service
-from utils import security
+
+import pytest
 
 
 def setup_temp_db(tmp_path):
@@ -47,3 +49,232 @@ def test_session_expiry(tmp_path):
         assert False, "expected session to be invalid"
     except ValueError:
         pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+def make_user(username="store_user"):
+    res = user_service.create_customer(
+        username, f"{username}@example.com", "Str0ng!Pass",
+        full_name="Store User", dob="1990-01-01", gender="male",
+    )
+    return res["id"]
+
+
+def stored_session(token):
+    conn = connection.get_connection()
+    conn.row_factory = sqlite3.Row
+    try:
+        return queries.get_session(conn, token)
+    finally:
+        conn.close()
+
+
+def test_validate_session_never_touches_database(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    uid = make_user()
+    token = session_service.create_session_for_user(uid)
+    session_service.flush()
+
+    def no_database(*args, **kwargs):
+        raise AssertionError("validate_session used the database")
+
+    monkeypatch.setattr(connection, "connect", no_database)
+    for _ in range(100):
+        assert session_service.validate_session(token)["user_id"] == uid
+
+
+def test_session_changes_are_written_behind(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    uid = make_user()
+    store = session_service.SessionStore(db_file)
+
+    token = store.create(uid)
+    assert stored_session(token) is None
+    assert store.flush() == 1
+    row = stored_session(token)
+    assert row["user_id"] == uid
+    assert row["created_at"] == store.get(token)["created_at"]
+
+    store.invalidate(token)
+    assert store.get(token) is None
+    assert stored_session(token) is not None
+    store.flush()
+    assert stored_session(token) is None
+
+
+def test_session_read_through_from_database(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    uid = make_user()
+    first = session_service.SessionStore(db_file)
+    token = first.create(uid)
+    first.flush()
+
+    # e.g. the next run of the program
+    second = session_service.SessionStore(db_file)
+    assert second.get(token)["user_id"] == uid
+    assert second.get("no-such-token") is None
+
+
+def test_sweep_drops_expired_sessions(tmp_path):
+    db_file = setup_temp_db(tmp_path)
+    uid = make_user()
+    clock = FakeClock()
+    store = session_service.SessionStore(db_file, clock=clock)
+
+    old = store.create(uid)
+    invalidated = store.create(uid)
+    store.invalidate(invalidated)
+    clock.now += 3600
+    fresh = store.create(uid)
+    store.flush()
+
+    clock.now += session_service.SESSION_TTL.total_seconds() - 1800
+    assert store.sweep() == 1
+    assert store.sweep() == 0
+    assert store.get(old) is None
+    assert store.get(fresh)["user_id"] == uid
+
+    store.flush()
+    assert stored_session(old) is None
+    assert stored_session(fresh) is not None
+
+
+def test_failed_flush_keeps_changes_queued(tmp_path, monkeypatch):
+    db_file = setup_temp_db(tmp_path)
+    uid = make_user()
+    store = session_service.SessionStore(db_file)
+    token = store.create(uid)
+
+    def fail(conn, rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(queries, "save_sessions", fail)
+    with pytest.raises(sqlite3.OperationalError):
+        store.flush()
+    monkeypatch.undo()
+
+    assert store.flush() == 1
+    assert stored_session(token) is not None
+
+
+def test_read_through_during_flush_does_not_revive_a_logout(tmp_path, monkeypatch):
+    db_file = setup_temp_db(tmp_path)
+    uid = make_user()
+    first = session_service.SessionStore(db_file)
+    token = first.create(uid)
+    first.flush()
+
+    # another store that never cached the token logs it out
+    store = session_service.SessionStore(db_file)
+    store.invalidate(token)
+    seen = []
+    delete_sessions = queries.delete_sessions
+
+    def read_mid_flush(conn, tokens):
+        # the row is still there, but the logout is not committed yet
+        seen.append(store.get(token))
+        delete_sessions(conn, tokens)
+
+    monkeypatch.setattr(queries, "delete_sessions", read_mid_flush)
+    assert store.flush() == 1
+    assert seen == [None]
+    assert store.get(token) is None
+    assert stored_session(token) is None
+
+
+def test_read_through_racing_a_committed_flush_rereads(tmp_path, monkeypatch):
+    db_file = setup_temp_db(tmp_path)
+    uid = make_user()
+    first = session_service.SessionStore(db_file)
+    token = first.create(uid)
+    first.flush()
+
+    store = session_service.SessionStore(db_file)
+    get_session = queries.get_session
+    raced = []
+
+    def logout_after_read(conn, wanted):
+        row = get_session(conn, wanted)
+        if not raced:
+            # the logout is queued and committed after the row was read
+            raced.append(row)
+            store.invalidate(wanted)
+            store.flush()
+        return row
+
+    monkeypatch.setattr(queries, "get_session", logout_after_read)
+    assert store.get(token) is None
+    assert raced[0] is not None
+    assert store.get(token) is None
+
+
+def test_switching_database_retries_a_failed_flush(tmp_path, monkeypatch, caplog):
+    db_file = setup_temp_db(tmp_path / "a")
+    uid = make_user()
+    token = session_service.create_session_for_user(uid)
+    first = session_service.get_store()
+
+    def fail(conn, rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(queries, "save_sessions", fail)
+    with caplog.at_level("WARNING", logger="services.session"):
+        setup_temp_db(tmp_path / "b")
+        session_service.get_store()
+    assert f"could not flush sessions to {db_file}" in caplog.text
+    assert first in session_service._retired
+    monkeypatch.undo()
+
+    # the retired store is retried, then let go
+    session_service._flush_retired()
+    assert first not in session_service._retired
+    connection.DB_PATH = db_file
+    assert stored_session(token) is not None
+
+
+def test_device_session_auto_login(tmp_path, monkeypatch):
+    db_file = setup_temp_db(tmp_path)
+    uid = make_user("device_user")
+    assert session_service.get_device_session() is None
+
+    token = session_service.create_session_for_user(uid)
+    session_service.remember_device(token)
+    assert (db_file.parent / "test.db.session").stat().st_mode & 0o077 == 0
+
+    # the next run of the program starts with an empty store
+    session_service.flush()
+    monkeypatch.setattr(session_service, "_store", None)
+    active = session_service.get_device_session()
+    assert active["token"] == token
+    assert active["username"] == "device_user"
+    assert active["role"] == "customer"
+
+
+def test_device_session_cleared_on_logout(tmp_path):
+    setup_temp_db(tmp_path)
+    uid = make_user("device_out")
+    token = session_service.create_session_for_user(uid)
+    session_service.remember_device(token)
+
+    session_service.invalidate_session(token)
+    assert session_service.get_device_session() is None
+    assert not (tmp_path / "test.db.session").exists()
+
+
+def test_expired_device_session_is_forgotten(tmp_path):
+    setup_temp_db(tmp_path)
+    uid = make_user("device_old")
+    expired = (datetime.now(timezone.utc) - timedelta(minutes=1)).isoformat()
+    with connection.connect() as conn:
+        queries.create_session(conn, "oldtoken", uid, expired)
+    session_service.remember_device("oldtoken")
+
+    assert session_service.get_device_session() is None
+    assert not (tmp_path / "test.db.session").exists()
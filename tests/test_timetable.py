@@ -0,0 +1,107 @@
+from datetime import date, timedelta
+
+import pytest
+
+from database import connection, queries
+from services import journey, timetable
+from services import schedule as schedule_service
+from services import station as station_service
+from services import train as train_service
+
+
+def setup_temp_db(tmp_path):
+    db_file = tmp_path / "test.db"
+    connection.DB_PATH = db_file
+    conn = connection.get_connection()
+    conn.close()
+    return db_file
+
+
+def future(days):
+    return (date.today() + timedelta(days=days)).isoformat()
+
+
+def test_reads_do_not_touch_the_database(tmp_path, monkeypatch):
+    setup_temp_db(tmp_path)
+    index = timetable.get_index()
+
+    def no_db(*args, **kwargs):
+        raise AssertionError("timetable read went to the database")
+
+    monkeypatch.setattr(queries, "get_timetable_rows", no_db)
+    monkeypatch.setattr(connection, "connect", no_db)
+
+    assert timetable.get_index() is index
+    legs = index.search(1, 2, "2026-02-15")
+    assert [leg["train_number"] for leg in legs] == ["12001"]
+    assert dict(legs[0])["departure_time"] == "06:00"
+
+    run = index.train_legs_between(1, "2026-02-15", "2026-02-15")
+    assert [leg["origin_station_id"] for leg in run] == [1, 2, 3, 4]
+
+
+def test_schedule_writes_patch_the_index(tmp_path):
+    setup_temp_db(tmp_path)
+    index = timetable.get_index()
+    day = future(30)
+
+    schedule_id = schedule_service.create_schedule(1, 1, 3, day, day, "05:00", "07:00", 150)
+    assert [leg["id"] for leg in index.search(1, 3, day)] == [schedule_id]
+    assert index.get(schedule_id)["train_name"]
+
+    later = future(31)
+    schedule_service.update_schedule(schedule_id, 1, 1, 5, later, later, "05:00", "07:30", 160)
+    assert index.search(1, 3, day) == []
+    moved = index.search(1, 5, later)
+    assert [(leg["id"], leg["fare"]) for leg in moved] == [(schedule_id, 160)]
+
+    schedule_service.delete_schedule(schedule_id)
+    assert index.search(1, 5, later) == []
+    assert index.get(schedule_id) is None
+
+    # a fresh load from the database agrees with the patched index
+    timetable.reset()
+    fresh = timetable.get_index()
+    assert set(fresh.by_id) == set(index.by_id)
+
+
+def test_train_changes_patch_the_index(tmp_path):
+    setup_temp_db(tmp_path)
+    index = timetable.get_index()
+
+    train_service.update_train(1, "Renamed Express")
+    assert {leg["train_name"] for leg in index.train_legs_between(1, "2026-02-15", "2026-02-15")} == {
+        "Renamed Express"
+    }
+
+    train_service.remove_train(1)
+    assert all(leg["train_id"] != 1 for leg in index.active_between("2026-02-15", "2026-02-15"))
+
+
+def test_station_service_remove_train_patches_the_index(tmp_path):
+    setup_temp_db(tmp_path)
+    index = timetable.get_index()
+    assert any(leg["train_id"] == 1 for leg in index.active_between("2026-02-15", "2026-02-15"))
+
+    station_service.remove_train(1)
+    assert timetable.get_index() is index
+    assert all(leg["train_id"] != 1 for leg in index.active_between("2026-02-15", "2026-02-15"))
+
+
+def test_switching_database_reloads(tmp_path):
+    setup_temp_db(tmp_path / "a")
+    first = timetable.get_index()
+    setup_temp_db(tmp_path / "b")
+    assert timetable.get_index() is not first
+
+
+def test_journey_planner_sees_new_schedules(tmp_path):
+    setup_temp_db(tmp_path)
+    day = future(40)
+
+    assert journey.plan_journeys(5, 1, day)["earliest"] is None
+
+    schedule_service.create_schedule(2, 5, 1, day, day, "08:00", "12:00", 300)
+    earliest = journey.plan_journeys(5, 1, day)["earliest"]
+    assert earliest is not None
+    assert earliest["fare"] == pytest.approx(300)
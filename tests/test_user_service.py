@@ -67,3 +67,47 @@ def test_create_customer_success(tmp_path):
     assert row["email"] == "custalice@example.com"
     assert row["role"] == "customer"
     conn.close()
+
+
+def make_customer(username, email, **fields):
+    fields.setdefault("full_name", "Test Customer")
+    fields.setdefault("dob", "1990-01-01")
+    fields.setdefault("gender", "female")
+    return user_service.create_customer(username, email, "Str0ng!Pass", **fields)
+
+
+def test_signup_maps_unique_violations_to_fields(tmp_path):
+    setup_temp_db(tmp_path)
+    make_customer("uniq", "uniq@example.com", mobile="9000000001", aadhaar="111122223333")
+
+    for kwargs, field in (
+        ({"username": "uniq", "email": "other@example.com"}, "username"),
+        ({"username": "other", "email": "uniq@example.com"}, "email"),
+        ({"username": "other", "email": "other@example.com", "mobile": "9000000001"}, "mobile"),
+        ({"username": "other", "email": "other@example.com", "aadhaar": "111122223333"}, "aadhaar"),
+    ):
+        with pytest.raises(ValueError, match=f"^{field} already exists$"):
+            make_customer(kwargs.pop("username"), kwargs.pop("email"), **kwargs)
+
+    with pytest.raises(ValueError, match="^email already exists$"):
+        user_service.create_admin("uniq_admin", "uniq@example.com", "Str0ng!Pass")
+
+
+def test_authenticate_by_username_email_or_mobile(tmp_path):
+    setup_temp_db(tmp_path)
+    uid = make_customer("ident", "ident@example.com", mobile="9000000002")["id"]
+
+    for identifier in ("ident", "ident@example.com", "9000000002"):
+        assert user_service.authenticate_user(identifier, "Str0ng!Pass")["id"] == uid
+    with pytest.raises(ValueError):
+        user_service.authenticate_user("nobody@example.com", "Str0ng!Pass")
+
+
+def test_authenticate_prefers_username_match(tmp_path):
+    setup_temp_db(tmp_path)
+    by_email = make_customer("first", "shared@example.com")["id"]
+    by_username = make_customer("shared@example.com", "second@example.com")["id"]
+
+    with connection.connect() as conn:
+        assert queries.get_user_by_identifier(conn, "shared@example.com")["id"] == by_username
+        assert queries.get_user_by_identifier(conn, "first")["id"] == by_email
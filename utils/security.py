@@ -1,12 +1,223 @@
+"""Password hashing.
+
+Hashes are self-describing, so the algorithm and its cost can change
+without invalidating stored passwords:
+
+    scrypt$n=16384,r=8,p=1$<salt>$<hash>
+    pbkdf2_sha256$600000$<salt>$<hash>
+
+(salt and hash in unpadded base64). New hashes use the configured hasher,
+scrypt by default. Older formats, including the unsalted SHA-256 hex digests
+of earlier releases, still verify; `needs_rehash` tells the caller to store
+a fresh hash after a successful login.
+
+Hashing is deliberately slow (tens of milliseconds). `hashlib` releases the
+GIL while it works, so hashes run on a bounded thread pool of
+`HASH_WORKERS` threads: logins on different threads use several cores,
+and at most that many hashes (and scrypt buffers) are in flight at once.
+"""
+
+from __future__ import annotations
+
+import base64
 import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# concurrent hashes; each scrypt hash at the default cost uses 16 MiB
+HASH_WORKERS = min(4, os.cpu_count() or 1)
+
+_SALT_BYTES = 16
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+class ScryptHasher:
+    """Memory-hard scrypt; cost grows with `n` (CPU and memory) and `r`."""
+
+    algorithm = "scrypt"
+
+    def __init__(self, n: int = 2**14, r: int = 8, p: int = 1):
+        if n < 2 or n & (n - 1):
+            raise ValueError("n must be a power of two")
+        self.n, self.r, self.p = n, r, p
+
+    @property
+    def _params(self) -> str:
+        return f"n={self.n},r={self.r},p={self.p}"
+
+    @staticmethod
+    def _derive(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p, maxmem=2 * 128 * n * r * p
+        )
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(_SALT_BYTES)
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return f"{self.algorithm}${self._params}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        _, params, salt, digest = encoded.split("$")
+        cost = dict(item.split("=") for item in params.split(","))
+        actual = self._derive(
+            password, _unb64(salt), int(cost["n"]), int(cost["r"]), int(cost["p"])
+        )
+        return hmac.compare_digest(actual, _unb64(digest))
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return encoded.split("$")[1] != self._params
+
+
+class Pbkdf2Hasher:
+    """PBKDF2-HMAC-SHA256; cost grows linearly with `iterations`."""
+
+    algorithm = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = 600_000):
+        if iterations < 1:
+            raise ValueError("iterations must be positive")
+        self.iterations = iterations
+
+    def hash(self, password: str) -> str:
+        salt = os.urandom(_SALT_BYTES)
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, self.iterations)
+        return f"{self.algorithm}${self.iterations}${_b64(salt)}${_b64(digest)}"
+
+    def verify(self, password: str, encoded: str) -> bool:
+        _, iterations, salt, digest = encoded.split("$")
+        actual = hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), _unb64(salt), int(iterations)
+        )
+        return hmac.compare_digest(actual, _unb64(digest))
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return encoded.split("$")[1] != str(self.iterations)
+
+
+def _verify_legacy_sha256(password: str, stored_hash: str) -> bool:
+    # unsalted single-round SHA-256 hex, as stored by earlier releases
+    digest = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.compare_digest(digest, stored_hash)
+
+
+# verification reads the cost from the stored hash, so defaults will do
+_VERIFIERS = {
+    ScryptHasher.algorithm: ScryptHasher(),
+    Pbkdf2Hasher.algorithm: Pbkdf2Hasher(),
+}
+
+_lock = threading.Lock()
+_hasher = ScryptHasher()
+_workers = HASH_WORKERS
+_executor: ThreadPoolExecutor | None = None
+
+
+def configure(*, hasher=None, workers: int | None = None) -> None:
+    """Set the hasher used for new hashes and/or the hashing pool size."""
+    global _hasher, _workers, _executor
+    if workers is not None and workers < 1:
+        raise ValueError("workers must be positive")
+    retired = None
+    with _lock:
+        if hasher is not None:
+            _hasher = hasher
+        if workers is not None and workers != _workers:
+            _workers = workers
+            # new hashes go to a new pool; the old one finishes what it has
+            retired, _executor = _executor, None
+    if retired is not None:
+        retired.shutdown(wait=False)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_workers, thread_name_prefix="password-hash"
+            )
+        return _executor
+
+
+def _run(fn, *args):
+    """Run one hash on the pool and wait for it."""
+    try:
+        future = _pool().submit(fn, *args)
+    except RuntimeError:
+        # `configure` retired the pool between lookup and submit
+        future = _pool().submit(fn, *args)
+    return future.result()
 
 
 def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
+    return _run(_hasher.hash, password)
 
 
 def verify_password(password: str, stored_hash: str) -> bool:
     """
-    Verify a plain-text password against a stored SHA-256 hash.
+    Verify a plain-text password against a stored hash in any supported
+    format. Malformed hashes never verify.
     """
-    return hash_password(password) == stored_hash
+    if not stored_hash:
+        return False
+    algorithm = stored_hash.split("$", 1)[0]
+    if algorithm == stored_hash:
+        return _verify_legacy_sha256(password, stored_hash)
+    verifier = _VERIFIERS.get(algorithm)
+    if verifier is None:
+        return False
+    try:
+        return _run(verifier.verify, password, stored_hash)
+    except (ValueError, KeyError, TypeError):
+        return False
+
+
+_dummy: tuple | None = None  # (hasher, a hash it made)
+
+
+def verify_dummy(password: str) -> bool:
+    """
+    Verify `password` against a throwaway hash from the current hasher and
+    return False. Sign-in failures that have no real hash to check (unknown
+    user, wrong role, inactive account) call this so they take as long as
+    a wrong password, and response times do not reveal which accounts
+    exist.
+    """
+    global _dummy
+    hasher, dummy = _dummy or (None, None)
+    if hasher is not _hasher:
+        hasher = _hasher
+        dummy = _run(hasher.hash, os.urandom(_SALT_BYTES).hex())
+        _dummy = (hasher, dummy)
+    _run(hasher.verify, password, dummy)
+    return False
+
+
+def needs_rehash(stored_hash: str) -> bool:
+    """True if `stored_hash` is not what the current hasher would store."""
+    hasher = _hasher
+    if stored_hash.split("$", 1)[0] != hasher.algorithm:
+        return True
+    try:
+        return hasher.needs_rehash(stored_hash)
+    except IndexError:
+        return True
+
+
+def _reset_after_fork() -> None:
+    # the pool's threads do not survive a fork
+    global _executor
+    _executor = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)